@@ -0,0 +1,324 @@
+"""
+Microbenchmarks with regression gates for the training, prediction and
+explainability code in src/.
+
+Each case runs at several synthetic scales (see benchmarks/synthetic.py),
+records wall time (median of --repeats runs) and tracemalloc peak memory
+(one extra run, since tracing slows the code down), and compares both with
+the stored baselines. The exit code is 1 when any case regresses beyond the
+tolerances, so the suite can gate a deploy:
+
+    python benchmarks/micro.py --scales 1k,100k                # check against baselines
+    python benchmarks/micro.py --scales 1k,100k,1M --update-baseline
+    python benchmarks/micro.py --cases predict,explain_prediction --scales 1M
+
+Baselines are machine specific; refresh them with --update-baseline when the
+hardware changes or after an intentional trade-off.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCH_DIR, '../src'))
+sys.path.append(BENCH_DIR)
+
+from bundle import ModelBundle
+import train_model
+import predict as predict_module
+from explainability import explain_prediction, explain_batch, RetentionReport
+from attribution import class_output
+from synthetic import parse_scale, synthetic_csv
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baselines.json')
+
+# The model used by the inference cases is always trained on this many rows,
+# so their numbers measure the amount of data scored, not a bigger forest.
+REFERENCE_TRAIN_ROWS = 1_000
+
+
+class ScaleContext:
+    """Lazily built inputs shared by every case at one scale (never timed)."""
+
+    def __init__(self, n_rows, workdir):
+        self.n_rows = n_rows
+        self.workdir = workdir
+        self._frame = None
+        self._features = None
+
+    @property
+    def csv_path(self):
+        return synthetic_csv(self.n_rows)
+
+    @property
+    def cache_dir(self):
+        # Data caches live in the run's workdir, never in the repository's .data_cache
+        return os.path.join(self.workdir, 'data_cache')
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = train_model.load_data(self.csv_path, cache_dir=self.cache_dir)
+        return self._frame
+
+    @property
+    def features(self):
+        if self._features is None:
+            self._features = train_model.preprocess_data(self.frame)
+        return self._features
+
+    @staticmethod
+    def reference_model(workdir):
+        path = os.path.join(workdir, 'reference_model.joblib')
+        if not os.path.exists(path):
+            frame = train_model.load_data(synthetic_csv(REFERENCE_TRAIN_ROWS), cache_dir=None)
+            X, y, le = train_model.preprocess_data(frame)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                train_model.save_artifacts(train_model.train_model(X, y), le, path)
+        return path
+
+
+# ===== Cases: each takes a ScaleContext and returns the zero-argument callable to time
+
+def case_load_data_cold(ctx):
+    # First read of a file: parse the CSV and write its cache entry (the entry
+    # is removed before each run, inside the timing)
+    path = ctx.csv_path
+    cache_dir = os.path.join(ctx.workdir, 'cold_cache')
+
+    def run():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        train_model.load_data(path, cache_dir=cache_dir)
+    return run
+
+
+def case_load_data_warm(ctx):
+    # Repeated read of the same file: hash it and load the cached columns
+    path = ctx.csv_path
+    train_model.load_data(path, cache_dir=ctx.cache_dir)
+    return lambda: train_model.load_data(path, cache_dir=ctx.cache_dir)
+
+
+def case_preprocess_data(ctx):
+    frame = ctx.frame
+    return lambda: train_model.preprocess_data(frame)
+
+
+def case_train_model(ctx):
+    X, y, _ = ctx.features
+    return lambda: train_model.train_model(X, y)
+
+
+def case_predict(ctx):
+    X, _, _ = ctx.features
+    predict_module.MODEL_PATH = ScaleContext.reference_model(ctx.workdir)
+
+    def run():
+        if predict_module.predict(X) is None:
+            raise RuntimeError("src/predict.predict failed")
+    return run
+
+
+def case_explain_prediction(ctx):
+    X, _, _ = ctx.features
+    model = ModelBundle.load(ScaleContext.reference_model(ctx.workdir)).model
+    rows = X.to_numpy()
+    names = list(X.columns)
+
+    def run():
+        for row in rows:
+            explain_prediction(model, row, names)
+    return run
+
+
+def case_explain_batch(ctx):
+    X, _, _ = ctx.features
+    model = ModelBundle.load(ScaleContext.reference_model(ctx.workdir)).model
+    rows = X.to_numpy()
+    names = list(X.columns)
+    return lambda: explain_batch(model, rows, names)
+
+
+def case_predict_batch_attribution(ctx):
+    # The web app's predict_batch with TreeSHAP drivers on: one engine pass plus
+    # the top-3 attributions towards 'Dropout' for every row
+    X, _, _ = ctx.features
+    bundle = ModelBundle.load(ScaleContext.reference_model(ctx.workdir))
+    rows = X.to_numpy(dtype=np.float64)
+    output, direction = class_output(bundle.engine, bundle.labels.index('Dropout'))
+
+    def run():
+        bundle.engine.predict_proba(rows)
+        bundle.attribution.explain(rows, output, 3, direction)
+    return run
+
+
+def case_counselor_summary(ctx):
+    X, _, _ = ctx.features
+    model = ModelBundle.load(ScaleContext.reference_model(ctx.workdir)).model
+    drivers = explain_prediction(model, X.to_numpy()[0], list(X.columns))
+    risk_scores = np.random.default_rng(42).uniform(0, 100, ctx.n_rows)
+
+    def run():
+        for i, risk in enumerate(risk_scores):
+            RetentionReport.generate_counselor_summary(f"STU-{i:07d}", risk, drivers)
+    return run
+
+
+def case_counselor_bulk(ctx):
+    X, _, _ = ctx.features
+    model = ModelBundle.load(ScaleContext.reference_model(ctx.workdir)).model
+    drivers = explain_prediction(model, X.to_numpy()[0], list(X.columns))
+    risk_scores = np.random.default_rng(42).uniform(0, 100, ctx.n_rows)
+    path = os.path.join(ctx.workdir, 'counselor_reports.txt')
+
+    def run():
+        students = ((f"STU-{i:07d}", risk, drivers) for i, risk in enumerate(risk_scores))
+        RetentionReport.generate_bulk(students, path)
+    return run
+
+
+# name -> (case, max_rows). explain_prediction recomputes the forest's
+# feature_importances_ on every call (~7 ms per student), so it is capped to
+# keep the 1M scale runnable; "rows" in the results says what was measured.
+# explain_batch explains the same rows in one vectorized pass, uncapped.
+# predict_batch_attribution costs ~5 ms per row with the reference forest
+# (TreeSHAP is linear in rows x path length; see PREDICTOR_ATTRIBUTION in the
+# Django settings), so it is capped like explain_prediction.
+CASES = {
+    "load_data_cold": (case_load_data_cold, None),
+    "load_data_warm": (case_load_data_warm, None),
+    "preprocess_data": (case_preprocess_data, None),
+    "train_model": (case_train_model, None),
+    "predict": (case_predict, None),
+    "explain_prediction": (case_explain_prediction, 10_000),
+    "explain_batch": (case_explain_batch, None),
+    "predict_batch_attribution": (case_predict_batch_attribution, 1_000),
+    "counselor_summary": (case_counselor_summary, None),
+    "counselor_bulk": (case_counselor_bulk, None),
+}
+
+
+def measure(fn, repeats):
+    """Median wall time over `repeats` runs, plus tracemalloc peak of one more run."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(statistics.median(timings), 6), "peak_bytes": int(peak)}
+
+
+def run_suite(scales, cases, repeats, workdir):
+    results = {}
+    contexts = {}
+    for label in scales:
+        for name in cases:
+            case, max_rows = CASES[name]
+            n_rows = parse_scale(label) if max_rows is None else min(parse_scale(label), max_rows)
+            if n_rows not in contexts:
+                contexts = {n_rows: ScaleContext(n_rows, workdir)}  # keep one scale in memory at a time
+            fn = case(contexts[n_rows])
+            # Reports and training logs would swamp the output (and the timings)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                result = measure(fn, repeats)
+            results[f"{name}@{label}"] = dict(result, rows=n_rows)
+            print(f"{name}@{label}: {results[f'{name}@{label}']}", file=sys.stderr)
+    return results
+
+
+def compare(results, baselines, time_tolerance, memory_tolerance, min_seconds=0.005):
+    """
+    Returns the list of regressions. Timings under `min_seconds` of difference
+    are ignored, so sub-millisecond cases do not fail on scheduler noise.
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baselines.get(key)
+        if base is None:
+            continue
+        time_limit = base["seconds"] * (1 + time_tolerance)
+        if current["seconds"] > time_limit and current["seconds"] - base["seconds"] > min_seconds:
+            regressions.append({"case": key, "metric": "seconds",
+                                "baseline": base["seconds"], "current": current["seconds"]})
+        memory_limit = base["peak_bytes"] * (1 + memory_tolerance)
+        if current["peak_bytes"] > memory_limit:
+            regressions.append({"case": key, "metric": "peak_bytes",
+                                "baseline": base["peak_bytes"], "current": current["peak_bytes"]})
+    return regressions
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get("results", {})
+
+
+def save_baselines(path, results):
+    merged = load_baselines(path)
+    merged.update(results)
+    with open(path, 'w') as f:
+        json.dump({
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+            "results": dict(sorted(merged.items())),
+        }, f, indent=2)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the microbenchmark suite with regression gates.")
+    parser.add_argument('--scales', default='1k,100k,1M', help="Comma separated, e.g. 1k,100k,1M")
+    parser.add_argument('--cases', default=','.join(CASES), help="Comma separated subset of: " + ', '.join(CASES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baselines")
+    parser.add_argument('--time-tolerance', type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=0.10, help="Allowed peak memory growth")
+    parser.add_argument('--output', help="Also write the results as JSON here")
+    args = parser.parse_args()
+
+    cases = args.cases.split(',')
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args.scales.split(','), cases, args.repeats, workdir)
+
+    regressions = compare(results, load_baselines(args.baseline), args.time_tolerance, args.memory_tolerance)
+    report = {"results": results, "regressions": regressions}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        save_baselines(args.baseline, results)
+        print(f"Baselines updated in {args.baseline}", file=sys.stderr)
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Replay benchmark for the prediction path.
+
+Replays a JSONL workload of prediction requests against either the in-process
+service (`PredictionService.predict`) or the full Django stack (`POST /predict/`
+through the test client, with a throwaway test database), and writes latency
+percentiles, throughput and a per-stage breakdown as JSON.
+
+Each workload line is one student: either a flat object of the 36 snake_case
+feature fields, or `{"features": {...}}`. A workload can be generated from
+the shipped dataset:
+
+    python benchmarks/replay.py --generate 2000 --workload benchmarks/workload.jsonl
+    python benchmarks/replay.py --workload benchmarks/workload.jsonl --target service
+    python benchmarks/replay.py --workload benchmarks/workload.jsonl --target client --output client.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PROJECT_DIR = os.path.join(ROOT_DIR, 'student_dropout_project/student_dropout_project')
+DATA_PATH = os.path.join(ROOT_DIR, 'data.csv')
+sys.path.append(PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from predictor.services import PredictionService
+
+# Stages reported for every run, in pipeline order. "predict" (the label) is
+# taken from the argmax of the predict_proba pass, so it has no stage of its own.
+STAGES = ("frame_build", "predict_proba", "risk_scoring", "drivers", "db_save")
+
+
+class StageTimer:
+    """Accumulates per-stage seconds for the request currently being replayed."""
+
+    def __init__(self):
+        self.current = defaultdict(float)
+        self.totals = defaultdict(list)
+
+    def __call__(self, name, seconds):
+        self.current[name] += seconds
+
+    def finish_request(self):
+        for name in STAGES:
+            self.totals[name].append(self.current.get(name, 0.0))
+        self.current = defaultdict(float)
+
+
+def generate_workload(path, n_requests, seed=42):
+    """Samples `n_requests` students (with replacement) from data.csv into a JSONL workload."""
+    df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').drop('Target', axis=1)
+    df.columns = PredictionService._feature_columns
+    sample = df.sample(n=n_requests, replace=True, random_state=seed)
+    with open(path, 'w') as f:
+        for record in sample.to_dict('records'):
+            f.write(json.dumps(record) + '\n')
+    return path
+
+
+def load_workload(path, limit=None):
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            records.append(record.get('features', record))
+            if limit is not None and len(records) >= limit:
+                break
+    return records
+
+
+def summarize(latencies, wall_seconds, stage_timer):
+    latencies_ms = np.asarray(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    stages = {}
+    for name in STAGES:
+        values = np.asarray(stage_timer.totals[name]) * 1000.0
+        stages[name] = {
+            "mean_ms": round(float(values.mean()), 4),
+            "p95_ms": round(float(np.percentile(values, 95)), 4),
+            "share": round(float(values.sum() / latencies_ms.sum()), 4),
+        }
+    return {
+        "requests": len(latencies),
+        "latency_ms": {
+            "mean": round(float(latencies_ms.mean()), 4),
+            "p50": round(float(p50), 4),
+            "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4),
+            "max": round(float(latencies_ms.max()), 4),
+        },
+        "throughput_rps": round(len(latencies) / wall_seconds, 2),
+        "stages": stages,
+    }
+
+
+def replay_service(records, stage_timer, warmup):
+    for record in records[:warmup]:
+        PredictionService.predict(record)
+    stage_timer.current.clear()
+
+    latencies = []
+    start = time.perf_counter()
+    for record in records:
+        t0 = time.perf_counter()
+        PredictionService.predict(record)
+        latencies.append(time.perf_counter() - t0)
+        stage_timer.finish_request()
+    return latencies, time.perf_counter() - start
+
+
+def replay_client(records, stage_timer, warmup):
+    from django.contrib.auth.models import User
+    from django.db.models.signals import pre_save, post_save
+    from django.test import Client
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from predictor.models import PredictionHistory
+
+    # Integer model fields go through the form as integers, so round those inputs
+    integer_fields = {
+        field.name for field in PredictionHistory._meta.fields
+        if field.get_internal_type() == 'IntegerField'
+    }
+
+    def form_data(record):
+        return {
+            key: int(round(value)) if key in integer_fields else value
+            for key, value in record.items()
+        }
+
+    save_started = {}
+
+    def on_pre_save(sender, instance, **kwargs):
+        save_started[id(instance)] = time.perf_counter()
+
+    def on_post_save(sender, instance, **kwargs):
+        started = save_started.pop(id(instance), None)
+        if started is not None:
+            stage_timer("db_save", time.perf_counter() - started)
+
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    old_config = runner.setup_databases()
+    pre_save.connect(on_pre_save, sender=PredictionHistory)
+    post_save.connect(on_post_save, sender=PredictionHistory)
+    try:
+        client = Client()
+        client.force_login(User.objects.create_user('replay-benchmark'))
+        payloads = [form_data(record) for record in records]
+
+        for payload in payloads[:warmup]:
+            client.post('/predict/', payload)
+        stage_timer.current.clear()
+
+        latencies = []
+        failures = 0
+        start = time.perf_counter()
+        for payload in payloads:
+            t0 = time.perf_counter()
+            response = client.post('/predict/', payload)
+            latencies.append(time.perf_counter() - t0)
+            stage_timer.finish_request()
+            # A successful prediction redirects to the result page
+            if response.status_code != 302:
+                failures += 1
+        wall = time.perf_counter() - start
+    finally:
+        pre_save.disconnect(on_pre_save, sender=PredictionHistory)
+        post_save.disconnect(on_post_save, sender=PredictionHistory)
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+    if failures:
+        print(f"Warning: {failures} of {len(payloads)} form submissions did not produce a prediction")
+    return latencies, wall
+
+
+def run(workload, target='service', limit=None, warmup=20, use_cache=True):
+    if not use_cache:
+        settings.PREDICTOR_CACHE = dict(getattr(settings, 'PREDICTOR_CACHE', {}), BACKEND=None)
+    PredictionService._cache = None
+    PredictionService.preload()
+
+    records = load_workload(workload, limit)
+    if not records:
+        raise ValueError(f"Workload {workload} contains no requests")
+
+    stage_timer = StageTimer()
+    PredictionService.stage_hook = stage_timer
+    try:
+        if target == 'service':
+            latencies, wall = replay_service(records, stage_timer, warmup)
+        elif target == 'client':
+            latencies, wall = replay_client(records, stage_timer, warmup)
+        else:
+            raise ValueError(f"Unknown target: {target}")
+    finally:
+        PredictionService.stage_hook = None
+
+    report = summarize(latencies, wall, stage_timer)
+    report.update({
+        "target": target,
+        "workload": os.path.abspath(workload),
+        "cache": PredictionService.cache_stats() if use_cache else None,
+        "model_version": PredictionService.model_version,
+        "engine": type(PredictionService._snapshot()[0].engine).__name__,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a JSONL prediction workload and report latency.")
+    parser.add_argument('--workload', default=os.path.join(os.path.dirname(__file__), 'workload.jsonl'))
+    parser.add_argument('--generate', type=int, metavar='N', help="Write a workload of N sampled students first")
+    parser.add_argument('--target', choices=['service', 'client'], default='service')
+    parser.add_argument('--limit', type=int, help="Replay at most this many requests")
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--no-cache', action='store_true', help="Disable the prediction result cache")
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_workload(args.workload, args.generate)
+        print(f"Wrote {args.generate} requests to {args.workload}")
+
+    report = run(args.workload, args.target, args.limit, args.warmup, use_cache=not args.no_cache)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
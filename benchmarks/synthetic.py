@@ -0,0 +1,49 @@
+"""
+Synthetic student datasets with the data.csv schema.
+
+Every column is sampled independently from its empirical distribution in the
+shipped dataset, so generated files keep the real column names, dtypes, value
+ranges and class balance at any row count. Rows are not real students; use
+them for timing and memory only, never for model quality.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(ROOT_DIR, 'data.csv')
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+
+# Named scales accepted by the benchmark CLIs
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+
+def parse_scale(label):
+    """'100k' -> 100000; plain integers are accepted as well."""
+    if label in SCALES:
+        return SCALES[label]
+    return int(label)
+
+
+def generate(n_rows, seed=42, source=DATA_PATH):
+    """Returns an `n_rows` DataFrame with the columns and dtypes of `source`."""
+    reference = pd.read_csv(source, sep=';', encoding='utf-8-sig')
+    rng = np.random.default_rng(seed)
+
+    columns = {}
+    for name in reference.columns:
+        values, counts = np.unique(reference[name].to_numpy(), return_counts=True)
+        columns[name] = rng.choice(values, size=n_rows, p=counts / counts.sum())
+    return pd.DataFrame(columns, columns=reference.columns).astype(reference.dtypes.to_dict())
+
+
+def synthetic_csv(n_rows, seed=42, cache_dir=CACHE_DIR):
+    """Path to a data.csv-layout file with `n_rows` rows, generated once per (size, seed)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"synthetic_{n_rows}_{seed}.csv")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        generate(n_rows, seed).to_csv(tmp_path, sep=';', index=False)
+        os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+from bundle import ModelBundle
+
+RANDOM_STATE = 42
+
+# Model backends train_model.py can build. Each factory returns an unfitted
+# estimator; anything CompiledForest can compile is also served by the
+# PredictionService engine, the rest through sklearn.
+BACKENDS = {
+    'random_forest': lambda: RandomForestClassifier(
+        n_estimators=100,
+        random_state=RANDOM_STATE,
+        n_jobs=-1
+    ),
+    # Bins features once and grows trees on histograms using all cores;
+    # shallow boosted trees need far fewer node visits per prediction
+    'hist_gradient_boosting': lambda: HistGradientBoostingClassifier(
+        max_iter=200,
+        learning_rate=0.1,
+        max_leaf_nodes=31,
+        early_stopping=False,
+        random_state=RANDOM_STATE
+    ),
+}
+DEFAULT_BACKEND = 'random_forest'
+
+
+def make_backend(name=DEFAULT_BACKEND):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown backend {name!r}; choose from {', '.join(BACKENDS)}") from None
+
+
+def _median_ms(predict_proba, rows):
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return round(float(np.median(timings)) * 1000, 4)
+
+
+def compare_backends(X_train, y_train, X_test, y_test, names=None, class_names=None,
+                     n_single=200, batch_size=1000):
+    """
+    Trains every backend on the same split and measures what matters for
+    serving: training time, single-row latency (sklearn and the compiled
+    engine), batch latency, bundle size, node count and per-class F1.
+    """
+    X_test_array = np.asarray(X_test, dtype=np.float64)
+    rows = [X_test_array[i % len(X_test_array)][np.newaxis, :] for i in range(n_single)]
+    frames = [X_test.iloc[[i % len(X_test)]] for i in range(n_single)] if hasattr(X_test, 'iloc') else rows
+    batch = X_test.iloc[np.arange(batch_size) % len(X_test)] if hasattr(X_test, 'iloc') \
+        else X_test_array[np.arange(batch_size) % len(X_test_array)]
+
+    report = []
+    for name in names or BACKENDS:
+        model = make_backend(name)
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - start
+
+        bundle = ModelBundle.from_model(model)
+        fd, path = tempfile.mkstemp(suffix='.joblib')
+        os.close(fd)
+        try:
+            bundle.save(path)
+            size = os.path.getsize(path)
+        finally:
+            os.remove(path)
+
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        batch_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        y_pred = model.predict(X_test)
+        labels = np.unique(np.asarray(y_train))
+        per_class = f1_score(y_test, y_pred, labels=labels, average=None, zero_division=0)
+        names_out = class_names if class_names is not None else labels
+        report.append({
+            'backend': name,
+            'fit_seconds': round(fit_seconds, 3),
+            'single_row_ms': _median_ms(model.predict_proba, frames),
+            'engine_single_row_ms': _median_ms(bundle.engine.predict_proba, rows) if bundle.engine else None,
+            f'batch_{batch_size}_ms': batch_ms,
+            'bundle_bytes': size,
+            'nodes': bundle.engine.n_nodes if bundle.engine else None,
+            'accuracy': round(float(accuracy_score(y_test, y_pred)), 4),
+            'f1_per_class': {str(c): round(float(f), 4) for c, f in zip(names_out, per_class)},
+            'f1_macro': round(float(per_class.mean()), 4),
+        })
+    return report
+
+
+def format_comparison(report):
+    batch_key = next(key for key in report[0] if key.startswith('batch_'))
+    classes = list(report[0]['f1_per_class'])
+    header = (f"{'backend':<24} {'fit s':>7} {'1-row ms':>9} {'engine ms':>10} {batch_key.replace('_', ' '):>14} "
+              f"{'size MB':>8} {'nodes':>9} {'acc':>7} " + ' '.join(f"{'F1 ' + c:>13}" for c in classes))
+    lines = [header]
+    for row in report:
+        engine_ms = row['engine_single_row_ms']
+        nodes = row['nodes']
+        lines.append(
+            f"{row['backend']:<24} {row['fit_seconds']:>7.2f} {row['single_row_ms']:>9.3f} "
+            f"{(f'{engine_ms:.3f}' if engine_ms is not None else '-'):>10} {row[batch_key]:>14.1f} "
+            f"{row['bundle_bytes'] / 1e6:>8.2f} {(f'{nodes:,}' if nodes is not None else '-'):>9} "
+            f"{row['accuracy']:>7.4f} " + ' '.join(f"{row['f1_per_class'][c]:>13.4f}" for c in classes)
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import joblib
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+
+from data_loader import CSV_SCHEMA, TARGET_CLASSES, normalize_header
+from forest_engine import CompiledForest
+from attribution import TreeAttribution
+from compaction import compact_engine
+
+# Bump when the bundle layout changes; older readers refuse newer bundles
+BUNDLE_FORMAT = 1
+_REQUIRED_KEYS = ('format', 'model', 'engine', 'features', 'input_names', 'labels', 'version', 'metadata')
+
+
+class BundleSchemaError(ValueError):
+    """The bundle is not one this code can serve (format, features or labels disagree)."""
+
+
+class ModelBundle:
+    """
+    Everything needed to serve a model, in one file:
+
+    - model:        the fitted sklearn estimator (or pipeline)
+    - engine:       its CompiledForest, compiled at save time (None if unsupported)
+    - features:     canonical snake_case feature names, in the model's column order
+    - input_names:  the column names the model was fitted with (None for arrays)
+    - labels:       outcome name for each entry of model.classes_
+    - version:      content hash of the model, used e.g. as the cache key version
+
+    Saved as an uncompressed joblib dict, so one joblib.load(mmap_mode='r')
+    maps the engine arrays in place. load() validates the bundle against the
+    caller's expected features, so a mismatch fails at startup instead of
+    in the middle of a request.
+    """
+
+    def __init__(self, model, features: Sequence[str], labels: Sequence[str], version: str,
+                 engine: Optional[CompiledForest] = None, input_names: Optional[Sequence[str]] = None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.engine = engine
+        self.features = list(features)
+        self.input_names = list(input_names) if input_names is not None else None
+        self.labels = list(labels)
+        self.version = version
+        self.metadata = metadata or {}
+        self._label_map = dict(zip(np.asarray(model.classes_).tolist(), self.labels))
+        self._attribution = None
+
+    # ===== Construction
+    @classmethod
+    def from_model(cls, model, label_encoder=None, features: Optional[Sequence[str]] = None,
+                   labels: Optional[Sequence[str]] = None, metadata: Optional[Dict[str, Any]] = None) -> 'ModelBundle':
+        """
+        Wraps a fitted model. Features default to the model's own column names
+        (or the data.csv order for array-fitted models); labels come from the
+        LabelEncoder, or the classes themselves when they are already names.
+        """
+        input_names = getattr(model, 'feature_names_in_', None)
+        if features is None:
+            if input_names is not None:
+                features = [normalize_header(str(name)) for name in input_names]
+            elif model.n_features_in_ == len(CSV_SCHEMA):
+                features = [normalize_header(name) for name in CSV_SCHEMA]
+            else:
+                raise BundleSchemaError(f"Model has {model.n_features_in_} unnamed features; pass `features`")
+
+        classes = np.asarray(model.classes_)
+        if labels is not None:
+            labels = list(labels)
+        elif label_encoder is not None:
+            labels = [str(name) for name in label_encoder.inverse_transform(classes)]
+        elif classes.dtype.kind in 'OUS':
+            labels = [str(name) for name in classes]
+        else:
+            # LabelEncoder codes are alphabetical, i.e. the TARGET_CLASSES order
+            labels = [TARGET_CLASSES[int(code)] for code in classes]
+
+        try:
+            engine = compact_engine(CompiledForest.from_estimator(model))
+        except TypeError:
+            engine = None
+        version = hashlib.sha256(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()[:16]
+        return cls(model, features, labels, version, engine=engine, input_names=input_names, metadata=metadata)
+
+    # ===== Persistence
+    def save(self, path: str) -> str:
+        """Writes the bundle next to `path` and atomically renames it into place."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.incoming-', suffix='.joblib')
+        os.close(fd)
+        try:
+            # No compression, so joblib.load(mmap_mode='r') can map the arrays in place
+            joblib.dump({
+                'format': BUNDLE_FORMAT,
+                'model': self.model,
+                'engine': self.engine,
+                'features': self.features,
+                'input_names': self.input_names,
+                'labels': self.labels,
+                'version': self.version,
+                'metadata': self.metadata,
+            }, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str, expected_features: Optional[Sequence[str]] = None,
+             mmap_mode: Optional[str] = 'r') -> 'ModelBundle':
+        """Reads and validates a bundle; raises BundleSchemaError if it cannot be served."""
+        payload = joblib.load(path, mmap_mode=mmap_mode)
+        if not isinstance(payload, dict) or any(key not in payload for key in _REQUIRED_KEYS):
+            raise BundleSchemaError(f"{path} is not a model bundle; retrain or re-export it")
+        if payload['format'] != BUNDLE_FORMAT:
+            raise BundleSchemaError(f"{path} has bundle format {payload['format']}, expected {BUNDLE_FORMAT}")
+        bundle = cls(payload['model'], payload['features'], payload['labels'], payload['version'],
+                     engine=payload['engine'], input_names=payload['input_names'], metadata=payload['metadata'])
+        bundle.validate(expected_features)
+        return bundle
+
+    def validate(self, expected_features: Optional[Sequence[str]] = None) -> None:
+        n_features = getattr(self.model, 'n_features_in_', len(self.features))
+        if len(self.features) != n_features or len(set(self.features)) != len(self.features):
+            raise BundleSchemaError(f"Bundle lists {len(self.features)} features for a model with {n_features}")
+        if self.input_names is not None and [normalize_header(str(n)) for n in self.input_names] != self.features:
+            raise BundleSchemaError("Bundle feature order does not match the model's fitted columns")
+        if self.engine is not None and self.engine.n_features != n_features:
+            raise BundleSchemaError("Bundle engine was compiled for a different model")
+        if len(self.labels) != len(self._label_map):
+            raise BundleSchemaError(f"Bundle has {len(self.labels)} labels for {len(self._label_map)} classes")
+        if expected_features is not None and set(expected_features) != set(self.features):
+            missing = sorted(set(expected_features) - set(self.features))
+            unexpected = sorted(set(self.features) - set(expected_features))
+            raise BundleSchemaError(f"Bundle features do not match (missing: {missing}, unexpected: {unexpected})")
+
+    @property
+    def attribution(self) -> Optional[TreeAttribution]:
+        """
+        TreeSHAP attributions over the engine, or None if the model has no
+        engine (or it predates node cover). The path tables are built on first
+        access and cached with the bundle.
+        """
+        if self._attribution is None:
+            try:
+                self._attribution = TreeAttribution(self.engine) if self.engine is not None else False
+            except TypeError:
+                self._attribution = False
+        return self._attribution or None
+
+    # ===== Inference helpers
+    def decode(self, raw_labels) -> np.ndarray:
+        """Outcome names for raw model outputs (classes_ entries)."""
+        return np.array([self._label_map[raw] for raw in np.asarray(raw_labels).tolist()], dtype=object)
+
+    def frame(self, X: np.ndarray) -> pd.DataFrame:
+        """Rows in bundle feature order, named the way the model was fitted (avoids sklearn warnings)."""
+        return pd.DataFrame(X, columns=self.input_names if self.input_names is not None else self.features)
+
+    def align(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Reorders a DataFrame with canonical or data.csv column names into the model's input."""
+        renamed = frame.rename(columns=lambda name: normalize_header(str(name)))
+        missing = [name for name in self.features if name not in renamed.columns]
+        if missing:
+            raise ValueError(f"Missing features: {', '.join(missing)}")
+        return self.frame(renamed[self.features].to_numpy(dtype=np.float64))
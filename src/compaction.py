@@ -0,0 +1,195 @@
+import copy
+import os
+import pickle
+import tempfile
+import time
+import joblib
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.pipeline import Pipeline
+
+from forest_engine import CompiledForest
+from estimators import FORESTS, split_pipeline
+
+# Candidate pruning strengths, mildest first: a split is kept only if at least
+# this many training samples reached its node
+PRUNE_LEVELS = (4, 8, 16, 32, 64)
+
+TREE_LEAF = -1
+TREE_UNDEFINED = -2
+
+
+def _smallest_uint(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.intp
+
+
+def float32_thresholds(threshold):
+    """
+    Largest float32 not above each float64 threshold. Inputs are compared as
+    float32, and no float32 lies strictly between the two values, so
+    `x > t32` and `x > t64` agree for every input: the rounding is exact.
+    """
+    t32 = threshold.astype(np.float32)
+    above = t32.astype(np.float64) > threshold
+    t32[above] = np.nextafter(t32[above], np.float32(-np.inf))
+    return t32
+
+
+def compact_engine(engine):
+    """
+    Copy of a CompiledForest with narrow node storage: float32 thresholds,
+    uint16/uint32 child indices and uint8 feature indices (the smallest type
+    that fits). Predictions are bit-for-bit unchanged; leaf values stay float64,
+    as do thresholds of engines fed float64 inputs (histogram boosting).
+    """
+    compact = copy.copy(engine)
+    if engine.input_dtype == np.float32:
+        compact.threshold = float32_thresholds(engine.threshold)
+    compact.children = np.ascontiguousarray(engine.children, dtype=_smallest_uint(engine.n_nodes - 1))
+    compact.feature = np.ascontiguousarray(engine.feature, dtype=_smallest_uint(engine.n_features - 1))
+    compact.is_leaf = compact.children[:, 0] == np.arange(compact.n_nodes)
+    return compact
+
+
+def prune_tree(tree, min_samples_split):
+    """
+    New sklearn Tree in which every node reached by fewer than
+    `min_samples_split` training samples becomes a leaf. A classification
+    node's value is the class distribution of the samples reaching it, so the
+    merged leaf predicts what its subtree saw as a whole.
+    """
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    collapse = (nodes['left_child'] == TREE_LEAF) | (nodes['n_node_samples'] < min_samples_split)
+
+    # Depth-first preorder over the surviving nodes, as sklearn lays trees out
+    order, depth, stack = [], [], [(0, 0)]
+    while stack:
+        node, d = stack.pop()
+        order.append(node)
+        depth.append(d)
+        if not collapse[node]:
+            stack.append((nodes['right_child'][node], d + 1))
+            stack.append((nodes['left_child'][node], d + 1))
+    order = np.asarray(order)
+    new_id = np.full(len(nodes), TREE_LEAF, dtype=np.intp)
+    new_id[order] = np.arange(len(order))
+
+    pruned = nodes[order].copy()
+    leaf = collapse[order]
+    pruned['left_child'] = np.where(leaf, TREE_LEAF, new_id[pruned['left_child']])
+    pruned['right_child'] = np.where(leaf, TREE_LEAF, new_id[pruned['right_child']])
+    pruned['feature'][leaf] = TREE_UNDEFINED
+    pruned['threshold'][leaf] = TREE_UNDEFINED
+    pruned['missing_go_to_left'][leaf] = 0
+
+    new_tree = type(tree)(tree.n_features, np.asarray(tree.n_classes, dtype=np.intp), tree.n_outputs)
+    new_tree.__setstate__({
+        'max_depth': int(max(depth)),
+        'node_count': len(order),
+        'nodes': pruned,
+        'values': np.ascontiguousarray(values[order]),
+    })
+    return new_tree
+
+
+def prune_forest(model, min_samples_split):
+    """Copy of a (pipelined) RandomForest/ExtraTrees model with every tree pruned; the input is untouched."""
+    preprocess, estimator = split_pipeline(model)
+    if not isinstance(estimator, FORESTS):
+        raise TypeError(f"Pruning is not supported for {type(estimator).__name__}")
+    pruned = copy.deepcopy(estimator)
+    for tree_estimator in pruned.estimators_:
+        tree_estimator.tree_ = prune_tree(tree_estimator.tree_, min_samples_split)
+    if preprocess is None:
+        return pruned
+    return Pipeline(model.steps[:-1] + [(model.steps[-1][0], pruned)])
+
+
+def _profile(model, engine, X_holdout, y_holdout, n_single=200):
+    """Size, artifact load time, latency and holdout accuracy of one model/engine pair."""
+    fd, path = tempfile.mkstemp(suffix='.joblib')
+    os.close(fd)
+    try:
+        joblib.dump({'model': model, 'engine': engine}, path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        joblib.load(path, mmap_mode='r')
+        load_seconds = time.perf_counter() - start
+    finally:
+        os.remove(path)
+
+    X = np.asarray(X_holdout, dtype=np.float64)
+    timings = []
+    for i in range(n_single):
+        row = X[i % len(X)][np.newaxis, :]
+        start = time.perf_counter()
+        engine.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    y_pred = engine.predict(X)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'n_nodes': engine.n_nodes,
+        'model_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'engine_bytes': engine.nbytes,
+        'artifact_bytes': size,
+        'load_seconds': round(load_seconds, 4),
+        'single_row_ms': round(float(np.median(timings)) * 1000, 4),
+        'holdout_batch_ms': round(batch_seconds * 1000, 2),
+        'accuracy': round(float(accuracy_score(y_holdout, y_pred)), 4),
+    }
+
+
+def compact_model(model, X_holdout, y_holdout, tolerance=None, levels=PRUNE_LEVELS):
+    """
+    Post-training compaction of a fitted model.
+
+    The inference engine is always stored compactly (exact, see
+    compact_engine). With a `tolerance`, forests are additionally pruned:
+    each level in `levels` is tried from mildest to strongest, and the
+    strongest one whose holdout accuracy is within `tolerance` of the
+    original is kept.
+
+    Returns (model, engine, report) where the report compares size, load
+    time, latency and holdout accuracy before and after.
+    """
+    original_engine = CompiledForest.from_estimator(model)
+    before = _profile(model, original_engine, X_holdout, y_holdout)
+    report = {'before': before, 'tolerance': tolerance, 'min_samples_split': None}
+
+    _, estimator = split_pipeline(model)
+    if tolerance is not None and not isinstance(estimator, FORESTS):
+        report['pruning'] = f"skipped: not supported for {type(estimator).__name__}"
+    elif tolerance is not None:
+        for level in levels:
+            candidate = prune_forest(model, level)
+            accuracy = accuracy_score(y_holdout, candidate.predict(X_holdout))
+            if before['accuracy'] - accuracy > tolerance:
+                break
+            model, report['min_samples_split'] = candidate, level
+
+    engine = compact_engine(CompiledForest.from_estimator(model))
+    after = _profile(model, engine, X_holdout, y_holdout)
+    report['after'] = after
+    report['accuracy_delta'] = round(after['accuracy'] - before['accuracy'], 4)
+    return model, engine, report
+
+
+def format_report(report):
+    before, after = report['before'], report['after']
+    rows = [('nodes', 'n_nodes', '{:,}'), ('model size (bytes)', 'model_bytes', '{:,}'),
+            ('engine size (bytes)', 'engine_bytes', '{:,}'), ('artifact size (bytes)', 'artifact_bytes', '{:,}'),
+            ('artifact load (s)', 'load_seconds', '{:.4f}'), ('1-row latency (ms)', 'single_row_ms', '{:.3f}'),
+            ('holdout batch (ms)', 'holdout_batch_ms', '{:.1f}'), ('holdout accuracy', 'accuracy', '{:.4f}')]
+    lines = [f"{'':<22} {'before':>14} {'after':>14}"]
+    for label, key, fmt in rows:
+        lines.append(f"{label:<22} {fmt.format(before[key]):>14} {fmt.format(after[key]):>14}")
+    pruning = report.get('pruning') or (f"min_samples_split={report['min_samples_split']}"
+                                        if report['min_samples_split'] else "none")
+    lines.append(f"pruning: {pruning}; accuracy delta {report['accuracy_delta']:+.4f}")
+    return '\n'.join(lines)
@@ -0,0 +1,195 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy import stats
+from sklearn.base import clone
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+from sklearn.model_selection import KFold, StratifiedKFold, RepeatedKFold, RepeatedStratifiedKFold
+from sklearn.tree import BaseDecisionTree
+
+RANDOM_STATE = 42
+PREDICT_CHUNK_ROWS = 65_536
+
+# sklearn grows these trees on the positively weighted samples only, so a zero
+# weight removes a held-out row from the fit exactly
+_ZERO_WEIGHT_EXACT = (BaseDecisionTree, RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier)
+
+
+def make_splitter(n_splits=5, n_repeats=1, stratified=True, random_state=RANDOM_STATE):
+    if n_repeats > 1:
+        cls = RepeatedStratifiedKFold if stratified else RepeatedKFold
+        return cls(n_splits=n_splits, n_repeats=n_repeats, random_state=random_state)
+    cls = StratifiedKFold if stratified else KFold
+    return cls(n_splits=n_splits, shuffle=True, random_state=random_state)
+
+
+# ===== Worker side: X and y are memory-mapped read-only, so every worker shares the page cache
+_SHARED = {}
+
+
+def _init_worker(data_dir):
+    _SHARED['X'] = np.load(os.path.join(data_dir, 'X.npy'), mmap_mode='r')
+    _SHARED['y'] = np.load(os.path.join(data_dir, 'y.npy'), mmap_mode='r')
+
+
+def _peak_rss_bytes():
+    """
+    Peak resident set size of this worker. VmHWM belongs to the process's own
+    address space; ru_maxrss would also carry the parent's peak across exec.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _zero_weight_is_exact(estimator):
+    """
+    Whether fitting on every row with the held-out ones weighted zero trains
+    the same model as fitting on the training rows. Not for estimators that
+    resample (bootstrap draws, subsample, max_samples) or derive anything else
+    from all rows (balanced class weights, early-stopping splits), since the
+    held-out rows would still take part.
+    """
+    if not isinstance(estimator, _ZERO_WEIGHT_EXACT):
+        return False
+    params = estimator.get_params()
+    class_weight = params.get('class_weight')
+    return (not params.get('bootstrap', False)
+            and params.get('subsample', 1.0) == 1.0
+            and params.get('max_samples') is None
+            and params.get('n_iter_no_change') is None
+            and (class_weight is None or isinstance(class_weight, dict)))
+
+
+def _run_fold(estimator, test_idx, labels):
+    X, y = _SHARED['X'], _SHARED['y']
+    model = clone(estimator)
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)  # parallelism comes from the process pool
+
+    if _zero_weight_is_exact(model):
+        # The shared matrix is passed as is, so no training subset is copied
+        weight = np.ones(len(y))
+        weight[test_idx] = 0.0
+        model.fit(X, y, sample_weight=weight)
+    else:
+        # Resampling estimators would still draw zero-weighted rows: fit on a copy of the training rows
+        train_mask = np.ones(len(y), dtype=bool)
+        train_mask[test_idx] = False
+        model.fit(X[train_mask], y[train_mask])
+
+    # Held-out rows are gathered a chunk at a time
+    y_pred = np.concatenate([model.predict(X[test_idx[i:i + PREDICT_CHUNK_ROWS]])
+                             for i in range(0, len(test_idx), PREDICT_CHUNK_ROWS)])
+    y_true = np.asarray(y[test_idx])
+    precision, recall, _, _ = precision_recall_fscore_support(
+        y_true, y_pred, labels=labels, average=None, zero_division=0)
+    return {
+        'accuracy': float(accuracy_score(y_true, y_pred)),
+        'precision': precision.tolist(),
+        'recall': recall.tolist(),
+        'n_test': int(len(test_idx)),
+        'peak_rss_bytes': _peak_rss_bytes(),
+    }
+
+
+def confidence_interval(values, n_train, n_test, confidence=0.95):
+    """
+    Mean and t-based interval over fold scores. The variance uses the
+    Nadeau-Bengio correction (1/k + n_test/n_train), because folds share
+    training rows and the plain standard error would be too narrow.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    k = len(values)
+    mean = float(values.mean())
+    if k < 2:
+        return {'mean': mean, 'std': 0.0, 'ci_low': mean, 'ci_high': mean}
+    std = float(values.std(ddof=1))
+    half_width = stats.t.ppf((1 + confidence) / 2, k - 1) * np.sqrt((1 / k + n_test / n_train) * std ** 2)
+    return {'mean': round(mean, 4), 'std': round(std, 4),
+            'ci_low': round(mean - half_width, 4), 'ci_high': round(mean + half_width, 4)}
+
+
+def cross_validate(estimator, X, y, n_splits=5, n_repeats=1, stratified=True, max_workers=None,
+                   confidence=0.95, class_names=None, workdir=None, random_state=RANDOM_STATE):
+    """
+    K-fold (optionally repeated and/or stratified) cross-validation in a
+    process pool over one shared copy of the data.
+
+    X is written once as a float32 .npy (what the tree models train on) and y
+    next to it; workers memory-map both read-only, so peak memory stays near
+    one copy of the dataset. Estimators that ignore zero-weighted rows
+    exactly (non-bootstrapped trees and forests, gradient boosting without
+    subsampling) fit on that shared matrix with the held-out rows weighted
+    zero; the others add one copy of a fold's training rows per worker. Only
+    the fold's test indices are sent to a worker.
+
+    Returns accuracy and per-class precision/recall, each with mean, std and a
+    `confidence` interval, plus the peak RSS seen in any worker.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    labels = np.unique(y)
+    names = [str(c) for c in (class_names if class_names is not None else labels)]
+
+    splitter = make_splitter(n_splits, n_repeats, stratified, random_state)
+    test_folds = [test_idx for _, test_idx in splitter.split(np.zeros(len(y)), y)]
+
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix='cv-')
+    try:
+        np.save(os.path.join(workdir, 'X.npy'), X)
+        np.save(os.path.join(workdir, 'y.npy'), y)
+        del X
+        # Spawned workers start empty instead of inheriting the parent's copy of the data
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(workdir,),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            folds = list(pool.map(_run_fold, [estimator] * len(test_folds), test_folds,
+                                  [labels] * len(test_folds)))
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    n_test = float(np.mean([f['n_test'] for f in folds]))
+    n_train = len(y) - n_test
+    per_class = {}
+    for i, name in enumerate(names):
+        per_class[name] = {
+            'precision': confidence_interval([f['precision'][i] for f in folds], n_train, n_test, confidence),
+            'recall': confidence_interval([f['recall'][i] for f in folds], n_train, n_test, confidence),
+        }
+    return {
+        'folds': len(folds),
+        'n_splits': n_splits,
+        'n_repeats': n_repeats,
+        'stratified': stratified,
+        'confidence': confidence,
+        'accuracy': confidence_interval([f['accuracy'] for f in folds], n_train, n_test, confidence),
+        'per_class': per_class,
+        'worker_peak_rss_bytes': max(f['peak_rss_bytes'] for f in folds),
+    }
+
+
+def format_report(report):
+    level = int(report['confidence'] * 100)
+    acc = report['accuracy']
+    lines = [f"{report['folds']} folds ({report['n_splits']}-fold x {report['n_repeats']}"
+             f"{', stratified' if report['stratified'] else ''})",
+             f"Accuracy: {acc['mean']:.4f}  [{acc['ci_low']:.4f}, {acc['ci_high']:.4f}] {level}% CI",
+             f"{'class':<10} {'precision':>28} {'recall':>28}"]
+    for name, metrics in report['per_class'].items():
+        cells = [f"{m['mean']:.4f} [{m['ci_low']:.4f}, {m['ci_high']:.4f}]"
+                 for m in (metrics['precision'], metrics['recall'])]
+        lines.append(f"{name:<10} {cells[0]:>28} {cells[1]:>28}")
+    return '\n'.join(lines)
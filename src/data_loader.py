@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Optional, Tuple
+
+# Configuration
+DATA_CACHE_DIR = os.path.join(os.path.dirname(__file__), '../.data_cache')
+CACHE_FORMAT_VERSION = 1
+TARGET_COLUMN = 'Target'
+TARGET_CLASSES = ['Dropout', 'Enrolled', 'Graduate']
+
+# Explicit schema for data.csv. Codes and counts are small integers, so they
+# are stored as int8/int16 instead of int64; grades and rates as float32
+# (the tree models cast their input to float32 anyway, so fits are unchanged).
+# Integer columns are parsed as int64 and range-checked before the downcast
+# (see _downcast), since pandas wraps out-of-range values silently.
+# Header names are kept verbatim, including the stray tab in the attendance column.
+CSV_SCHEMA: Dict[str, str] = {
+    'Marital status': 'int8',
+    'Application mode': 'int8',
+    'Application order': 'int8',
+    'Course': 'int16',
+    'Daytime/evening attendance\t': 'int8',
+    'Previous qualification': 'int8',
+    'Previous qualification (grade)': 'float32',
+    'Nacionality': 'int16',
+    "Mother's qualification": 'int8',
+    "Father's qualification": 'int8',
+    "Mother's occupation": 'int16',
+    "Father's occupation": 'int16',
+    'Admission grade': 'float32',
+    'Displaced': 'int8',
+    'Educational special needs': 'int8',
+    'Debtor': 'int8',
+    'Tuition fees up to date': 'int8',
+    'Gender': 'int8',
+    'Scholarship holder': 'int8',
+    'Age at enrollment': 'int8',
+    'International': 'int8',
+    'Curricular units 1st sem (credited)': 'int8',
+    'Curricular units 1st sem (enrolled)': 'int8',
+    'Curricular units 1st sem (evaluations)': 'int8',
+    'Curricular units 1st sem (approved)': 'int8',
+    'Curricular units 1st sem (grade)': 'float32',
+    'Curricular units 1st sem (without evaluations)': 'int8',
+    'Curricular units 2nd sem (credited)': 'int8',
+    'Curricular units 2nd sem (enrolled)': 'int8',
+    'Curricular units 2nd sem (evaluations)': 'int8',
+    'Curricular units 2nd sem (approved)': 'int8',
+    'Curricular units 2nd sem (grade)': 'float32',
+    'Curricular units 2nd sem (without evaluations)': 'int8',
+    'Unemployment rate': 'float32',
+    'Inflation rate': 'float32',
+    'GDP': 'float32',
+}
+
+
+def normalize_header(header: str) -> str:
+    """
+    Maps a raw data.csv header onto the snake_case feature name, e.g.
+    "Daytime/evening attendance\\t" -> "daytime_evening_attendance",
+    "Mother's qualification" -> "mother_s_qualification".
+    """
+    return re.sub(r'[^0-9a-z]+', '_', header.lstrip('\ufeff').strip().lower()).strip('_')
+
+
+def _read_dtypes(with_target: bool = True) -> Dict[str, object]:
+    # Integers are read wide; _downcast narrows them once their range is known to fit
+    dtypes: Dict[str, object] = {
+        name: 'int64' if np.dtype(dtype).kind == 'i' else dtype for name, dtype in CSV_SCHEMA.items()
+    }
+    if with_target:
+        dtypes[TARGET_COLUMN] = pd.CategoricalDtype(TARGET_CLASSES)
+    return dtypes
+
+
+def _check_header(path: str) -> bool:
+    """Validates the header against CSV_SCHEMA; returns whether a Target column is present."""
+    header = pd.read_csv(path, sep=';', encoding='utf-8-sig', nrows=0).columns
+    missing = [c for c in CSV_SCHEMA if c not in header]
+    unexpected = [c for c in header if c not in CSV_SCHEMA and c != TARGET_COLUMN]
+    if missing or unexpected:
+        raise ValueError(f"CSV does not match the data schema (missing: {missing}, unexpected: {unexpected})")
+    return TARGET_COLUMN in header
+
+
+def _check_target(chunk: pd.DataFrame) -> None:
+    if TARGET_COLUMN in chunk and chunk[TARGET_COLUMN].isna().any():
+        raise ValueError(f"Unknown or missing {TARGET_COLUMN} values; expected one of {TARGET_CLASSES}")
+
+
+def _downcast(chunk: pd.DataFrame) -> None:
+    """Narrows the integer columns to their CSV_SCHEMA type; ValueError if a value does not fit."""
+    for name, dtype in CSV_SCHEMA.items():
+        target = np.dtype(dtype)
+        if target.kind != 'i' or chunk.empty:
+            continue
+        limits = np.iinfo(target)
+        low, high = chunk[name].min(), chunk[name].max()
+        if low < limits.min or high > limits.max:
+            raise ValueError(f"Column {name!r} has values outside the {target} range [{limits.min}, "
+                             f"{limits.max}] (found {low} to {high})")
+        chunk[name] = chunk[name].astype(target)
+
+
+def iter_chunks(path: str, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+    """Streams the CSV as schema-typed DataFrames of at most `chunksize` rows."""
+    has_target = _check_header(path)
+    reader = pd.read_csv(path, sep=';', encoding='utf-8-sig', dtype=_read_dtypes(has_target),
+                         chunksize=chunksize)
+    for chunk in reader:
+        _check_target(chunk)
+        _downcast(chunk)
+        yield chunk
+
+
+def content_fingerprint(path: str, block_size: int = 1 << 20) -> Tuple[str, int]:
+    """SHA-256 of the file contents and its number of lines, in one pass over the bytes."""
+    digest = hashlib.sha256()
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+            lines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        lines += 1  # final line without a trailing newline
+    return digest.hexdigest(), lines
+
+
+def load_dataset(path: str, cache_dir: Optional[str] = DATA_CACHE_DIR, chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    Loads the CSV with the explicit schema.
+
+    With a `cache_dir`, the first read streams the CSV chunk by chunk into a
+    columnar cache (one .npy file per column) keyed on the file's content hash;
+    later calls read that cache instead of parsing the text again. Any edit
+    to the CSV changes the hash, so a stale cache is never read.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Data file not found at {path}")
+    if cache_dir is None:
+        return pd.concat(iter_chunks(path, chunksize), ignore_index=True)
+
+    digest, n_lines = content_fingerprint(path)
+    entry = os.path.join(cache_dir, digest[:32])
+    if not os.path.exists(os.path.join(entry, 'manifest.json')):
+        _write_cache(path, entry, n_rows=n_lines - 1, chunksize=chunksize)
+    return _read_cache(entry)
+
+
+def _write_cache(path: str, entry: str, n_rows: int, chunksize: int) -> None:
+    tmp_entry = f"{entry}.tmp-{os.getpid()}"
+    os.makedirs(tmp_entry, exist_ok=True)
+
+    columns = None
+    arrays = {}
+    written = 0
+    for chunk in iter_chunks(path, chunksize):
+        if columns is None:
+            columns = list(chunk.columns)
+            for i, name in enumerate(columns):
+                dtype = np.int8 if name == TARGET_COLUMN else np.dtype(CSV_SCHEMA[name])
+                arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(tmp_entry, f"{i:03d}.npy"), mode='w+', dtype=dtype, shape=(n_rows,))
+        end = written + len(chunk)
+        if end > n_rows:
+            raise ValueError(f"{path} has more records than lines; quoted newlines are not supported")
+        for name in columns:
+            values = chunk[name].cat.codes if name == TARGET_COLUMN else chunk[name]
+            arrays[name][written:end] = values.to_numpy()
+        written = end
+
+    if columns is None:
+        raise ValueError(f"No rows found in {path}")
+    for array in arrays.values():
+        array.flush()
+    del arrays
+    manifest = {
+        "format": CACHE_FORMAT_VERSION,
+        "source": os.path.abspath(path),
+        "rows": written,
+        "columns": columns,
+        "target_classes": TARGET_CLASSES,
+    }
+    with open(os.path.join(tmp_entry, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    try:
+        os.replace(tmp_entry, entry)
+    except OSError:
+        # Another process finished the same entry first; theirs is identical
+        for name in os.listdir(tmp_entry):
+            os.remove(os.path.join(tmp_entry, name))
+        os.rmdir(tmp_entry)
+
+
+def _read_cache(entry: str) -> pd.DataFrame:
+    with open(os.path.join(entry, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    data = {}
+    for i, name in enumerate(manifest["columns"]):
+        # Blank lines are counted but never parsed, so only the first `rows` entries are data
+        values = np.load(os.path.join(entry, f"{i:03d}.npy"), mmap_mode='r')[:manifest["rows"]]
+        if name == TARGET_COLUMN:
+            values = pd.Categorical.from_codes(values, manifest["target_classes"])
+        data[name] = values
+    # Copied into one block per dtype: a frame of 37 memory-mapped column blocks
+    # makes every later drop/copy/to_numpy several times slower than the read saves
+    return pd.DataFrame(data, columns=manifest["columns"], copy=True)
@@ -0,0 +1,13 @@
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+
+# Bagged tree ensembles: trees are independent, so they can be appended,
+# retired or pruned one at a time (see incremental.py and compaction.py)
+FORESTS = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+def split_pipeline(model):
+    """Returns (preprocessing steps or None, final estimator)."""
+    if isinstance(model, Pipeline):
+        return model[:-1], model.steps[-1][1]
+    return None, model
@@ -2,61 +2,276 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
+import re
+import string
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 
-class RetentionReport:
-    """Generates counselor-ready strategic reports for at-risk students."""
-    
-    @staticmethod
-    def generate_counselor_summary(student_id, risk_score, drivers):
-        """Creates a professional summary for institutional intervention."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-        
-        report = f"""
+
+class _CompiledTemplate:
+    """
+    A str.format template parsed once into literal text and fields, so
+    rendering is a join over pre-split parts instead of re-parsing the whole
+    template for every report.
+    """
+
+    def __init__(self, text):
+        self._parts = [(literal, field, spec)
+                       for literal, field, spec, _ in string.Formatter().parse(text)]
+
+    def render(self, **values):
+        out = []
+        for literal, field, spec in self._parts:
+            out.append(literal)
+            if field is not None:
+                out.append(format(values[field], spec))
+        return ''.join(out)
+
+
+_COUNSELOR_TEMPLATE = _CompiledTemplate("""
 ==================================================
 STUDENT RETENTION INTELLIGENCE REPORT
 Generated: {timestamp}
 ==================================================
 STUDENT ID: {student_id}
 RISK SCORE: {risk_score:.1f}% Attrition Probability
-STATUS: {'HIGH RISK - URGENT ACTION' if risk_score > 70 else 'ELEVATED RISK'}
+STATUS: {status}
 --------------------------------------------------
 TOP ATTRITION DRIVERS:
-"""
-        for factor, value, impact in drivers:
-            report += f" - {factor.replace('_', ' ').title()}: {value} ({impact})
-"
-            
-        report += """
+{drivers}
 --------------------------------------------------
 STRATEGIC RECOMMENDATION:
 [ ] Financial Aid Review Required (Tuition Delinquency)
 [ ] Academic Counseling (GPA Volatility)
 [ ] Socio-economic Outreach (Demographic Shift)
 ==================================================
-"""
-        print(report)
+""")
+
+REPORT_LAYOUTS = ('file', 'directory', 'zip')
+
+
+@lru_cache(maxsize=1024)
+def _driver_name(factor):
+    # The same few dozen feature names recur in every report
+    return factor.replace('_', ' ').title()
+
+
+def _render_counselor_summary(student_id, risk_score, drivers, timestamp):
+    return _COUNSELOR_TEMPLATE.render(
+        timestamp=timestamp,
+        student_id=student_id,
+        risk_score=float(risk_score),
+        status='HIGH RISK - URGENT ACTION' if risk_score > 70 else 'ELEVATED RISK',
+        drivers=''.join([f" - {_driver_name(factor)}: {value} ({impact})\n" for factor, value, impact in drivers]),
+    )
+
+
+def _render_chunk(students, timestamp):
+    # Runs in pool workers: (student_id, report) pairs for one chunk
+    return [(student_id, _render_counselor_summary(student_id, risk, drivers, timestamp))
+            for student_id, risk, drivers in students]
+
+
+def _report_name(student_id):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(student_id)) + '.txt'
+
+
+class RetentionReport:
+    """Generates counselor-ready strategic reports for at-risk students."""
+
+    @staticmethod
+    def generate_counselor_summary(student_id, risk_score, drivers, echo=True):
+        """Creates a professional summary for institutional intervention."""
+        report = _render_counselor_summary(student_id, risk_score, drivers,
+                                           datetime.now().strftime("%Y-%m-%d %H:%M"))
+        if echo:
+            print(report)
         return report
 
+    @staticmethod
+    def generate_bulk(students, destination, layout=None, processes=None, chunk_size=1000, generated_at=None):
+        """
+        Renders one counselor summary per (student_id, risk_score, drivers) in
+        `students` (any iterable, e.g. a generator over a term's worklist) and
+        streams them to `destination`:
+
+        - 'file': all reports concatenated into one text file
+        - 'directory': one <student_id>.txt per student
+        - 'zip': the same files inside a zip archive
+
+        By default the layout follows the path: *.zip is an archive, an
+        existing directory (or a path ending in a separator) gets one file per
+        student, anything else is a single file. Students are read and written
+        `chunk_size` at a time, so memory stays bounded whatever the cohort
+        size. With `processes` > 1, chunks are rendered in a process pool with
+        at most two chunks per worker in flight; output order is input order.
+        Every report carries the same `generated_at` timestamp (default: now).
+        Nothing is printed. Returns the number of reports written.
+        """
+        destination = os.fspath(destination)
+        if layout is None:
+            if destination.lower().endswith('.zip'):
+                layout = 'zip'
+            elif os.path.isdir(destination) or destination.endswith(os.sep):
+                layout = 'directory'
+            else:
+                layout = 'file'
+        if layout not in REPORT_LAYOUTS:
+            raise ValueError(f"Unknown layout {layout!r}; choose from {', '.join(REPORT_LAYOUTS)}")
+        timestamp = (generated_at or datetime.now()).strftime("%Y-%m-%d %H:%M")
+
+        students = iter(students)
+        chunks = iter(lambda: list(islice(students, chunk_size)), [])
+        if processes is not None and processes > 1:
+            rendered = RetentionReport._render_in_pool(chunks, timestamp, processes)
+        else:
+            rendered = (_render_chunk(chunk, timestamp) for chunk in chunks)
+
+        count = 0
+        if layout == 'directory':
+            os.makedirs(destination, exist_ok=True)
+            for chunk in rendered:
+                for student_id, report in chunk:
+                    with open(os.path.join(destination, _report_name(student_id)), 'w') as f:
+                        f.write(report)
+                count += len(chunk)
+            return count
+
+        # Single files are written next to the target and moved into place when complete
+        tmp_path = f"{destination}.tmp-{os.getpid()}"
+        try:
+            if layout == 'zip':
+                with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                    for chunk in rendered:
+                        for student_id, report in chunk:
+                            archive.writestr(_report_name(student_id), report)
+                        count += len(chunk)
+            else:
+                with open(tmp_path, 'w') as f:
+                    for chunk in rendered:
+                        f.writelines(report for _, report in chunk)
+                        count += len(chunk)
+            os.replace(tmp_path, destination)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return count
+
+    @staticmethod
+    def _render_in_pool(chunks, timestamp, processes):
+        """Renders chunks in worker processes, in order, with a bounded number in flight."""
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_render_chunk, chunk, timestamp))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def generate_cohort_summary(cohort):
+        """
+        Summary of one course's term for deans, from a precomputed cohort row
+        (predictor.cohorts.cohort_report) rather than per-student re-scoring.
+        """
+        mean = cohort.get('mean_dropout_probability')
+        lines = [
+            "==================================================",
+            "COHORT RETENTION INTELLIGENCE REPORT",
+            f"COURSE: {cohort['course']}    TERM: {cohort['term']}",
+            "==================================================",
+            f"STUDENTS SCORED: {cohort['predictions']}",
+            f"MEAN DROPOUT PROBABILITY: {mean:.1f}%" if mean is not None else "MEAN DROPOUT PROBABILITY: n/a",
+            "RISK LEVELS: " + ", ".join(f"{level} {n}" for level, n in cohort['by_risk_level'].items()),
+            "--------------------------------------------------",
+            "MOST FREQUENT RISK DRIVERS:",
+        ]
+        lines.extend(f" - {driver['name']}: {driver['count']} students ({driver['share']:.0%})"
+                     for driver in cohort['drivers'])
+        lines.append("==================================================")
+        return "\n".join(lines) + "\n"
+
+def _importances(model):
+    # Pipelines are explained through their final estimator
+    estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+    return np.asarray(estimator.feature_importances_, dtype=np.float64)
+
+
+class Explanations:
+    """
+    Top-k drivers of a batch of rows, kept as arrays: `indices` (n_rows, k)
+    feature positions ordered by absolute contribution, and `contributions`,
+    their value x importance scores. Driver tuples are only formatted when a
+    row is read, so explaining a whole cohort never builds N x k strings.
+    """
+
+    def __init__(self, values, indices, contributions, feature_names=None):
+        self.values = values
+        self.indices = indices
+        self.contributions = contributions
+        self.feature_names = feature_names
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, row):
+        """(feature, formatted value, impact) tuples for one row, as explain_prediction returns them."""
+        drivers = []
+        for idx, contribution in zip(self.indices[row].tolist(), self.contributions[row].tolist()):
+            fname = self.feature_names[idx] if self.feature_names else f"Feature {idx}"
+            impact = "Negative Impact" if contribution > 0 else "Positive Support"
+            drivers.append((fname, f"{self.values[row, idx]:.2f}", impact))
+        return drivers
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+
+def explain_batch(model, X, feature_names=None, top_k=3, block_rows=16_384):
+    """
+    Explains every row of an (n_rows, n_features) matrix or DataFrame in one
+    vectorized pass: contributions are value x global importance, and the
+    top_k per row are selected with argpartition (linear in the number of
+    features) before only those k are sorted. Rows are processed in blocks of
+    `block_rows`, so temporaries stay small however large the cohort.
+    """
+    if isinstance(X, pd.DataFrame):
+        if feature_names is None:
+            feature_names = list(X.columns)
+        X = X.to_numpy()
+    # Left in its own dtype (e.g. the float32 training matrix); blocks are cast as they are scored
+    values = np.asarray(X)
+    if values.ndim == 1:
+        values = values[np.newaxis, :]
+    importances = _importances(model)
+    top_k = min(top_k, values.shape[1])
+
+    indices = np.empty((len(values), top_k), dtype=np.intp)
+    for start in range(0, len(values), block_rows):
+        # -|contribution|, so the largest come first; argpartition leaves the top k unordered
+        score = values[start:start + block_rows] * importances
+        np.abs(score, out=score)
+        np.negative(score, out=score)
+        top = np.argpartition(score, top_k - 1, axis=1)[:, :top_k]
+        order = np.argsort(np.take_along_axis(score, top, axis=1), axis=1, kind='stable')
+        indices[start:start + block_rows] = np.take_along_axis(top, order, axis=1)
+    contributions = np.take_along_axis(values, indices, axis=1).astype(np.float64) * importances[indices]
+    return Explanations(values, indices, contributions, feature_names)
+
+
 def explain_prediction(model, student_data, feature_names=None):
     """Surfaces the drivers of attrition for a specific prediction."""
-    importances = model.feature_importances_
-    
     if isinstance(student_data, pd.DataFrame):
         values = student_data.iloc[0].values
     else:
         values = np.array(student_data)
 
-    contributions = values * importances
-    contrib_indices = np.argsort(np.abs(contributions))[::-1][:3]
-    
-    drivers = []
-    for idx in contrib_indices:
-        fname = feature_names[idx] if feature_names else f"Feature {idx}"
-        impact = "Negative Impact" if contributions[idx] > 0 else "Positive Support"
-        drivers.append((fname, f"{values[idx]:.2f}", impact))
-        
-    return drivers
+    return explain_batch(model, values[np.newaxis, :], feature_names)[0]
 
 if __name__ == "__main__":
     # Example logic for the Day 3 Refinement
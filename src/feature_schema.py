@@ -0,0 +1,108 @@
+import operator
+import threading
+from collections.abc import Mapping
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from data_loader import CSV_SCHEMA, normalize_header
+
+
+class FeatureSchema:
+    """
+    Column layout of the model input, precomputed once for every source the
+    app reads features from:
+
+    - mappings (form cleaned_data, JSON records) by snake_case key
+    - objects (PredictionHistory instances) by attribute
+    - CSV headers, verbatim data.csv names or snake_case
+
+    Values are written straight into a (n_rows, n_features) buffer in
+    `features` order, without building a DataFrame per request. Missing keys
+    raise KeyError, anything that is not a record TypeError and non-numeric
+    values ValueError; None becomes NaN, so callers can reject it with
+    np.isfinite.
+    """
+
+    def __init__(self, features: Sequence[str], headers: Iterable[str] = (), dtype=np.float64):
+        self.features = tuple(features)
+        self.dtype = np.dtype(dtype)
+        self.index = {name: i for i, name in enumerate(self.features)}
+        # Raw header -> position; anything else is normalized on lookup
+        self._header_index = dict(self.index)
+        # Human-readable name per feature: its (first) raw header, else the feature name
+        self.display_names = {name: name for name in self.features}
+        for header in reversed(list(headers)):
+            name = normalize_header(header)
+            if name not in self.index:
+                raise ValueError(f"Header {header!r} does not map onto a feature")
+            self._header_index[header] = self.index[name]
+            self.display_names[name] = header.strip()
+        self._items = operator.itemgetter(*self.features)
+        self._attrs = operator.attrgetter(*self.features)
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    # ===== Buffers
+    def buffer(self, n_rows: int = 1) -> np.ndarray:
+        return np.empty((n_rows, len(self.features)), dtype=self.dtype)
+
+    def row_buffer(self) -> np.ndarray:
+        """
+        One reusable row per thread. Only hand it to code that is done with it
+        before the thread fills it again (not to a queue that outlives the call).
+        """
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty(len(self.features), dtype=self.dtype)
+        return row
+
+    # ===== Mappings and objects
+    def fill(self, record: Any, out: np.ndarray) -> np.ndarray:
+        """Writes one record (a mapping or an object with feature attributes) into `out`."""
+        if isinstance(record, Mapping):
+            out[...] = self._items(record)
+            return out
+        try:
+            out[...] = self._attrs(record)
+        except AttributeError:
+            raise TypeError(f"Expected a feature mapping or record object, got {type(record).__name__}") from None
+        return out
+
+    def row(self, record: Any, out: Optional[np.ndarray] = None) -> np.ndarray:
+        return self.fill(record, np.empty(len(self.features), dtype=self.dtype) if out is None else out)
+
+    def matrix(self, records: Sequence[Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        X = self.buffer(len(records)) if out is None else out[:len(records)]
+        for i, record in enumerate(records):
+            self.fill(record, X[i])
+        return X
+
+    # ===== Tabular sources
+    def positions(self, header: Sequence[str]) -> np.ndarray:
+        """
+        For each feature, its position in `header` (raw data.csv or snake_case
+        names, in any order). Raises ValueError naming the missing features.
+        """
+        found = {}
+        for position, name in enumerate(header):
+            index = self._header_index.get(name)
+            if index is None:
+                index = self.index.get(normalize_header(str(name)))
+            if index is not None:
+                found.setdefault(index, position)
+        missing = [name for i, name in enumerate(self.features) if i not in found]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(missing)}")
+        return np.array([found[i] for i in range(len(self.features))], dtype=np.intp)
+
+    def from_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        """Feature matrix from a DataFrame with data.csv or snake_case columns."""
+        return frame.iloc[:, self.positions(frame.columns)].to_numpy(dtype=self.dtype)
+
+
+# The model input: data.csv columns in file order, under their snake_case names
+FEATURE_SCHEMA = FeatureSchema([normalize_header(header) for header in CSV_SCHEMA], headers=CSV_SCHEMA)
@@ -0,0 +1,315 @@
+import numpy as np
+from scipy.special import expit
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import (RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier,
+                              HistGradientBoostingClassifier)
+from sklearn.utils.extmath import softmax
+
+def _accepts_nan(estimator):
+    """Whether sklearn's predict accepts NaN for this fitted estimator."""
+    if hasattr(estimator, '__sklearn_tags__'):
+        allow_nan = estimator.__sklearn_tags__().input_tags.allow_nan
+    else:
+        allow_nan = estimator._get_tags().get('allow_nan', False)
+    # Forests fall back to the finite check when monotonic constraints are set
+    return bool(allow_nan) and getattr(estimator, 'monotonic_cst', None) is None
+
+class CompiledForest:
+    """
+    Flat-array inference engine for fitted scikit-learn tree ensembles.
+
+    Every tree of the ensemble is packed into one set of contiguous node arrays
+    (feature index, threshold, left/right child, leaf value) and all trees are
+    walked together, level by level, with numpy fancy indexing. This skips the
+    per-call validation and per-estimator dispatch of sklearn's predict_proba
+    while reproducing its arithmetic exactly, so the probabilities are
+    bit-for-bit identical to sklearn's sequential (n_jobs=1) accumulation.
+
+    Supported models:
+    - RandomForestClassifier / ExtraTreesClassifier (mean of tree probabilities)
+    - GradientBoostingClassifier (softmax / sigmoid of the summed stage margins)
+    - HistGradientBoostingClassifier without categorical features (same, with
+      float64 inputs and the learning rate already folded into the leaves)
+    - a Pipeline of StandardScaler steps ending in one of the above
+
+    Non-finite inputs are accepted exactly where sklearn accepts them: NaN for
+    models that route missing values themselves (histogram boosting, and
+    forests on sklearn >= 1.4), infinity only for histogram boosting outside
+    a pipeline. Other rows raise ValueError instead of being scored.
+    """
+
+    AVERAGE = 'average'
+    BOOSTED = 'boosted'
+
+    def __init__(self, kind, classes, n_features, feature, threshold, children,
+                 missing_left, value, roots, max_depth, learning_rate=1.0, init_raw=None,
+                 scaler_mean=None, scaler_scale=None, chunk_size=2048, input_dtype=np.float32, cover=None,
+                 allow_nan=False, allow_inf=False):
+        self.kind = kind
+        self.classes_ = classes
+        self.n_features = n_features
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.is_leaf = children[:, 0] == np.arange(len(children))
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.learning_rate = learning_rate
+        self.init_raw = init_raw
+        self.scaler_mean = scaler_mean
+        self.scaler_scale = scaler_scale
+        self.chunk_size = chunk_size
+        # sklearn trees compare float32 inputs against float64 thresholds;
+        # histogram boosting compares float64 inputs
+        self.input_dtype = input_dtype
+        # Whether sklearn would accept NaN (routed by missing_left) and +/-inf for this model;
+        # allow_inf implies allow_nan
+        self.allow_nan = allow_nan
+        self.allow_inf = allow_inf
+        # Training samples (weighted) reaching each node; only attributions need it
+        self.cover = cover
+
+    def __setstate__(self, state):
+        # Engines pickled before these flags existed: only histogram boosting used float64 inputs
+        state.setdefault('allow_nan', state['input_dtype'] == np.float64)
+        state.setdefault('allow_inf', state['input_dtype'] == np.float64 and state['scaler_mean'] is None
+                         and state['scaler_scale'] is None)
+        self.__dict__.update(state)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        """Total size of the node arrays."""
+        arrays = (self.feature, self.threshold, self.children,
+                  self.missing_left, self.value, self.roots, self.cover)
+        return int(sum(a.nbytes for a in arrays if a is not None))
+
+    @classmethod
+    def from_estimator(cls, estimator, chunk_size=2048):
+        """Compiles a fitted estimator. Raises TypeError for unsupported models."""
+        scaler_mean, scaler_scale = None, None
+        input_dtype = np.float32
+        if isinstance(estimator, Pipeline):
+            *transforms, (_, estimator) = estimator.steps
+            for _, step in transforms:
+                if not isinstance(step, StandardScaler):
+                    raise TypeError(f"Cannot compile pipeline step {type(step).__name__}")
+                if scaler_mean is not None or scaler_scale is not None:
+                    raise TypeError("Only a single StandardScaler step is supported")
+                scaler_mean = step.mean_ if step.with_mean else None
+                scaler_scale = step.scale_ if step.with_std else None
+
+        if isinstance(estimator, (RandomForestClassifier, ExtraTreesClassifier)):
+            if estimator.n_outputs_ != 1:
+                raise TypeError("Multi-output forests are not supported")
+            trees = [e.tree_ for e in estimator.estimators_]
+            kind, learning_rate, init_raw = cls.AVERAGE, 1.0, None
+        elif isinstance(estimator, GradientBoostingClassifier):
+            # Stage-major order: trees[i * K + k] is stage i, class k (as in predict_stages)
+            trees = [e.tree_ for e in estimator.estimators_.ravel()]
+            kind, learning_rate = cls.BOOSTED, float(estimator.learning_rate)
+            # The init estimator predicts a constant, so one row is enough
+            init_raw = estimator._raw_predict_init(
+                np.zeros((1, estimator.n_features_in_), dtype=np.float32)
+            )[0].astype(np.float64)
+        elif isinstance(estimator, HistGradientBoostingClassifier):
+            if estimator.is_categorical_ is not None or estimator._preprocessor is not None:
+                raise TypeError("Histogram boosting with categorical features is not supported")
+            kind, learning_rate, input_dtype = cls.BOOSTED, 1.0, np.float64
+            init_raw = np.asarray(estimator._baseline_prediction, dtype=np.float64).ravel()
+        else:
+            raise TypeError(f"Cannot compile estimator {type(estimator).__name__}")
+
+        if isinstance(estimator, HistGradientBoostingClassifier):
+            arrays = cls._flatten_hist([p.nodes for stage in estimator._predictors for p in stage])
+        else:
+            arrays = cls._flatten(trees, kind)
+        return cls(
+            kind=kind,
+            classes=np.asarray(estimator.classes_),
+            n_features=int(estimator.n_features_in_),
+            learning_rate=learning_rate,
+            init_raw=init_raw,
+            scaler_mean=scaler_mean,
+            scaler_scale=scaler_scale,
+            chunk_size=chunk_size,
+            input_dtype=input_dtype,
+            allow_nan=_accepts_nan(estimator),
+            # HistGradientBoosting skips sklearn's finiteness check; StandardScaler does not
+            allow_inf=(isinstance(estimator, HistGradientBoostingClassifier)
+                       and scaler_mean is None and scaler_scale is None),
+            **arrays
+        )
+
+    @classmethod
+    def _flatten(cls, trees, kind):
+        """Concatenates sklearn Tree objects into flat node arrays with global indices."""
+        features, thresholds, children, missing, values, roots, covers = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            n = tree.node_count
+            idx = np.arange(n)
+            is_leaf = tree.children_left == -1
+            # Leaves point at themselves so every row can take the same number of steps
+            children.append(np.column_stack([
+                np.where(is_leaf, idx, tree.children_left),
+                np.where(is_leaf, idx, tree.children_right),
+            ]) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            missing.append(np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(n)), dtype=bool))
+            covers.append(tree.weighted_n_node_samples)
+            if kind == cls.AVERAGE:
+                values.append(tree.value[:, 0, :])
+            else:
+                values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += n
+
+        return {
+            'feature': np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            'threshold': np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            'children': np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            'missing_left': np.ascontiguousarray(np.concatenate(missing)),
+            'value': np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            'roots': np.asarray(roots, dtype=np.intp),
+            'cover': np.ascontiguousarray(np.concatenate(covers), dtype=np.float64),
+            'max_depth': max(int(tree.max_depth) for tree in trees),
+        }
+
+    @staticmethod
+    def _flatten_hist(node_arrays):
+        """Same layout as _flatten, from HistGradientBoosting predictor node records (stage-major)."""
+        features, thresholds, children, missing, values, roots, covers = [], [], [], [], [], [], []
+        offset = 0
+        for nodes in node_arrays:
+            idx = np.arange(len(nodes))
+            is_leaf = nodes['is_leaf'].astype(bool)
+            children.append(np.column_stack([
+                np.where(is_leaf, idx, nodes['left']),
+                np.where(is_leaf, idx, nodes['right']),
+            ]) + offset)
+            features.append(np.where(is_leaf, 0, nodes['feature_idx']))
+            thresholds.append(nodes['num_threshold'])
+            missing.append(nodes['missing_go_to_left'].astype(bool))
+            values.append(nodes['value'])
+            covers.append(nodes['count'])
+            roots.append(offset)
+            offset += len(nodes)
+
+        return {
+            'feature': np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            'threshold': np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            'children': np.ascontiguousarray(np.concatenate(children), dtype=np.intp),
+            'missing_left': np.ascontiguousarray(np.concatenate(missing)),
+            'value': np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            'roots': np.asarray(roots, dtype=np.intp),
+            'cover': np.ascontiguousarray(np.concatenate(covers), dtype=np.float64),
+            'max_depth': max(int(nodes['depth'].max()) for nodes in node_arrays),
+        }
+
+    def _prepare(self, X):
+        """Validates shape and applies the same preprocessing sklearn would."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+        if not self.allow_inf:
+            invalid = np.isinf(X) if self.allow_nan else ~np.isfinite(X)
+            if invalid.any():
+                rows = np.flatnonzero(invalid.any(axis=1))
+                kind = "infinity" if self.allow_nan else "NaN or infinity"
+                raise ValueError(f"Input contains {kind} (rows {rows[:10].tolist()}), "
+                                 f"which this model does not accept")
+        if self.scaler_mean is not None or self.scaler_scale is not None:
+            X = X.copy()
+            if self.scaler_mean is not None:
+                X -= self.scaler_mean
+            if self.scaler_scale is not None:
+                X /= self.scaler_scale
+        return np.ascontiguousarray(X, dtype=self.input_dtype)
+
+    def apply(self, X):
+        """Returns the global leaf index reached in every tree, shape (n_rows, n_trees)."""
+        X = self._prepare(X)
+        return self._apply(X)
+
+    def _apply(self, X, compact_every=3):
+        n_rows, n_trees = X.shape[0], self.n_trees
+        flat_X = X.ravel()
+        # children is (n_nodes, 2): flat index 2 * node + went_right
+        flat_children = self.children.ravel()
+        has_nan = np.isnan(flat_X).any()
+
+        # Walk every (row, tree) pair together; pairs that reached a leaf are
+        # dropped from the active set every few levels
+        leaves = np.tile(self.roots, n_rows)
+        active = np.arange(n_rows * n_trees)
+        node = leaves.copy()
+        row_base = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        for level in range(self.max_depth):
+            x = flat_X[row_base + self.feature[node]]
+            went_right = x > self.threshold[node]
+            if has_nan:
+                went_right = np.where(np.isnan(x), ~self.missing_left[node], went_right)
+            # Children may be stored as uint16/uint32 (see compaction.py); gathers are fastest on intp
+            node = flat_children[2 * node + went_right].astype(np.intp, copy=False)
+
+            if level % compact_every == compact_every - 1:
+                done = self.is_leaf[node]
+                leaves[active[done]] = node[done]
+                keep = ~done
+                active, node, row_base = active[keep], node[keep], row_base[keep]
+                if not len(active):
+                    break
+        leaves[active] = node
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to the source estimator's predict_proba."""
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+        proba = np.empty((n_rows, len(self.classes_)), dtype=np.float64)
+        for start in range(0, n_rows, self.chunk_size):
+            stop = start + self.chunk_size
+            proba[start:stop] = self._predict_proba_chunk(X[start:stop])
+        return proba
+
+    def _predict_proba_chunk(self, X):
+        leaves = self._apply(X)
+        n_rows = X.shape[0]
+
+        if self.kind == self.AVERAGE:
+            # cumsum adds tree by tree, in estimator order, exactly as sklearn
+            # accumulates them, so the result is bit-for-bit identical
+            proba = np.cumsum(self.value[leaves], axis=1)[:, -1]
+            proba /= self.n_trees
+            return proba
+
+        # Raw margins: init + lr * stage_0 + lr * stage_1 + ... (sequential, as predict_stages)
+        n_per_stage = len(self.init_raw)
+        terms = np.empty((n_rows, self.n_trees // n_per_stage + 1, n_per_stage), dtype=np.float64)
+        terms[:, 0] = self.init_raw
+        terms[:, 1:] = (self.learning_rate * self.value[leaves]).reshape(n_rows, -1, n_per_stage)
+        raw = np.cumsum(terms, axis=1)[:, -1]
+
+        if n_per_stage == 1:
+            proba = np.empty((n_rows, 2), dtype=np.float64)
+            proba[:, 1] = expit(raw[:, 0])
+            proba[:, 0] = 1 - proba[:, 1]
+            return proba
+        return softmax(raw, copy=False)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,69 @@
+import copy
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import GradientBoostingClassifier
+
+from data_loader import TARGET_CLASSES
+from estimators import FORESTS, split_pipeline
+
+
+def encode_labels(labels, classes):
+    """
+    Maps outcome names ('Dropout', ...) onto the label space the model was
+    fitted with: the names themselves, or the LabelEncoder integer codes used
+    by train_model.py (alphabetical, i.e. the TARGET_CLASSES order).
+    """
+    labels = np.asarray(labels)
+    if np.issubdtype(np.asarray(classes).dtype, np.integer) and not np.issubdtype(labels.dtype, np.integer):
+        lookup = {name: code for code, name in enumerate(TARGET_CLASSES)}
+        try:
+            return np.array([lookup[str(label)] for label in labels])
+        except KeyError as e:
+            raise ValueError(f"Unknown outcome {e}; expected one of {TARGET_CLASSES}") from None
+    return labels
+
+
+def extend_model(model, X_new, y_new, n_new_trees=20, retire_oldest=False):
+    """
+    Appends `n_new_trees` trees fitted on newly labelled records to a copy of
+    `model` with warm_start; the existing trees are kept unchanged.
+
+    - RandomForest / ExtraTrees: new trees are fitted on the new records only.
+      With retire_oldest, as many of the oldest trees are dropped, so the
+      ensemble size (and inference cost) stays fixed.
+    - GradientBoosting: new stages continue boosting from the current
+      margins on the new records (stages are additive, so none can be retired).
+    - Pipelines keep their fitted preprocessing; new records go through it.
+
+    warm_start re-derives classes_ from the new labels, so every class the
+    model knows must appear in the batch, otherwise the old trees' outputs
+    would be misaligned. The input model is never modified.
+    """
+    preprocess, estimator = split_pipeline(model)
+    if not isinstance(estimator, FORESTS + (GradientBoostingClassifier,)):
+        raise TypeError(f"Incremental training is not supported for {type(estimator).__name__}")
+    if retire_oldest and not isinstance(estimator, FORESTS):
+        raise ValueError("Only forest models can retire trees; boosting stages depend on each other")
+
+    y_new = encode_labels(y_new, estimator.classes_)
+    missing = set(estimator.classes_.tolist()) - set(np.unique(y_new).tolist())
+    if missing:
+        raise ValueError(f"New records must include every class the model predicts; missing {sorted(missing)}")
+
+    if preprocess is not None:
+        X_new = preprocess.transform(X_new)
+
+    # Work on a copy, so the model that is serving is never touched
+    extended = copy.deepcopy(estimator)
+    extended.set_params(warm_start=True, n_estimators=estimator.n_estimators + n_new_trees)
+    extended.fit(X_new, y_new)
+    extended.set_params(warm_start=False)
+
+    if retire_oldest:
+        extended.estimators_ = extended.estimators_[n_new_trees:]
+        extended.n_estimators = len(extended.estimators_)
+
+    if preprocess is None:
+        return extended
+    return Pipeline(model.steps[:-1] + [(model.steps[-1][0], extended)])
+
@@ -1,24 +1,27 @@
 import pandas as pd
-import joblib
+import numpy as np
 import os
 import argparse
 import sys
+from bundle import ModelBundle
 
 # Configuration
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '../student_dropout_project/model.joblib')
 
 def load_model(model_path):
+    """Loads the model bundle written by train_model.py (model, feature order and label names)."""
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at {model_path}. Please train the model first.")
-    return joblib.load(model_path)
+    return ModelBundle.load(model_path)
 
 def predict(input_data):
     """
     Loads model and predicts dropout risk for input data.
-    Input data should be a dictionary or DataFrame matching training features.
+    Input data should be a dictionary or DataFrame with the training features,
+    named as in data.csv or in snake_case; column order does not matter.
     """
     try:
-        model = load_model(MODEL_PATH)
+        bundle = load_model(MODEL_PATH)
         
         # Ensure input is DataFrame
         if isinstance(input_data, dict):
@@ -27,14 +30,11 @@ def predict(input_data):
             df = input_data
             
         print("Running predictions...")
-        predictions = model.predict(df)
-        probabilities = model.predict_proba(df)
+        probabilities = bundle.model.predict_proba(bundle.align(df))
+        predictions = np.asarray(bundle.labels, dtype=object)[np.argmax(probabilities, axis=1)]
         
         results = []
         for pred, prob in zip(predictions, probabilities):
-            # Assuming label encoder mapped 0: Dropout, 1: Enrolled, 2: Graduate (example)
-            # In a real scenario, we'd load the label encoder to inverse transform.
-            # Here we just return the raw prediction and max probability.
             confidence = max(prob)
             results.append({'Prediction': pred, 'Confidence': f"{confidence:.2%}"})
             
@@ -0,0 +1,264 @@
+import cProfile
+import json
+import os
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+PROFILERS = ('cprofile', 'sample')
+REPORT_FORMAT = 1
+TOP_FUNCTIONS = 20
+
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _peak_rss_bytes(who=resource.RUSAGE_SELF) -> int:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _frame_name(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of one thread every `interval` seconds from a
+    background thread. Much cheaper than cProfile on long fits, at the cost
+    of statistical rather than exact counts. Time spent in C extensions is
+    charged to the Python frame that called them.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str) -> None:
+        """Collapsed stacks, one per line, as read by flamegraph.pl / speedscope."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')
+            own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        n = sum(self.stacks.values()) or 1
+        return [{'function': name, 'self_pct': round(100 * own[name] / n, 1),
+                 'total_pct': round(100 * total[name] / n, 1)}
+                for name in sorted(total, key=lambda name: (own[name], total[name]), reverse=True)[:top]]
+
+
+def _cprofile_summary(profile: cProfile.Profile, top: int = TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profile).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return [{'function': f"{os.path.basename(filename)}:{line}({name})", 'calls': nc,
+             'self_seconds': round(tt, 4), 'total_seconds': round(ct, 4)}
+            for (filename, line, name), (cc, nc, tt, ct, callers) in rows]
+
+
+class RunProfiler:
+    """
+    Times each stage of a training run and writes a machine-readable report.
+
+    Every stage records wall and CPU seconds, RSS before and after, and the
+    process's (and its worker processes') peak RSS so far. With
+    `trace_allocations`, tracemalloc also records each stage's peak and net
+    Python/numpy allocations; that slows allocation-heavy code, so it is off
+    by default. With `profiler` ('cprofile' or 'sample'), the stages named in
+    `profile_stages` are profiled and their top functions added to the
+    report; the raw profile is written next to it by write().
+
+    Stages nest; a nested stage is recorded as "outer/inner".
+    """
+
+    def __init__(self, trace_allocations: bool = False, profiler: Optional[str] = None,
+                 profile_stages: Iterable[str] = ('fit',), sample_interval: float = 0.005):
+        if profiler is not None and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profiler!r}; choose from {', '.join(PROFILERS)}")
+        self.trace_allocations = trace_allocations
+        self.profiler = profiler
+        self.profile_stages = set(profile_stages)
+        self.sample_interval = sample_interval
+        self.stages: List[Dict[str, Any]] = []
+        self.profiles: Dict[str, Any] = {}
+        self.extra: Dict[str, Any] = {}
+        self._path: List[str] = []
+        self._open_peaks: List[int] = []  # traced peak seen so far by each open stage
+        self._profiling = False
+        self._started = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc)
+        self._owns_tracing = trace_allocations and not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    def close(self) -> None:
+        """Stops tracemalloc if this profiler started it."""
+        if self._owns_tracing:
+            tracemalloc.stop()
+            self._owns_tracing = False
+
+    @contextmanager
+    def stage(self, name: str):
+        self._path.append(name)
+        qualified = '/'.join(self._path)
+        record: Dict[str, Any] = {'stage': qualified, 'rss_before_bytes': _resident_bytes()}
+        # Listed in start order, so an outer stage precedes the stages inside it
+        self.stages.append(record)
+        if self.trace_allocations:
+            traced_before, peak_so_far = tracemalloc.get_traced_memory()
+            # reset_peak() is global: keep what the enclosing stages have seen so far
+            self._open_peaks = [max(p, peak_so_far) for p in self._open_peaks] + [traced_before]
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            with self._profile(name, qualified):
+                yield record
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall, 4)
+            record['cpu_seconds'] = round(time.process_time() - cpu, 4)
+            record['rss_after_bytes'] = _resident_bytes()
+            record['peak_rss_bytes'] = _peak_rss_bytes()
+            record['peak_rss_children_bytes'] = _peak_rss_bytes(resource.RUSAGE_CHILDREN)
+            if self.trace_allocations:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self._open_peaks.pop())
+                record['alloc_peak_bytes'] = peak - traced_before
+                record['alloc_net_bytes'] = current - traced_before
+            self._path.pop()
+
+    def _profile(self, name: str, qualified: str):
+        # Profilers do not nest; only the outermost matching stage is profiled
+        if self.profiler is None or name not in self.profile_stages or self._profiling:
+            return nullcontext()
+        return self._run_profiler(qualified)
+
+    @contextmanager
+    def _run_profiler(self, qualified: str):
+        entry = {'profiler': self.profiler}
+        self.profiles[qualified] = entry
+        self._profiling = True
+        try:
+            if self.profiler == 'cprofile':
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    yield
+                finally:
+                    profile.disable()
+                    entry['top_functions'] = _cprofile_summary(profile)
+                    entry['_raw'] = profile
+            else:
+                with SamplingProfiler(self.sample_interval) as sampler:
+                    yield
+                entry['samples'] = sum(sampler.stacks.values())
+                entry['interval_seconds'] = self.sample_interval
+                entry['top_functions'] = sampler.summary()
+                entry['_raw'] = sampler
+        finally:
+            self._profiling = False
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'format': REPORT_FORMAT,
+            'started_at': self._started_at.isoformat(),
+            'total_seconds': round(time.perf_counter() - self._started, 4),
+            'peak_rss_bytes': _peak_rss_bytes(),
+            'peak_rss_children_bytes': _peak_rss_bytes(resource.RUSAGE_CHILDREN),
+            'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                     'cpus': os.cpu_count()},
+            'trace_allocations': self.trace_allocations,
+            'stages': self.stages,
+            'profiles': {stage: {k: v for k, v in entry.items() if not k.startswith('_')}
+                         for stage, entry in self.profiles.items()},
+            **self.extra,
+        }
+
+    def write(self, directory: str, name: Optional[str] = None) -> str:
+        """
+        Writes the report as <directory>/<name>.json (by default the run's UTC
+        start time and model version, so one directory accumulates a history
+        of runs that can be trended), plus a
+        .prof (cProfile, for pstats/snakeviz) or .folded (sampled stacks) file
+        per profiled stage. Returns the report path.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if name is None:
+            name = self._started_at.strftime('%Y%m%dT%H%M%SZ')
+            if self.extra.get('version'):
+                name += f"-{self.extra['version']}"
+        report = self.report()
+        for stage, entry in self.profiles.items():
+            raw, stem = entry.get('_raw'), os.path.join(directory, f"{name}.{stage.replace('/', '.')}")
+            if isinstance(raw, cProfile.Profile):
+                raw.dump_stats(f"{stem}.prof")
+                report['profiles'][stage]['file'] = os.path.basename(f"{stem}.prof")
+            elif isinstance(raw, SamplingProfiler):
+                raw.write_folded(f"{stem}.folded")
+                report['profiles'][stage]['file'] = os.path.basename(f"{stem}.folded")
+
+        path = os.path.join(directory, f"{name}.json")
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+
+def profiled(profiler: Optional[RunProfiler], name: str):
+    """profiler.stage(name), or a no-op when profiling is not requested."""
+    return profiler.stage(name) if profiler is not None else nullcontext({})
+
+
+def format_stages(report: Dict[str, Any]) -> str:
+    lines = [f"{'stage':<28} {'wall s':>8} {'cpu s':>8} {'peak RSS MB':>12}"
+             + (f" {'alloc peak MB':>14}" if report['trace_allocations'] else '')]
+    for stage in report['stages']:
+        line = (f"{stage['stage']:<28} {stage['wall_seconds']:>8.3f} {stage['cpu_seconds']:>8.3f} "
+                f"{stage['peak_rss_bytes'] / 1e6:>12.1f}")
+        if report['trace_allocations']:
+            line += f" {stage['alloc_peak_bytes'] / 1e6:>14.1f}"
+        lines.append(line)
+    lines.append(f"total {report['total_seconds']:.3f}s, peak RSS {report['peak_rss_bytes'] / 1e6:.1f} MB")
+    return '\n'.join(lines)
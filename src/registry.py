@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from bundle import ModelBundle
+from data_loader import CSV_SCHEMA, content_fingerprint
+
+VERSION_PATTERN = re.compile(r'^v(\d{4,})$')
+CURRENT_POINTER = 'CURRENT'
+
+
+def library_versions() -> Dict[str, str]:
+    """Libraries whose upgrade can change a fitted model (or its pickle format)."""
+    return {
+        'python': '.'.join(platform.python_version_tuple()[:2]),
+        'scikit-learn': sklearn.__version__,
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'joblib': joblib.__version__,
+    }
+
+
+def training_cache_key(data_path: str, params: Dict[str, Any], schema: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Content address of a training run: hash of the data file contents, the
+    feature schema, the model parameters and the library versions. Returns
+    (key, components) so the components can be stored alongside the version.
+    """
+    data_digest, _ = content_fingerprint(data_path)
+    components = {
+        'data_sha256': data_digest,
+        'schema': schema if schema is not None else CSV_SCHEMA,
+        'params': params,
+        'libraries': library_versions(),
+    }
+    canonical = json.dumps(components, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest(), components
+
+
+def _write_json_atomic(path: str, payload: Any) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    """
+    Numbered, immutable model versions on disk:
+
+        <root>/versions/v0001/model.joblib          ModelBundle (see bundle.py)
+        <root>/versions/v0001/metadata.json         key, metrics, timings, size
+        <root>/index.json                           cache key -> version
+        <root>/CURRENT                              version that is served
+
+    A version directory is built under a temporary name and renamed into
+    place, and the pointer files are replaced atomically, so readers (e.g.
+    PredictionService in another process) never see a partial version.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.index_path = os.path.join(root, 'index.json')
+        self.current_path = os.path.join(root, CURRENT_POINTER)
+
+    # ===== Lookup
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name for name in os.listdir(self.versions_dir) if VERSION_PATTERN.match(name))
+
+    def lookup(self, cache_key: str) -> Optional[str]:
+        """Version trained from exactly these inputs, if one exists."""
+        version = self._index().get(cache_key)
+        return version if version in self.versions() else None
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self.path(version), 'metadata.json')) as f:
+            return json.load(f)
+
+    def path(self, version: str) -> str:
+        if not VERSION_PATTERN.match(version):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def current(self) -> Optional[str]:
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def bundle_path(self, version: str) -> str:
+        return os.path.join(self.path(version), 'model.joblib')
+
+    def load(self, version: str, expected_features=None) -> Tuple[ModelBundle, Dict[str, Any]]:
+        """Returns (bundle, metadata); BundleSchemaError if the bundle does not fit expected_features."""
+        if not os.path.isdir(self.path(version)):
+            raise FileNotFoundError(f"Model version {version} not found in {self.versions_dir}")
+        return ModelBundle.load(self.bundle_path(version), expected_features), self.metadata(version)
+
+    # ===== Writes
+    def register(self, bundle: ModelBundle, cache_key: Optional[str] = None,
+                 key_components: Optional[Dict[str, Any]] = None, metrics: Optional[Dict[str, Any]] = None,
+                 training_seconds: Optional[float] = None, extra: Optional[Dict[str, Any]] = None) -> str:
+        """Stores a new numbered version and returns its name (e.g. 'v0003')."""
+        os.makedirs(self.versions_dir, exist_ok=True)
+        staging = os.path.join(self.root, f".staging-{os.getpid()}-{time.time_ns()}")
+        os.makedirs(staging)
+        try:
+            model_path = bundle.save(os.path.join(staging, 'model.joblib'))
+            start = time.perf_counter()
+            ModelBundle.load(model_path)
+            load_seconds = time.perf_counter() - start
+
+            metadata = {
+                'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'cache_key': cache_key,
+                'key_components': key_components,
+                'model_class': type(bundle.model).__name__,
+                'bundle_version': bundle.version,
+                'metrics': metrics or {},
+                'training_seconds': round(training_seconds, 3) if training_seconds is not None else None,
+                'size_bytes': os.path.getsize(model_path),
+                'load_seconds': round(load_seconds, 4),
+                **(extra or {}),
+            }
+            version = self._claim_version(staging, metadata)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if cache_key is not None:
+            index = self._index()
+            index[cache_key] = version
+            _write_json_atomic(self.index_path, index)
+        return version
+
+    def activate(self, version: str, expected_features=None) -> None:
+        """
+        Points CURRENT at `version`; services following the pointer roll forward to it.
+        The bundle is loaded first, so a version that cannot be served (BundleSchemaError,
+        e.g. features other than expected_features) never becomes current.
+        """
+        if version not in self.versions():
+            raise FileNotFoundError(f"Model version {version} not found in {self.versions_dir}")
+        self.load(version, expected_features)
+        tmp_path = f"{self.current_path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp_path, self.current_path)
+
+    def _claim_version(self, staging: str, metadata: Dict[str, Any]) -> str:
+        # rename() fails if the target exists, so two concurrent trainers never share a number
+        while True:
+            existing = [int(VERSION_PATTERN.match(v).group(1)) for v in self.versions()]
+            version = f"v{(max(existing) + 1 if existing else 1):04d}"
+            metadata['version'] = version
+            _write_json_atomic(os.path.join(staging, 'metadata.json'), metadata)
+            try:
+                os.rename(staging, os.path.join(self.versions_dir, version))
+                return version
+            except OSError:
+                if not os.path.isdir(os.path.join(self.versions_dir, version)):
+                    raise
+
+    def _index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
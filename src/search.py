@@ -0,0 +1,271 @@
+import hashlib
+import json
+import math
+import os
+import time
+import joblib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict
+from sklearn.ensemble import (RandomForestClassifier, ExtraTreesClassifier,
+                              GradientBoostingClassifier, HistGradientBoostingClassifier)
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import ParameterSampler, train_test_split
+
+from forest_engine import CompiledForest
+
+RANDOM_STATE = 42
+
+ESTIMATORS = {
+    'random_forest': RandomForestClassifier,
+    'extra_trees': ExtraTreesClassifier,
+    'gradient_boosting': GradientBoostingClassifier,
+    'hist_gradient_boosting': HistGradientBoostingClassifier,
+}
+
+# Candidate grids per family; candidates are sampled from these without replacement
+SEARCH_SPACE = {
+    'random_forest': {
+        'n_estimators': [100, 200, 400],
+        'max_depth': [None, 12, 20],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.3, 0.5],
+        'class_weight': [None, 'balanced'],
+    },
+    'extra_trees': {
+        'n_estimators': [200, 400],
+        'max_depth': [None, 16],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5],
+        'class_weight': [None, 'balanced'],
+    },
+    'gradient_boosting': {
+        'n_estimators': [100, 200, 300],
+        'learning_rate': [0.05, 0.1],
+        'max_depth': [2, 3, 4],
+        'subsample': [0.8, 1.0],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.05, 0.1],
+        'max_leaf_nodes': [15, 31, 63],
+        'l2_regularization': [0.0, 1.0],
+    },
+}
+
+SCORING = 'f1_macro'
+
+
+def sample_candidates(n_candidates, families=None, random_state=RANDOM_STATE):
+    """Samples `n_candidates` configurations, spread evenly over the model families."""
+    families = list(families or SEARCH_SPACE)
+    per_family = math.ceil(n_candidates / len(families))
+    pools = {family: list(ParameterSampler(SEARCH_SPACE[family], n_iter=per_family, random_state=random_state))
+             for family in families}
+    # Interleave families so truncating to n_candidates keeps the mix balanced
+    candidates = []
+    for i in range(per_family):
+        for family in families:
+            if i < len(pools[family]) and len(candidates) < n_candidates:
+                candidates.append({'id': f"{family}-{i:03d}", 'family': family, 'params': pools[family][i]})
+    return candidates
+
+
+def build_estimator(candidate):
+    params = dict(candidate['params'], random_state=RANDOM_STATE)
+    if candidate['family'] in ('random_forest', 'extra_trees'):
+        params['n_jobs'] = 1  # parallelism comes from the process pool
+    return ESTIMATORS[candidate['family']](**params)
+
+
+def rung_sizes(n_candidates, n_samples, factor=3, min_resources=500):
+    """
+    Training-set size per rung: each rung keeps the best 1/factor of the
+    candidates and gives them factor times more rows, ending at all rows.
+    """
+    n_rungs = max(1, int(math.floor(math.log(max(n_candidates, 1), factor))) + 1)
+    sizes = [int(n_samples / factor ** (n_rungs - 1 - r)) for r in range(n_rungs)]
+    return [min(n_samples, max(size, min_resources)) for size in sizes]
+
+
+# ===== Worker side: data is memory-mapped from the search directory, never pickled per task
+_WORKER_DATA: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(data_dir):
+    for name in ('X_fit', 'y_fit', 'X_val', 'y_val'):
+        _WORKER_DATA[name] = np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode='r')
+
+
+def _evaluate(candidate, n_samples, model_path=None):
+    X, y = _WORKER_DATA['X_fit'][:n_samples], _WORKER_DATA['y_fit'][:n_samples]
+    model = build_estimator(candidate)
+    start = time.perf_counter()
+    model.fit(X, y)
+    fit_seconds = time.perf_counter() - start
+
+    y_pred = model.predict(_WORKER_DATA['X_val'])
+    if model_path is not None:
+        joblib.dump(model, model_path)
+    return {
+        'score': float(f1_score(_WORKER_DATA['y_val'], y_pred, average='macro')),
+        'accuracy': float(accuracy_score(_WORKER_DATA['y_val'], y_pred)),
+        'fit_seconds': round(fit_seconds, 4),
+    }
+
+
+# ===== Checkpoint
+class SearchCheckpoint:
+    """
+    JSON record of every finished (rung, candidate) evaluation. It is rewritten
+    atomically after each result, so an interrupted search resumes from the
+    last completed fit. The signature ties it to the data and search settings.
+    """
+
+    def __init__(self, path, signature):
+        self.path = path
+        self.signature = signature
+        self.results: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            if state.get('signature') != signature:
+                raise ValueError(f"{path} belongs to a different search (data or settings changed); "
+                                 f"remove it or pick another --search-dir")
+            self.results = state['results']
+
+    @staticmethod
+    def key(rung, candidate_id):
+        return f"{rung}:{candidate_id}"
+
+    def get(self, rung, candidate_id):
+        return self.results.get(self.key(rung, candidate_id))
+
+    def record(self, rung, candidate_id, result):
+        self.results[self.key(rung, candidate_id)] = result
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'signature': self.signature, 'results': self.results}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _signature(X, y, candidates, sizes, factor):
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(np.ascontiguousarray(y).tobytes())
+    digest.update(json.dumps({'candidates': candidates, 'sizes': sizes, 'factor': factor},
+                             sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def measure_latency(model, X, n_single=200, batch_size=1000):
+    """Median single-row predict_proba latency and per-batch time, in milliseconds."""
+    def single_ms(predict_proba):
+        timings = []
+        for i in range(n_single):
+            row = X[i % len(X)][np.newaxis, :]
+            start = time.perf_counter()
+            predict_proba(row)
+            timings.append(time.perf_counter() - start)
+        return round(float(np.median(timings)) * 1000, 4)
+
+    batch = X[np.arange(batch_size) % len(X)]
+    start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_ms = round((time.perf_counter() - start) * 1000, 4)
+    latency = {
+        'single_row_ms': single_ms(model.predict_proba),
+        f'batch_{batch_size}_ms': batch_ms,
+        'engine_single_row_ms': None,
+    }
+    try:
+        engine = CompiledForest.from_estimator(model)
+    except TypeError:
+        pass  # not compilable (yet); served through sklearn
+    else:
+        latency['engine_single_row_ms'] = single_ms(engine.predict_proba)
+    return latency
+
+
+def run_search(X, y, search_dir, n_candidates=24, factor=3, min_resources=500, max_workers=None,
+               families=None, log=print):
+    """
+    Successive-halving search over forest and boosting configurations.
+
+    Candidates are fitted in parallel in a process pool on growing subsets of
+    the training split and scored (macro F1) on a held-out validation split;
+    each rung keeps the best 1/factor. Finalists are saved to `search_dir` and
+    timed for inference, and the leaderboard is written next to them.
+
+    Returns (best_model, leaderboard).
+    """
+    os.makedirs(os.path.join(search_dir, 'models'), exist_ok=True)
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=0.2, stratify=y, random_state=RANDOM_STATE)
+    for name, array in (('X_fit', X_fit), ('y_fit', y_fit), ('X_val', X_val), ('y_val', y_val)):
+        np.save(os.path.join(search_dir, f"{name}.npy"), array)
+
+    candidates = sample_candidates(n_candidates, families)
+    sizes = rung_sizes(len(candidates), len(X_fit), factor, min_resources)
+    checkpoint = SearchCheckpoint(os.path.join(search_dir, 'checkpoint.json'),
+                                  _signature(X, y, candidates, sizes, factor))
+    by_id = {c['id']: c for c in candidates}
+    log(f"Searching {len(candidates)} candidates over {len(sizes)} rungs (rows per rung: {sizes})")
+
+    survivors = [c['id'] for c in candidates]
+    evaluated = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(search_dir,)) as pool:
+        for rung, n_samples in enumerate(sizes):
+            final = rung == len(sizes) - 1
+            pending = {}
+            for cid in survivors:
+                model_path = os.path.join(search_dir, 'models', f"{cid}.joblib") if final else None
+                if checkpoint.get(rung, cid) is not None and (model_path is None or os.path.exists(model_path)):
+                    continue
+                pending[pool.submit(_evaluate, by_id[cid], n_samples, model_path)] = cid
+            for future in as_completed(pending):
+                cid = pending[future]
+                checkpoint.record(rung, cid, future.result())
+                evaluated += 1
+
+            ranked = sorted(survivors, key=lambda cid: checkpoint.get(rung, cid)['score'], reverse=True)
+            log(f"Rung {rung} ({n_samples} rows): best {ranked[0]} "
+                f"{SCORING}={checkpoint.get(rung, ranked[0])['score']:.4f}")
+            if not final:
+                survivors = ranked[:max(1, math.ceil(len(ranked) / factor))]
+            else:
+                survivors = ranked
+
+    final_rung = len(sizes) - 1
+    leaderboard = []
+    for rank, cid in enumerate(survivors, start=1):
+        model = joblib.load(os.path.join(search_dir, 'models', f"{cid}.joblib"))
+        result = checkpoint.get(final_rung, cid)
+        leaderboard.append({
+            'rank': rank,
+            'id': cid,
+            'family': by_id[cid]['family'],
+            'params': by_id[cid]['params'],
+            SCORING: round(result['score'], 4),
+            'accuracy': round(result['accuracy'], 4),
+            'fit_seconds': result['fit_seconds'],
+            **measure_latency(model, X_val),
+        })
+
+    with open(os.path.join(search_dir, 'leaderboard.json'), 'w') as f:
+        json.dump({'rungs': sizes, 'evaluated_this_run': evaluated, 'leaderboard': leaderboard},
+                  f, indent=2, default=str)
+    best_model = joblib.load(os.path.join(search_dir, 'models', f"{survivors[0]}.joblib"))
+    return best_model, leaderboard
+
+
+def format_leaderboard(leaderboard):
+    lines = [f"{'#':>2}  {'candidate':<28} {SCORING:>8} {'acc':>7} {'fit s':>8} {'1-row ms':>9} {'engine ms':>10}"]
+    for row in leaderboard:
+        engine_ms = row['engine_single_row_ms']
+        lines.append(f"{row['rank']:>2}  {row['id']:<28} {row[SCORING]:>8.4f} {row['accuracy']:>7.4f} "
+                     f"{row['fit_seconds']:>8.2f} {row['single_row_ms']:>9.3f} "
+                     f"{(f'{engine_ms:.3f}' if engine_ms is not None else '-'):>10}")
+    return '\n'.join(lines)
@@ -1,22 +1,37 @@
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import os
+import time
+import argparse
+from data_loader import load_dataset, DATA_CACHE_DIR
+from registry import ModelRegistry, training_cache_key
+from bundle import ModelBundle
+from backends import BACKENDS, DEFAULT_BACKEND, make_backend
+from profiling import PROFILERS, RunProfiler, profiled, format_stages
 
 # Configuration
 DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
 MODEL_PATH = os.path.join(os.path.dirname(__file__), '../student_dropout_project/model.joblib')
+# Shipped model the web app serves when the registry has no current version
+SERVED_MODEL_PATH = os.path.join(os.path.dirname(__file__), '../student_dropout_project/student_dropout_project/'
+                                 'predictor/ml_models/best_student_dropout_model.pkl')
+SEARCH_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/search')
+REGISTRY_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/registry')
+# Run reports (stage timings, memory, profiles), one JSON file per training run
+RUNS_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/runs')
 RANDOM_STATE = 42
 
-def load_data(path):
-    """Load dataset from CSV."""
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Data file not found at {path}")
-    return pd.read_csv(path, sep=';')
+def load_data(path, cache_dir=DATA_CACHE_DIR):
+    """
+    Load dataset from CSV with the explicit schema (int8/int16/float32 columns).
+    Repeated runs on the same file read a columnar cache instead of
+    re-parsing the text; pass cache_dir=None to always parse.
+    """
+    return load_dataset(path, cache_dir=cache_dir)
 
 def preprocess_data(df):
     """
@@ -41,52 +56,303 @@ def preprocess_data(df):
     
     return X, y_encoded, le
 
-def train_model(X, y):
-    """Train Random Forest Classifier."""
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=RANDOM_STATE
-    )
+def make_classifier(backend=DEFAULT_BACKEND):
+    """The model trained by default (shared by train_model and cross-validation); see src/backends.py."""
+    return make_backend(backend)
+
+def training_params(search=False, n_candidates=24, factor=3, prune_tolerance=None, backend=DEFAULT_BACKEND):
+    """Everything besides the data and schema that decides what a run produces (part of the cache key)."""
+    if search:
+        from search import SEARCH_SPACE
+        params = {'mode': 'search', 'candidates': n_candidates, 'factor': factor, 'space': SEARCH_SPACE}
+    else:
+        clf = make_classifier(backend)
+        params = {'mode': 'default', 'model': type(clf).__name__, **clf.get_params()}
+    if prune_tolerance is not None:
+        params['prune_tolerance'] = prune_tolerance
+    return params
+
+def holdout_split(X, y, stratify=False):
+    """
+    The evaluation split of train_model (or, with stratify, of the search's
+    validation split), so post-training steps score on rows never trained on.
+    """
+    return train_test_split(X, y, test_size=0.2, random_state=RANDOM_STATE,
+                            stratify=y if stratify else None)
+
+def train_model(X, y, metrics=None, backend=DEFAULT_BACKEND, profiler=None):
+    """
+    Train the classifier (Random Forest by default). Hold-out scores are added
+    to `metrics` if given; stages are timed by `profiler` (see src/profiling.py).
+    """
+    with profiled(profiler, 'split'):
+        X_train, X_test, y_train, y_test = holdout_split(X, y)
     
-    clf = RandomForestClassifier(
-        n_estimators=100,
-        random_state=RANDOM_STATE,
-        n_jobs=-1
-    )
+    clf = make_classifier(backend)
     
-    print("Training Random Forest model...")
-    clf.fit(X_train, y_train)
+    print(f"Training {type(clf).__name__} model...")
+    with profiled(profiler, 'fit'):
+        clf.fit(X_train, y_train)
     
     # Evaluation
-    y_pred = clf.predict(X_test)
+    with profiled(profiler, 'evaluate'):
+        y_pred = clf.predict(X_test)
     print("\nModel Performance:")
     print(f"Accuracy: {accuracy_score(y_test, y_pred):.4f}")
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred))
     
+    if metrics is not None:
+        metrics['accuracy'] = round(float(accuracy_score(y_test, y_pred)), 4)
+        metrics['classification_report'] = classification_report(y_test, y_pred, output_dict=True)
     return clf
 
 def save_artifacts(model, label_encoder, output_path):
-    """Save model and label encoder."""
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    # Saving as a dict to keep everything together or just the model
-    # For simplicity matching standard practices:
-    joblib.dump(model, output_path)
+    """
+    Save the model as a bundle (see src/bundle.py) with its feature order and
+    label names. It is written to a temporary file and renamed into place, so
+    a reader never sees a half-written model.
+    """
+    bundle = ModelBundle.from_model(model, label_encoder)
+    bundle.save(output_path)
     print(f"Model saved to {output_path}")
+    return bundle
+
+def search_model(X, y, search_dir=SEARCH_DIR, n_candidates=24, factor=3, max_workers=None, metrics=None):
+    """Successive-halving hyperparameter search (see src/search.py); returns the winning model."""
+    from search import run_search, format_leaderboard, SCORING
+
+    model, leaderboard = run_search(X, y, search_dir, n_candidates=n_candidates, factor=factor,
+                                    max_workers=max_workers)
+    print("\nLeaderboard (validation split):")
+    print(format_leaderboard(leaderboard))
+    print(f"Full leaderboard: {os.path.join(search_dir, 'leaderboard.json')}")
+    if metrics is not None:
+        best = leaderboard[0]
+        metrics.update({'candidate': best['id'], 'params': best['params'],
+                        SCORING: best[SCORING], 'accuracy': best['accuracy']})
+    return model
+
+def compact(model, X, y, tolerance=None, stratify=False):
+    """
+    Compacts the trained model (see src/compaction.py): with a tolerance,
+    forest subtrees are pruned while holdout accuracy drops by at most that
+    much. Prints the before/after report and returns (model, report).
+    """
+    from compaction import compact_model, format_report
+
+    _, X_holdout, _, y_holdout = holdout_split(X, y, stratify)
+    model, _, report = compact_model(model, X_holdout, y_holdout, tolerance)
+    print("\nCompaction (holdout split):")
+    print(format_report(report))
+    return model, report
+
+def compare(X, y, label_encoder, backends=None):
+    """Trains each backend on the evaluation split and prints the comparison (see src/backends.py)."""
+    from backends import compare_backends, format_comparison
+
+    X_train, X_test, y_train, y_test = holdout_split(X, y)
+    report = compare_backends(X_train, y_train, X_test, y_test, names=backends,
+                              class_names=label_encoder.classes_)
+    print("\nBackend comparison (holdout split):")
+    print(format_comparison(report))
+    return report
+
+def evaluate_cv(X, y, label_encoder, n_splits=5, n_repeats=1, max_workers=None, backend=DEFAULT_BACKEND):
+    """Parallel k-fold cross-validation of the default model (see src/cross_validation.py)."""
+    from cross_validation import cross_validate, format_report
+
+    report = cross_validate(make_classifier(backend), X, y, n_splits=n_splits, n_repeats=n_repeats,
+                            max_workers=max_workers, class_names=label_encoder.classes_)
+    print("\nCross-validation:")
+    print(format_report(report))
+    return report
+
+def retrain_incremental(new_data_path, model_path=None, n_new_trees=20, retire_oldest=False,
+                        registry_dir=REGISTRY_DIR, activate=True):
+    """
+    Appends trees fitted on newly labelled records (data.csv layout, e.g. from
+    'manage.py export_outcomes') to the served model: the registry's current
+    version, or the model at `model_path` (the shipped .pkl without one). The
+    extended bundle is registered as a new version and, with `activate`, made
+    current, so running services roll forward to it without a restart.
+
+    Returns (extended model, version).
+    """
+    from incremental import extend_model
+
+    new_df = load_data(new_data_path, cache_dir=None)
+    X_new = new_df.drop('Target', axis=1)
+    y_new = new_df['Target'].astype(str)
+
+    registry = ModelRegistry(registry_dir)
+    current = registry.current()
+    if model_path is None and current is not None:
+        base = current
+        bundle, _ = registry.load(current)
+    else:
+        base = model_path or SERVED_MODEL_PATH
+        # The shipped .pkl is a bare model; everything train_model.py writes is a bundle
+        bundle = None if base.endswith('.pkl') else ModelBundle.load(base)
+
+    if bundle is not None:
+        model = bundle.model
+        X_new = bundle.align(X_new)
+    else:
+        model = joblib.load(base)
+        # The served model was fitted with snake_case names; the column order is the same
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None and len(names) == X_new.shape[1]:
+            X_new.columns = names
+
+    print(f"Extending {base} with {n_new_trees} trees fitted on {len(new_df)} new records...")
+    start = time.perf_counter()
+    extended = extend_model(model, X_new, y_new, n_new_trees=n_new_trees, retire_oldest=retire_oldest)
+    training_seconds = time.perf_counter() - start
+    if bundle is not None:
+        extended_bundle = ModelBundle.from_model(extended, features=bundle.features, labels=bundle.labels,
+                                                 metadata=bundle.metadata)
+    else:
+        extended_bundle = ModelBundle.from_model(extended)
+
+    version = registry.register(extended_bundle, training_seconds=training_seconds, extra={
+        'incremental': {'base': base, 'new_rows': int(len(new_df)), 'new_trees': n_new_trees,
+                        'retire_oldest': retire_oldest},
+    })
+    if activate:
+        registry.activate(version)
+        print(f"Registered and activated {version} in {registry_dir}")
+    else:
+        print(f"Registered {version} in {registry_dir}; serve it with 'manage.py activate_model {version}'")
+    return extended, version
+
+def load_training_data(data_path, profiler=None):
+    """load_data + preprocess_data, timed as the 'load_data' and 'preprocess' stages."""
+    with profiled(profiler, 'load_data'):
+        df = load_data(data_path)
+    with profiled(profiler, 'preprocess'):
+        return preprocess_data(df)
+
+def train_or_reuse(args, data_path=DATA_PATH, registry_dir=REGISTRY_DIR, profiler=None):
+    """
+    Trains a model, or reuses the registry version trained from the same data
+    contents, feature schema, parameters and library versions (unless
+    args.force). The result is made the registry's current version.
+
+    Returns (bundle, version).
+    """
+    registry = ModelRegistry(registry_dir)
+    with profiled(profiler, 'cache_key'):
+        cache_key, components = training_cache_key(
+            data_path, training_params(args.search, args.candidates, args.factor, args.prune_tolerance, args.backend))
+        version = registry.lookup(cache_key)
+
+    data = None
+    if args.cv:
+        data = load_training_data(data_path, profiler)
+        with profiled(profiler, 'cross_validation'):
+            evaluate_cv(*data, args.cv, args.cv_repeats, args.workers, args.backend)
+
+    cache_hit = version is not None and not args.force
+    if cache_hit:
+        with profiled(profiler, 'registry_load'):
+            bundle, metadata = registry.load(version)
+        print(f"Cache hit: {version} was trained from identical inputs "
+              f"({metadata['training_seconds']}s of training skipped; use --force to retrain)")
+    else:
+        if data is None:
+            data = load_training_data(data_path, profiler)
+        X, y, le = data
+        print(f"Data loaded: {X.shape}")
+
+        metrics = {}
+        start = time.perf_counter()
+        if args.search:
+            with profiled(profiler, 'fit'):
+                model = search_model(X, y, args.search_dir, args.candidates, args.factor, args.workers, metrics)
+        else:
+            model = train_model(X, y, metrics, args.backend, profiler)
+        training_seconds = time.perf_counter() - start
+
+        extra = {'n_rows': int(X.shape[0])}
+        if args.prune_tolerance is not None:
+            with profiled(profiler, 'compact'):
+                model, extra['compaction'] = compact(model, X, y, args.prune_tolerance, stratify=args.search)
+            metrics['accuracy_after_pruning'] = extra['compaction']['after']['accuracy']
+
+        with profiled(profiler, 'bundle'):
+            bundle = ModelBundle.from_model(model, le)
+        with profiled(profiler, 'register'):
+            version = registry.register(bundle, cache_key=cache_key, key_components=components,
+                                        metrics=metrics, training_seconds=training_seconds, extra=extra)
+        print(f"Registered {version} in {registry_dir}")
+
+    registry.activate(version)
+    if profiler is not None:
+        profiler.extra.update({'version': version, 'cache_hit': cache_hit})
+    return bundle, version
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the student dropout model.")
+    parser.add_argument('--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help="Model family to train (default: %(default)s)")
+    parser.add_argument('--compare-backends', action='store_true',
+                        help="Train every backend on the same split and report fit time, latency, size and "
+                             "per-class F1, without saving a model")
+    parser.add_argument('--search', action='store_true',
+                        help="Run a successive-halving search over forest and boosting models")
+    parser.add_argument('--candidates', type=int, default=24, help="Number of configurations to try")
+    parser.add_argument('--factor', type=int, default=3, help="Keep the best 1/factor at each rung")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size (default: all CPUs)")
+    parser.add_argument('--search-dir', default=SEARCH_DIR,
+                        help="Checkpoint and finalist directory; rerun with the same one to resume")
+    parser.add_argument('--force', action='store_true',
+                        help="Retrain even if the registry has a model trained from identical inputs")
+    parser.add_argument('--prune-tolerance', type=float, metavar='TOL',
+                        help="Prune forest subtrees while holdout accuracy drops by at most TOL (e.g. 0.005) "
+                             "and print a size/load-time/latency report")
+    parser.add_argument('--cv', type=int, metavar='K',
+                        help="Also report stratified K-fold cross-validation with per-class confidence intervals")
+    parser.add_argument('--cv-repeats', type=int, default=1, help="Repeat the K-fold split this many times")
+    parser.add_argument('--profile', choices=PROFILERS,
+                        help="Profile model fitting with cProfile or a low-overhead stack sampler; the top "
+                             "functions go into the run report and the raw profile next to it")
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help="Record per-stage peak allocations with tracemalloc (slows training)")
+    parser.add_argument('--runs-dir', default=RUNS_DIR,
+                        help="Directory for the JSON run report (stage timings, peak RSS, allocations)")
+    parser.add_argument('--incremental', metavar='NEW_CSV',
+                        help="Warm-start the existing model with newly labelled records instead of retraining")
+    parser.add_argument('--model-path', default=None,
+                        help="Model to extend in --incremental mode (default: the registry's current version)")
+    parser.add_argument('--no-activate', action='store_true',
+                        help="In --incremental mode, register the extended model without serving it")
+    parser.add_argument('--trees', type=int, default=20, help="Trees (or boosting stages) to add in --incremental mode")
+    parser.add_argument('--retire-oldest', action='store_true',
+                        help="Drop as many of the oldest trees as are added, keeping the forest size fixed")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     print("Starting Model Training Pipeline...")
     
     try:
-        df = load_data(DATA_PATH)
-        print(f"Data loaded: {df.shape}")
-        
-        X, y, le = preprocess_data(df)
-        
-        model = train_model(X, y)
-        
-        save_artifacts(model, le, MODEL_PATH)
+        if args.incremental:
+            retrain_incremental(args.incremental, args.model_path, args.trees, args.retire_oldest,
+                                activate=not args.no_activate)
+        elif args.compare_backends:
+            compare(*preprocess_data(load_data(DATA_PATH)))
+        else:
+            profiler = RunProfiler(trace_allocations=args.trace_allocations, profiler=args.profile)
+            profiler.extra['args'] = vars(args)
+            bundle, version = train_or_reuse(args, profiler=profiler)
+            with profiled(profiler, 'save'):
+                bundle.save(MODEL_PATH)
+            print(f"Model saved to {MODEL_PATH}")
+            print("\nStage timings:")
+            print(format_stages(profiler.report()))
+            print(f"Run report: {profiler.write(args.runs_dir)}")
+            profiler.close()
         
         print("Training complete.")
         
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, PredictionHistory
+from .models import UserProfile, PredictionHistory, ApiToken
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -15,7 +15,7 @@ class UserProfileAdmin(admin.ModelAdmin):
 # predictor/admin.py
 
 from django.contrib import admin
-from .models import PredictionHistory
+from .models import PredictionHistory, CohortSummary, CohortDriverCount
 
 
 @admin.register(PredictionHistory)
@@ -31,11 +31,17 @@ class PredictionHistoryAdmin(admin.ModelAdmin):
         "curricular_units_1st_sem_grade",
         "curricular_units_2nd_sem_grade",
         "prediction_result",
+        "risk_level",
+        "dropout_probability",
+        "actual_outcome",
     )
 
     # right-side filters
     list_filter = (
         "prediction_result",
+        "risk_level",
+        "model_version",
+        "actual_outcome",
         "course",
         "gender",
         "scholarship_holder",
@@ -55,12 +61,14 @@ class PredictionHistoryAdmin(admin.ModelAdmin):
     ordering = ("-created_at",)
 
     # fields that cannot be edited in admin
-    readonly_fields = ("created_at", "prediction_result")
+    readonly_fields = ("created_at", "prediction_result", "dropout_probability", "risk_level",
+                       "risk_driver_codes", "risk_driver_method", "model_version")
 
     # nice grouping inside the edit page
     fieldsets = (
         ("User & Prediction", {
-            "fields": ("user", "created_at", "prediction_result")
+            "fields": ("user", "created_at", "prediction_result", "dropout_probability", "risk_level",
+                       "risk_driver_codes", "risk_driver_method", "model_version", "actual_outcome")
         }),
         ("Student & Admission Details", {
             "fields": (
@@ -117,6 +125,30 @@ class PredictionHistoryAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(CohortSummary)
+class CohortSummaryAdmin(admin.ModelAdmin):
+    # Maintained by predictor/cohorts.py; rebuild with 'manage.py rebuild_cohort_summaries'
+    list_display = ("term", "course", "risk_level", "predictions", "mean_dropout_probability", "updated_at")
+    list_filter = ("term", "risk_level", "course")
+    ordering = ("-term", "course", "risk_level")
+    readonly_fields = ("updated_at",)
+
+
+@admin.register(CohortDriverCount)
+class CohortDriverCountAdmin(admin.ModelAdmin):
+    list_display = ("term", "course", "risk_level", "feature", "count")
+    list_filter = ("term", "risk_level", "feature")
+    ordering = ("-term", "course", "risk_level", "-count")
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    # Tokens are issued with 'manage.py create_api_token'; admins can list and revoke them
+    list_display = ("user", "name", "created_at")
+    search_fields = ("user__username", "name")
+    readonly_fields = ("created_at",)
+
+
 # Optional: customize admin site titles
 admin.site.site_header = "Student Dropout Prediction Admin"
 admin.site.site_title = "Dropout Prediction Admin"
@@ -1,5 +1,30 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 class PredictorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'predictor'
+
+
+def preload_model():
+    """
+    Loads the model once at server startup so the first counselor request does
+    not pay for it. Called from wsgi.py and asgi.py (runserver loads wsgi.py too)
+    rather than from AppConfig.ready, which also runs for migrate, check and
+    every other manage.py command.
+    """
+    if not getattr(settings, 'PREDICTOR_PRELOAD_MODEL', True):
+        return
+
+    from .services import PredictionService
+    try:
+        PredictionService.preload()
+    except FileNotFoundError as e:
+        logger.warning("Model preload skipped: %s", e)
+    except ValueError as e:
+        # BundleSchemaError included: keep the site (admin, history) up; predictions report the error
+        logger.error("Model preload failed, the served model cannot be loaded: %s", e)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class BatcherOverloaded(RuntimeError):
+    """Raised when the request queue is full; callers should shed load (HTTP 503)."""
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching for concurrent single-row predictions.
+
+    Requests arriving within `max_wait_ms` of each other (or until
+    `max_batch_size` rows are waiting) are stacked into one matrix and scored
+    with a single vectorized call. The batcher owns an asyncio event loop on a
+    background thread, so both WSGI worker threads (`submit`) and coroutines on
+    any other loop (`submit_async`) can feed the same batch window. Scoring runs
+    on a separate executor thread, so the loop stays free to accept (or reject)
+    submissions meanwhile; batches are scored one at a time, and requests that
+    arrive during scoring wait in the queue and form the next batch.
+    """
+
+    def __init__(self, score_batch: Callable[[np.ndarray], List[Any]], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, max_queue: int = 1024):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='micro-batch-score')
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self.requests = 0
+        self.batches = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run_loop, args=(ready,), name='micro-batcher', daemon=True)
+            thread.start()
+            ready.wait()
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._loop = loop
+        loop.create_task(self._collect_batches())
+        ready.set()
+        loop.run_forever()
+
+    def submit(self, row: np.ndarray, timeout: Optional[float] = None) -> Any:
+        """Blocking submit for synchronous callers (e.g. WSGI views)."""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(row), self._loop)
+        return future.result(timeout)
+
+    async def submit_async(self, row: np.ndarray) -> Any:
+        """Awaitable submit for coroutines running on any event loop."""
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(row), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def _enqueue(self, row: np.ndarray) -> Any:
+        result = self._loop.create_future()
+        try:
+            self._queue.put_nowait((row, result))
+        except asyncio.QueueFull:
+            with self._stats_lock:
+                self.rejected += 1
+            raise BatcherOverloaded(f"Prediction queue is full ({self.max_queue} requests waiting)")
+        return await result
+
+    async def _collect_batches(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Awaited, not scheduled: under load the queue fills while this batch
+            # is scored, so the next one is taken up to max_batch_size at once
+            await self._score(batch)
+
+    async def _score(self, batch) -> None:
+        rows = np.vstack([row for row, _ in batch])
+        try:
+            results = await self._loop.run_in_executor(self._executor, self.score_batch, rows)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            # Power-of-two buckets: 1, 2, 4, 8, ... up to max_batch_size
+            self._batch_sizes[1 << (len(batch) - 1).bit_length()] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "rejected": self.rejected,
+                "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                "batch_size_histogram": {f"<={size}": count for size, count in sorted(self._batch_sizes.items())},
+                "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            }
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+from django.core.cache import caches
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache for prediction results.
+
+    Keys are a hash of the canonical (ordered, float64) feature vector plus the
+    model version, so entries written for an older model are never served after
+    the model changes. Two backends are supported:
+    - 'local': per-process OrderedDict, evicts least recently used entries
+    - 'django': any configured Django cache (e.g. shared memcached/redis); size
+      limits and eviction are then handled by that backend
+    """
+
+    def __init__(self, backend: str = 'local', max_entries: int = 4096, ttl: float = 600,
+                 alias: str = 'default'):
+        if backend not in ('local', 'django'):
+            raise ValueError(f"Unknown prediction cache backend: {backend}")
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.alias = alias
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(row: np.ndarray, model_version: str) -> str:
+        # + 0.0 folds -0.0 into 0.0 so equal values always hash the same
+        canonical = np.ascontiguousarray(row, dtype=np.float64) + 0.0
+        digest = hashlib.sha1(canonical.tobytes()).hexdigest()
+        return f"prediction:{model_version}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if self.backend == 'django':
+            value = caches[self.alias].get(key)
+        else:
+            value = self._local_get(key)
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.backend == 'django':
+            caches[self.alias].set(key, value, timeout=self.ttl)
+        else:
+            self._local_set(key, value)
+
+    def clear(self) -> None:
+        """Drops every local entry (Django-backed entries expire via the versioned key)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.backend,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _local_get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _local_set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
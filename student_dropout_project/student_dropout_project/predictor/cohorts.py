@@ -0,0 +1,179 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import CohortSummary, CohortDriverCount
+
+RISK_LEVELS = ("Low", "Moderate", "High", "Critical")
+# Driver method whose codes are aggregated (see CohortTotals.add)
+DRIVER_METHOD = "attribution"
+
+_config = getattr(settings, 'PREDICTOR_COHORTS', {})
+# Months in which an academic term starts; a prediction belongs to the latest term started
+TERM_START_MONTHS = tuple(sorted(_config.get('TERM_START_MONTHS', (9, 2))))
+TOP_DRIVERS = _config.get('TOP_DRIVERS', 5)
+
+
+def term_of(moment: datetime) -> str:
+    """Academic term of a timestamp, named by its first month: "2026-09"."""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    started = [month for month in TERM_START_MONTHS if month <= moment.month]
+    if started:
+        return f"{moment.year}-{started[-1]:02d}"
+    return f"{moment.year - 1}-{TERM_START_MONTHS[-1]:02d}"
+
+
+def _increment(model, key: Dict[str, Any], deltas: Dict[str, Any], **values) -> None:
+    """
+    Adds `deltas` to the row at `key` with F() expressions, so concurrent
+    writers never lose each other's counts; creates the row on first use.
+    """
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**increments, **values):
+        return
+    # get_or_create recovers from a concurrent insert of the same key
+    _, created = model.objects.get_or_create(**key, defaults={**deltas, **values})
+    if not created:
+        model.objects.filter(**key).update(**increments, **values)
+
+
+class CohortTotals:
+    """
+    Summary deltas for a set of scored predictions, accumulated in memory and
+    written with one UPDATE per (course, term, risk level) cell, so saving a
+    4,000-row upload costs a few dozen queries instead of one per student.
+    """
+
+    def __init__(self):
+        # cell -> [predictions, probability sum, probabilities counted]
+        self.cells = defaultdict(lambda: [0, 0.0, 0])
+        self.drivers: Counter = Counter()
+
+    def __len__(self) -> int:
+        return sum(cell[0] for cell in self.cells.values())
+
+    def add(self, course: int, term: str, metadata: Dict[str, Any]) -> None:
+        """
+        Counts one prediction's metadata (as returned by PredictionService).
+        Only TreeSHAP driver codes are counted: rule flags (models without
+        attributions, rows stored before the method was kept) name different
+        features for the same student and would skew the rankings.
+        """
+        key = (int(course), term, metadata["risk_level"])
+        cell = self.cells[key]
+        cell[0] += 1
+        probability = metadata.get("dropout_probability")
+        if probability is not None:
+            cell[1] += probability
+            cell[2] += 1
+        if metadata.get("risk_driver_method") == DRIVER_METHOD:
+            for feature in metadata.get("risk_driver_codes", ()):
+                self.drivers[key + (feature,)] += 1
+
+    def save(self) -> None:
+        """Adds the totals to the stored summaries and resets them."""
+        now = timezone.now()
+        with transaction.atomic():
+            for (course, term, risk_level), (n, probability_sum, scored) in self.cells.items():
+                _increment(
+                    CohortSummary,
+                    {"course": course, "term": term, "risk_level": risk_level},
+                    {"predictions": n, "probability_sum": probability_sum, "probability_count": scored},
+                    updated_at=now,
+                )
+            for (course, term, risk_level, feature), n in self.drivers.items():
+                _increment(
+                    CohortDriverCount,
+                    {"course": course, "term": term, "risk_level": risk_level, "feature": feature},
+                    {"count": n},
+                )
+        self.cells.clear()
+        self.drivers.clear()
+
+    def replace(self, batch_size: int = 1000) -> None:
+        """Replaces every stored summary with these totals (see rebuild_cohort_summaries)."""
+        with transaction.atomic():
+            CohortSummary.objects.all().delete()
+            CohortDriverCount.objects.all().delete()
+            CohortSummary.objects.bulk_create(
+                [
+                    CohortSummary(course=course, term=term, risk_level=risk_level, predictions=n,
+                                  probability_sum=probability_sum, probability_count=scored)
+                    for (course, term, risk_level), (n, probability_sum, scored) in self.cells.items()
+                ],
+                batch_size=batch_size,
+            )
+            CohortDriverCount.objects.bulk_create(
+                [
+                    CohortDriverCount(course=course, term=term, risk_level=risk_level, feature=feature, count=n)
+                    for (course, term, risk_level, feature), n in self.drivers.items()
+                ],
+                batch_size=batch_size,
+            )
+
+
+def record_prediction(history, metadata: Dict[str, Any]) -> None:
+    """Adds one saved PredictionHistory row to its cohort summary."""
+    totals = CohortTotals()
+    totals.add(history.course, term_of(history.created_at), metadata)
+    totals.save()
+
+
+# ===== Reads: precomputed rows only
+def terms() -> List[str]:
+    """Terms with summaries, newest first."""
+    return list(
+        CohortSummary.objects.order_by('-term').values_list('term', flat=True).distinct()
+    )
+
+
+def cohort_report(term: str, course: Optional[int] = None, risk_levels: Optional[Iterable[str]] = None,
+                  top_k: int = TOP_DRIVERS, display_names: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """
+    One entry per course in `term` (or just `course`): predictions per risk
+    level, the mean dropout probability (percent) and the `top_k` most
+    frequent risk drivers with their share of the predictions. With
+    `risk_levels`, only predictions at those levels are counted.
+    """
+    summaries = CohortSummary.objects.filter(term=term)
+    drivers = CohortDriverCount.objects.filter(term=term)
+    if course is not None:
+        summaries, drivers = summaries.filter(course=course), drivers.filter(course=course)
+    if risk_levels:
+        summaries, drivers = summaries.filter(risk_level__in=risk_levels), drivers.filter(risk_level__in=risk_levels)
+
+    cohorts: Dict[int, Dict[str, Any]] = {}
+    for row in summaries.values('course', 'risk_level', 'predictions', 'probability_sum', 'probability_count'):
+        cohort = cohorts.setdefault(row['course'], {
+            "course": row['course'], "term": term, "predictions": 0,
+            "by_risk_level": dict.fromkeys(RISK_LEVELS, 0), "_sum": 0.0, "_scored": 0, "drivers": [],
+        })
+        cohort["predictions"] += row['predictions']
+        cohort["by_risk_level"][row['risk_level']] = (
+            cohort["by_risk_level"].get(row['risk_level'], 0) + row['predictions'])
+        cohort["_sum"] += row['probability_sum']
+        cohort["_scored"] += row['probability_count']
+
+    ranked = drivers.values('course', 'feature').annotate(n=Sum('count')).order_by('course', '-n', 'feature')
+    for row in ranked:
+        cohort = cohorts.get(row['course'])
+        if cohort is not None and len(cohort["drivers"]) < top_k:
+            name = (display_names or {}).get(row['feature'], row['feature'])
+            cohort["drivers"].append({
+                "feature": row['feature'], "name": name, "count": row['n'],
+                "share": round(row['n'] / cohort["predictions"], 4) if cohort["predictions"] else 0.0,
+            })
+
+    report = []
+    for course_id in sorted(cohorts):
+        cohort = cohorts[course_id]
+        probability_sum, scored = cohort.pop("_sum"), cohort.pop("_scored")
+        cohort["mean_dropout_probability"] = round(probability_sum / scored, 2) if scored else None
+        report.append(cohort)
+    return report
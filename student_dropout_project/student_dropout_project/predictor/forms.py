@@ -498,7 +498,10 @@ class PredictionForm(forms.ModelForm):
 
     class Meta:
         model = PredictionHistory
-        exclude = ['user', 'created_at', 'prediction_result']
+        exclude = ['user', 'created_at', 'prediction_result', 'dropout_probability', 'risk_level',
+                   'risk_driver_codes', 'risk_driver_method', 'model_version',
+                   # Recorded by staff once known (admin); feeds export_outcomes and retraining
+                   'actual_outcome']
         widgets = {
             'previous_qualification_grade': forms.NumberInput(attrs={
                 'step': '0.01',
@@ -517,3 +520,15 @@ class PredictionForm(forms.ModelForm):
         for field in self.fields.values():
             css = field.widget.attrs.get('class', '')
             field.widget.attrs['class'] = (css + ' form-control').strip()
+
+
+# =========================
+#  Bulk Upload Form
+# =========================
+
+class BatchUploadForm(forms.Form):
+    csv_file = forms.FileField(
+        label="Cohort export (CSV)",
+        help_text="Semicolon-separated file with the same columns as data.csv.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,text/csv'}),
+    )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.services import PredictionService
+
+
+class Command(BaseCommand):
+    help = ("Points the model registry at a version (running services roll forward within "
+            "PREDICTOR_REGISTRY['REFRESH_SECONDS']), or lists the registered versions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('version', nargs='?', help="Version to serve, e.g. v0003")
+        parser.add_argument('--list', action='store_true', help="List versions with their metadata")
+
+    def handle(self, *args, **options):
+        registry = PredictionService._registry()
+        if registry is None:
+            raise CommandError("PREDICTOR_REGISTRY['ROOT'] is not configured")
+
+        if options['list'] or not options['version']:
+            current = registry.current()
+            versions = registry.versions()
+            if not versions:
+                self.stdout.write(f"No versions registered in {registry.root}")
+            for version in versions:
+                meta = registry.metadata(version)
+                accuracy = meta.get('metrics', {}).get('accuracy')
+                marker = '*' if version == current else ' '
+                self.stdout.write(
+                    f"{marker} {version}  {meta.get('created_at', '')}  {meta.get('model_class', '')}  "
+                    f"accuracy={accuracy if accuracy is not None else '-'}  "
+                    f"train={meta.get('training_seconds')}s  size={meta.get('size_bytes')}B  "
+                    f"load={meta.get('load_seconds')}s"
+                )
+            return
+
+        try:
+            # Validated against the service's input features before the pointer moves
+            registry.activate(options['version'], PredictionService._feature_columns)
+        except (FileNotFoundError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Registry now serves {options['version']}"))
@@ -0,0 +1,20 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from predictor.models import ApiToken
+
+
+class Command(BaseCommand):
+    help = ("Issues a bearer token for the JSON API (/api/predict/, /api/predict/batch/) to a user. "
+            "The token is printed once; only its digest is stored.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help="Label for the token, e.g. the integration using it")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}")
+        self.stdout.write(ApiToken.issue(user, options['name']))
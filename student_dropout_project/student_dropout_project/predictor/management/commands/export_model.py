@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from predictor.services import PredictionService
+
+
+class Command(BaseCommand):
+    help = "Converts the pickled model into a memory-mappable joblib artifact with a precompiled engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Artifact path (defaults to predictor/ml_models/*.joblib)")
+
+    def handle(self, *args, **options):
+        path = PredictionService.export_artifact(options.get('output'))
+        self.stdout.write(self.style.SUCCESS(f"Model artifact written to {path}"))
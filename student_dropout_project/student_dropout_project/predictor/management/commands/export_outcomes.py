@@ -0,0 +1,45 @@
+import csv
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from predictor.models import PredictionHistory
+from predictor.services import PredictionService  # noqa: F401 (puts src/ on sys.path)
+from data_loader import CSV_SCHEMA, TARGET_COLUMN, normalize_header
+
+
+class Command(BaseCommand):
+    help = ("Exports predictions whose true outcome is known as a data.csv-layout file, "
+            "ready for 'python src/train_model.py --incremental <file>'.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', required=True, help="CSV path to write")
+        parser.add_argument('--since', help="Only rows created on/after this date (YYYY-MM-DD or ISO datetime)")
+
+    def handle(self, *args, **options):
+        headers = list(CSV_SCHEMA)
+        fields = [normalize_header(header) for header in headers]
+
+        rows = PredictionHistory.objects.filter(actual_outcome__isnull=False).exclude(actual_outcome='')
+        if options.get('since'):
+            since = parse_datetime(options['since'])
+            if since is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError(f"Invalid --since value: {options['since']}")
+                since = datetime.combine(day, time.min)
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+            rows = rows.filter(created_at__gte=since)
+
+        count = 0
+        with open(options['output'], 'w', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(headers + [TARGET_COLUMN])
+            for values in rows.order_by('id').values_list(*fields, 'actual_outcome').iterator(chunk_size=2000):
+                writer.writerow(values)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Exported {count} labelled rows to {options['output']}"))
@@ -0,0 +1,60 @@
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from predictor.cohorts import CohortTotals, term_of
+from predictor.models import PredictionHistory
+from predictor.services import PredictionService
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the cohort summaries from the whole PredictionHistory table, using the risk "
+            "metadata stored on each row. Rows saved before it was stored are scored in batches with "
+            "the current model (run 'rescore_stale' to store it). Summaries are otherwise updated as "
+            "predictions are saved; run this after bulk imports outside the app.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows scored per predict_batch call")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        features = PredictionService._feature_columns
+        totals = CohortTotals()
+        stored = 0
+
+        rows = PredictionHistory.objects.order_by('id').values_list(
+            'course', 'created_at', 'risk_level', 'dropout_probability', 'risk_driver_codes', 'risk_driver_method')
+        for course, created_at, risk_level, probability, driver_codes, driver_method in rows.iterator(
+                chunk_size=chunk_size):
+            if risk_level is None:
+                continue
+            totals.add(course, term_of(created_at), {
+                "risk_level": risk_level,
+                "dropout_probability": probability,
+                "risk_driver_codes": driver_codes.split(',') if driver_codes else [],
+                "risk_driver_method": driver_method,
+            })
+            stored += 1
+
+        unscored = PredictionHistory.objects.filter(risk_level__isnull=True).order_by('id')
+        chunk = []
+        for values in unscored.values_list(*features, 'created_at').iterator(chunk_size=chunk_size):
+            chunk.append(values)
+            if len(chunk) == chunk_size:
+                self._score(chunk, totals)
+                chunk = []
+        if chunk:
+            self._score(chunk, totals)
+
+        totals.replace()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt cohort summaries from {len(totals)} predictions ({len(totals.cells)} cohort cells, "
+            f"{len(totals) - stored} scored without stored metadata)"
+        ))
+
+    @staticmethod
+    def _score(chunk, totals):
+        X = np.array([values[:-1] for values in chunk], dtype=np.float64)
+        results = PredictionService.predict_batch(X)
+        course_column = PredictionService._schema.index['course']
+        for values, course, (_, metadata) in zip(chunk, X[:, course_column].tolist(), results):
+            totals.add(course, term_of(values[-1]), metadata)
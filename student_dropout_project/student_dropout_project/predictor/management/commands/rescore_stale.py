@@ -0,0 +1,51 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from predictor.models import PredictionHistory
+from predictor.services import PredictionService
+
+SCORING_FIELDS = ('prediction_result', 'dropout_probability', 'risk_level', 'risk_driver_codes',
+                  'risk_driver_method', 'model_version')
+
+
+class Command(BaseCommand):
+    help = ("Re-scores the PredictionHistory rows scored by another model version (or saved before risk "
+            "metadata or its driver method was stored) with the model currently served, then rebuilds the "
+            "cohort summaries. Also fills in TreeSHAP drivers for rows that got rule-based ones because "
+            "their upload exceeded the attribution budget; run it after bulk uploads (e.g. nightly).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows scored per predict_batch call")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the stale rows")
+        parser.add_argument('--skip-summaries', action='store_true', help="Do not rebuild the cohort summaries")
+
+    def handle(self, *args, **options):
+        bundle, _ = PredictionService._snapshot()
+        # ~Q() also matches rows with no version (NULL)
+        stale_q = ~Q(model_version=bundle.version) | Q(risk_driver_method__isnull=True)
+        if bundle.attribution is not None:
+            # Rows scored over the attribution budget of predict_batch
+            stale_q |= Q(risk_driver_method='rules')
+        stale = PredictionHistory.objects.filter(stale_q)
+        if options['dry_run']:
+            self.stdout.write(f"{stale.count()} rows not scored by model version {bundle.version}")
+            return
+
+        features = PredictionService._feature_columns
+        chunk_size = options['chunk_size']
+        last_pk, count = 0, 0
+        while True:
+            # Keyset over the primary key: rescored rows drop out of `stale`, so no offsets
+            rows = list(stale.filter(pk__gt=last_pk).order_by('pk').only('pk', *features)[:chunk_size])
+            if not rows:
+                break
+            for history, (label, metadata) in zip(rows, PredictionService.predict_batch(rows, explain_all=True)):
+                history.apply_scoring(label, metadata)
+            PredictionHistory.objects.bulk_update(rows, SCORING_FIELDS, batch_size=500)
+            count += len(rows)
+            last_pk = rows[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Re-scored {count} rows with model version {bundle.version}"))
+        if count and not options['skip_summaries']:
+            call_command('rebuild_cohort_summaries', chunk_size=chunk_size, stdout=self.stdout)
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.1 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='predictionhistory',
+            index=models.Index(fields=['user', 'created_at'], name='history_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='predictionhistory',
+            index=models.Index(fields=['prediction_result', 'created_at'], name='history_result_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0002_prediction_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='actual_outcome',
+            field=models.CharField(blank=True, choices=[('Dropout', 'Dropout'), ('Enrolled', 'Enrolled'), ('Graduate', 'Graduate')], max_length=20, null=True),
+        ),
+    ]
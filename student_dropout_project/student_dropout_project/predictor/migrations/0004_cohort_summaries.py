@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0003_prediction_history_actual_outcome'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortDriverCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.IntegerField()),
+                ('term', models.CharField(max_length=7)),
+                ('risk_level', models.CharField(max_length=20)),
+                ('feature', models.CharField(max_length=64)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CohortSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course', models.IntegerField()),
+                ('term', models.CharField(max_length=7)),
+                ('risk_level', models.CharField(max_length=20)),
+                ('predictions', models.PositiveIntegerField(default=0)),
+                ('probability_sum', models.FloatField(default=0.0)),
+                ('probability_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'course'], name='cohort_summary_term_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cohortsummary',
+            constraint=models.UniqueConstraint(fields=('course', 'term', 'risk_level'), name='cohort_summary_cell_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='cohortdrivercount',
+            index=models.Index(fields=['term', 'course'], name='cohort_driver_term_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cohortdrivercount',
+            constraint=models.UniqueConstraint(fields=('course', 'term', 'risk_level', 'feature'), name='cohort_driver_cell_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('predictor', '0006_api_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='predictionhistory',
+            name='risk_driver_method',
+            field=models.CharField(blank=True, choices=[('attribution', 'TreeSHAP attribution'), ('rules', 'Rule-based flags')], max_length=20, null=True),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import hashlib
+import secrets
+
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -10,6 +13,40 @@ class UserProfile(models.Model):
         return self.user.username
 
 
+class ApiToken(models.Model):
+    """
+    Bearer token for the JSON API (integrations such as the SIS), sent as
+    "Authorization: Bearer <token>". Only the token's SHA-256 digest is
+    stored; the token itself is shown once, by 'manage.py create_api_token'.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @staticmethod
+    def digest_of(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user: User, name: str = '') -> str:
+        """Creates a token for `user` and returns it (it cannot be recovered later)."""
+        token = secrets.token_urlsafe(32)
+        cls.objects.create(user=user, name=name, digest=cls.digest_of(token))
+        return token
+
+    @classmethod
+    def authenticate(cls, token: str):
+        """The active user owning `token`, or None."""
+        api_token = cls.objects.select_related('user').filter(digest=cls.digest_of(token)).first()
+        if api_token is None or not api_token.user.is_active:
+            return None
+        return api_token.user
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name or 'token'}"
+
+
 class PredictionHistory(models.Model):
     TARGET_CHOICES = [
         ('Dropout', 'Dropout'),
@@ -57,7 +94,112 @@ class PredictionHistory(models.Model):
     inflation_rate = models.FloatField()
     gdp = models.FloatField()
 
+    RISK_LEVEL_CHOICES = [
+        ('Low', 'Low'),
+        ('Moderate', 'Moderate'),
+        ('High', 'High'),
+        ('Critical', 'Critical'),
+    ]
+    DRIVER_METHOD_CHOICES = [
+        ('attribution', 'TreeSHAP attribution'),
+        ('rules', 'Rule-based flags'),
+    ]
+
     prediction_result = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    # Scoring metadata as returned by PredictionService; null on rows saved before it was kept
+    dropout_probability = models.FloatField(null=True, blank=True)
+    risk_level = models.CharField(max_length=10, choices=RISK_LEVEL_CHOICES, null=True, blank=True)
+    # Comma-separated feature names of the risk drivers, strongest first
+    risk_driver_codes = models.CharField(max_length=255, blank=True, default='')
+    # How the drivers were found; only attribution codes are counted in the cohort summaries
+    risk_driver_method = models.CharField(max_length=20, choices=DRIVER_METHOD_CHOICES, null=True, blank=True)
+    # Bundle version that scored the row; rows of other versions are re-scored by rescore_stale
+    model_version = models.CharField(max_length=64, null=True, blank=True)
+    # True outcome, recorded once known; labelled rows feed incremental retraining
+    actual_outcome = models.CharField(max_length=20, choices=TARGET_CHOICES, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # History pages: WHERE user = ? ORDER BY created_at DESC (keyset pagination)
+            models.Index(fields=['user', 'created_at'], name='history_user_created_idx'),
+            # Admin filters / reports by outcome over time
+            models.Index(fields=['prediction_result', 'created_at'], name='history_result_created_idx'),
+            # Worklists: a counselor's students at one risk level, newest first
+            models.Index(fields=['user', 'risk_level', 'created_at'], name='history_user_risk_idx'),
+            # Everyone at a risk level, most likely dropouts first (admin filters, reports)
+            models.Index(fields=['risk_level', '-dropout_probability'], name='history_risk_prob_idx'),
+            # rescore_stale: rows scored by another model version
+            models.Index(fields=['model_version'], name='history_model_version_idx'),
+        ]
+
+    @property
+    def risk_drivers(self):
+        """Feature names of the stored risk drivers."""
+        return self.risk_driver_codes.split(',') if self.risk_driver_codes else []
+
+    def apply_scoring(self, label, metadata):
+        """Sets the prediction and its metadata from a PredictionService result."""
+        self.prediction_result = label
+        self.dropout_probability = metadata.get("dropout_probability")
+        self.risk_level = metadata.get("risk_level")
+        self.risk_driver_codes = ','.join(metadata.get("risk_driver_codes", ()))
+        self.risk_driver_method = metadata.get("risk_driver_method")
+        self.model_version = metadata.get("model_version")
 
     def __str__(self):
         return f"{self.user.username} - {self.prediction_result} - {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class CohortSummary(models.Model):
+    """
+    Running totals of the predictions saved for one (course, term, risk level)
+    cell, kept up to date as predictions are saved (see predictor/cohorts.py),
+    so cohort dashboards never scan or re-score PredictionHistory.
+    """
+    course = models.IntegerField()
+    # First month of the academic term the predictions were made in, "YYYY-MM"
+    term = models.CharField(max_length=7)
+    risk_level = models.CharField(max_length=20)
+
+    predictions = models.PositiveIntegerField(default=0)
+    # Sum and count of dropout probabilities (percent); mean = sum / count
+    probability_sum = models.FloatField(default=0.0)
+    probability_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'term', 'risk_level'], name='cohort_summary_cell_uniq'),
+        ]
+        indexes = [
+            # Dashboards: every course in a term
+            models.Index(fields=['term', 'course'], name='cohort_summary_term_idx'),
+        ]
+
+    @property
+    def mean_dropout_probability(self):
+        return self.probability_sum / self.probability_count if self.probability_count else None
+
+    def __str__(self):
+        return f"{self.course} {self.term} {self.risk_level}: {self.predictions}"
+
+
+class CohortDriverCount(models.Model):
+    """How often a feature was among the risk drivers of a cohort cell's predictions."""
+    course = models.IntegerField()
+    term = models.CharField(max_length=7)
+    risk_level = models.CharField(max_length=20)
+    feature = models.CharField(max_length=64)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'term', 'risk_level', 'feature'],
+                                    name='cohort_driver_cell_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['term', 'course'], name='cohort_driver_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course} {self.term} {self.risk_level} {self.feature}: {self.count}"
@@ -1,98 +1,494 @@
 import os
+import sys
+import time
+import copy
 import pickle
+import logging
+import threading
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
 from django.conf import settings
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Tuple, List, Union, Optional, Callable
+
+# Shared ML code (inference engine, training utilities) lives in the repository's src/
+ML_SRC_DIR = os.path.join(settings.BASE_DIR.parent.parent, 'src')
+if ML_SRC_DIR not in sys.path:
+    sys.path.append(ML_SRC_DIR)
+
+from bundle import ModelBundle
+from attribution import class_output
+from feature_schema import FEATURE_SCHEMA, FeatureSchema
+from registry import ModelRegistry
+from .cache import PredictionCache
+from .batching import MicroBatcher
+
+# Records are mappings (JSON, form cleaned_data) or objects with feature attributes (PredictionHistory)
+BatchInput = Union[List[Any], pd.DataFrame, np.ndarray]
+
+logger = logging.getLogger(__name__)
+
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process (0 where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
 
 class PredictionService:
     _model = None
-    _feature_columns = [
-        "marital_status", "application_mode", "application_order", "course",
-        "daytime_evening_attendance", "previous_qualification", "previous_qualification_grade",
-        "nacionality", "mother_s_qualification", "father_s_qualification",
-        "mother_s_occupation", "father_s_occupation", "admission_grade", "displaced",
-        "educational_special_needs", "debtor", "tuition_fees_up_to_date", "gender",
-        "scholarship_holder", "age_at_enrollment", "international",
-        "curricular_units_1st_sem_credited", "curricular_units_1st_sem_enrolled",
-        "curricular_units_1st_sem_evaluations", "curricular_units_1st_sem_approved",
-        "curricular_units_1st_sem_grade", "curricular_units_1st_sem_without_evaluations",
-        "curricular_units_2nd_sem_credited", "curricular_units_2nd_sem_enrolled",
-        "curricular_units_2nd_sem_evaluations", "curricular_units_2nd_sem_approved",
-        "curricular_units_2nd_sem_grade", "curricular_units_2nd_sem_without_evaluations",
-        "unemployment_rate", "inflation_rate", "gdp"
+    # (bundle, column order) replaced in one assignment, so a request never mixes
+    # one version's model, engine or labels with another's during a roll-forward
+    _active: Tuple[Optional[ModelBundle], Optional[np.ndarray]] = (None, None)
+    _cache = None
+    _batcher = None
+    model_version: Optional[str] = None
+    registry_version: Optional[str] = None
+    _pinned_version: Optional[str] = None
+    _next_registry_check = 0.0
+    _load_lock = threading.Lock()
+    load_stats: Dict[str, Any] = {}
+
+    # Optional callback(stage_name, seconds) for benchmarks (see benchmarks/replay.py)
+    stage_hook: Optional[Callable[[str, float], None]] = None
+
+    _model_dir = os.path.join(settings.BASE_DIR, 'predictor', 'ml_models')
+    # Model bundle (see src/bundle.py), uncompressed: numpy arrays inside can be memory-mapped
+    # and shared through the page cache by every worker process on the host
+    _artifact_path = os.path.join(_model_dir, 'best_student_dropout_model.joblib')
+    _pickle_path = os.path.join(_model_dir, 'best_student_dropout_model.pkl')
+
+    # The compiled engine wins on small batches; sklearn's Cython loop wins on large ones.
+    # Both produce identical probabilities, so this is purely a latency trade-off.
+    _engine_max_rows = getattr(settings, 'PREDICTOR_ENGINE_MAX_ROWS', 256)
+
+    # Risk drivers per student: TreeSHAP while a batch fits the work budget (see
+    # PREDICTOR_ATTRIBUTION in settings), the rule-based flags above it
+    _attribution_config = getattr(settings, 'PREDICTOR_ATTRIBUTION', {})
+    _attribution_top_k = _attribution_config.get('TOP_K', 3)
+    _attribution_max_work = _attribution_config.get('MAX_WORK', 20_000_000)
+    _attribution_max_rows = _attribution_config.get('MAX_ROWS')
+
+    # Input layout shared with training (src/feature_schema.py): column index maps
+    # for every source, precomputed once instead of per request
+    _schema: FeatureSchema = FEATURE_SCHEMA
+    _feature_columns = list(FEATURE_SCHEMA.features)
+
+    # Rule-based risk drivers: (feature, value that signals risk, display label). Also the
+    # display labels of these features when attributions name them as drivers
+    _risk_driver_rules = [
+        ("tuition_fees_up_to_date", 0, "Tuition Fees Unpaid"),
+        ("scholarship_holder", 0, "No Scholarship Support"),
+        ("debtor", 1, "Existing Debtor"),
     ]
-    
-    _target_map = {
-        0: 'Dropout',
-        1: 'Enrolled',
-        2: 'Graduate'
-    }
+
+    @classmethod
+    @contextmanager
+    def _stage(cls, name: str):
+        hook = cls.stage_hook
+        if hook is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            hook(name, time.perf_counter() - start)
+
+    @classmethod
+    def preload(cls) -> Dict[str, Any]:
+        """Eagerly loads the model at server startup (see apps.preload_model) and returns load stats."""
+        cls._load_model()
+        return cls.load_stats
 
     @classmethod
     def _load_model(cls):
-        """Lazy loading of the ML model to ensure efficient resource usage."""
+        """Loads the model once per process; concurrent first requests wait on a lock."""
         if cls._model is None:
-            model_path = os.path.join(
-                settings.BASE_DIR,
-                'predictor',
-                'ml_models',
-                'best_student_dropout_model.pkl'
-            )
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"ML Model not found at {model_path}")
-                
-            with open(model_path, 'rb') as f:
-                cls._model = pickle.load(f)
+            with cls._load_lock:
+                if cls._model is None:
+                    cls._load_artifact()
+        elif cls._next_registry_check and time.monotonic() >= cls._next_registry_check:
+            cls._roll_forward()
         return cls._model
 
     @classmethod
-    def predict(cls, input_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    def _snapshot(cls) -> Tuple[ModelBundle, Optional[np.ndarray]]:
+        cls._load_model()
+        return cls._active
+
+    # ===== Model registry (see src/registry.py and settings.PREDICTOR_REGISTRY)
+    @staticmethod
+    def _registry() -> Optional[ModelRegistry]:
+        root = getattr(settings, 'PREDICTOR_REGISTRY', {}).get('ROOT')
+        return ModelRegistry(str(root)) if root else None
+
+    @classmethod
+    def _registry_target(cls) -> Optional[str]:
+        """Registry version to serve: a pin, else the registry's CURRENT pointer, else None."""
+        registry = cls._registry()
+        if registry is None:
+            return None
+        pinned = cls._pinned_version or settings.PREDICTOR_REGISTRY.get('PIN')
+        return pinned or registry.current()
+
+    @classmethod
+    def _schedule_registry_check(cls):
+        refresh = getattr(settings, 'PREDICTOR_REGISTRY', {}).get('REFRESH_SECONDS')
+        cls._next_registry_check = time.monotonic() + refresh if refresh and cls._registry() else 0.0
+
+    @classmethod
+    def _roll_forward(cls):
+        """
+        Follows the registry pointer without a restart. Only one thread checks;
+        the others keep serving the current model instead of waiting for the load.
+        """
+        if not cls._load_lock.acquire(blocking=False):
+            return
+        try:
+            cls._schedule_registry_check()
+            target = cls._registry_target()
+            if target != cls.registry_version:
+                try:
+                    cls._load_artifact()
+                except Exception:
+                    logger.exception("Could not load model version %s; still serving %s",
+                                     target, cls.registry_version or cls.model_version)
+        finally:
+            cls._load_lock.release()
+
+    @classmethod
+    def pin(cls, version: str) -> Dict[str, Any]:
+        """Serves registry `version` in this process until unpin(), whatever CURRENT says."""
+        registry = cls._registry()
+        if registry is None:
+            raise ValueError("PREDICTOR_REGISTRY['ROOT'] is not configured")
+        if version not in registry.versions():
+            raise FileNotFoundError(f"Model version {version} not found in {registry.versions_dir}")
+        with cls._load_lock:
+            previous, cls._pinned_version = cls._pinned_version, version
+            try:
+                cls._load_artifact()
+            except Exception:
+                cls._pinned_version = previous
+                raise
+        return cls.load_stats
+
+    @classmethod
+    def unpin(cls) -> Dict[str, Any]:
+        """Goes back to following the registry's CURRENT pointer (or settings PIN)."""
+        with cls._load_lock:
+            cls._pinned_version = None
+            cls._load_artifact()
+        return cls.load_stats
+
+    @classmethod
+    def _bundle_is_current(cls) -> bool:
+        """
+        Whether to serve the exported bundle rather than the .pkl: it exists and
+        is at least as new. A .pkl replaced after the last export wins, loudly.
         """
-        Performs inference on the input data.
+        if not os.path.exists(cls._artifact_path):
+            return False
+        if os.path.exists(cls._pickle_path) and \
+                os.path.getmtime(cls._pickle_path) > os.path.getmtime(cls._artifact_path):
+            logger.warning(
+                "%s is newer than the exported bundle %s; serving the .pkl. Run 'manage.py export_model' "
+                "to refresh the bundle", cls._pickle_path, cls._artifact_path
+            )
+            return False
+        return True
+
+    @classmethod
+    def _load_artifact(cls):
+        rss_before = _resident_bytes()
+        start = time.perf_counter()
+
+        # Bundles are validated against the service's input features here, so a
+        # mismatched model fails at startup (BundleSchemaError), not per request
+        registry_version = cls._registry_target()
+        if registry_version is not None:
+            registry = cls._registry()
+            bundle, _ = registry.load(registry_version, cls._feature_columns)
+            path = registry.bundle_path(registry_version)
+        elif cls._bundle_is_current():
+            bundle, path = ModelBundle.load(cls._artifact_path, cls._feature_columns), cls._artifact_path
+        elif os.path.exists(cls._pickle_path):
+            logger.warning(
+                "Loading %s with pickle; run 'manage.py export_model' to create a shareable bundle",
+                cls._pickle_path
+            )
+            with open(cls._pickle_path, 'rb') as f:
+                bundle, path = ModelBundle.from_model(pickle.load(f)), cls._pickle_path
+            bundle.validate(cls._feature_columns)
+        else:
+            raise FileNotFoundError(f"ML Model not found at {cls._pickle_path}")
+
+        # Inputs arrive in _feature_columns order; reorder only if the model was fitted otherwise
+        order = None
+        if bundle.features != cls._feature_columns:
+            order = np.array([cls._schema.index[name] for name in bundle.features])
+        engine = bundle.engine
+        # Build the attribution path tables now rather than in the first request
+        attribution = bundle.attribution
+        cls._active = (bundle, order)
+        # Cached results are keyed on the model version, so a new model never sees stale entries
+        cls.model_version = bundle.version
+        cls.registry_version = registry_version
+        if cls._cache is not None:
+            cls._cache.clear()
+        cls._model = bundle.model
+        cls._schedule_registry_check()
+        cls.load_stats = {
+            "path": path,
+            "model_version": cls.model_version,
+            "registry_version": registry_version,
+            "memory_mapped": path != cls._pickle_path,
+            "load_seconds": round(time.perf_counter() - start, 4),
+            "resident_bytes_delta": _resident_bytes() - rss_before,
+            "engine_bytes": engine.nbytes if engine is not None else 0,
+            "attribution": attribution is not None,
+        }
+        logger.info("Prediction model loaded: %s", cls.load_stats)
+
+    @classmethod
+    def export_artifact(cls, output_path: Optional[str] = None) -> str:
+        """
+        Converts the pickled model into a memory-mappable model bundle,
+        compiling the inference engine ahead of time.
+        """
+        output_path = output_path or cls._artifact_path
+        with open(cls._pickle_path, 'rb') as f:
+            bundle = ModelBundle.from_model(pickle.load(f))
+        bundle.validate(cls._feature_columns)
+        return bundle.save(output_path)
+
+    @classmethod
+    def _get_cache(cls) -> Optional[PredictionCache]:
+        """Result cache configured by settings.PREDICTOR_CACHE; None when disabled."""
+        if cls._cache is None:
+            config = getattr(settings, 'PREDICTOR_CACHE', {})
+            backend = config.get('BACKEND', 'local')
+            if not backend:
+                return None
+            cls._cache = PredictionCache(
+                backend=backend,
+                max_entries=config.get('MAX_ENTRIES', 4096),
+                ttl=config.get('TTL', 600),
+                alias=config.get('ALIAS', 'default'),
+            )
+        return cls._cache
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        cache = cls._get_cache()
+        return cache.stats() if cache is not None else {}
+
+    @classmethod
+    def _get_batcher(cls) -> MicroBatcher:
+        """Micro-batcher configured by settings.PREDICTOR_MICRO_BATCH, created on first use."""
+        if cls._batcher is None:
+            with cls._load_lock:
+                if cls._batcher is None:
+                    config = getattr(settings, 'PREDICTOR_MICRO_BATCH', {})
+                    cls._batcher = MicroBatcher(
+                        cls.predict_batch,
+                        max_batch_size=config.get('MAX_BATCH_SIZE', 64),
+                        max_wait_ms=config.get('MAX_WAIT_MS', 2.0),
+                        max_queue=config.get('MAX_QUEUE', 1024),
+                    )
+        return cls._batcher
+
+    @classmethod
+    def batcher_stats(cls) -> Dict[str, Any]:
+        return cls._batcher.stats() if cls._batcher is not None else {}
+
+    @classmethod
+    def predict(cls, input_data: Any) -> Tuple[str, Dict[str, Any]]:
+        """
+        Performs inference on the input data: a mapping of feature values (JSON,
+        form cleaned_data) or an object carrying them as attributes, such as an
+        unsaved PredictionHistory.
         Returns: (Predicted Label, Metadata dict with probabilities and risk factors)
         """
-        model = cls._load_model()
-        
-        # Ensure input DataFrame respects the training feature order
-        df = pd.DataFrame([input_data])
-        df = df[cls._feature_columns]
-
-        # 1. Prediction
-        raw_pred = model.predict(df)[0]
-        label = cls._target_map.get(raw_pred, "Unknown")
-
-        # 2. Probability & Risk Scoring
-        # Random Forest usually supports predict_proba
-        metadata = {"risk_score": 0.0, "risk_level": "Low"}
-        
-        if hasattr(model, "predict_proba"):
-            probs = model.predict_proba(df)[0] # Array of [prob_dropout, prob_enrolled, prob_graduate]
-            
-            # Assuming Index 0 is 'Dropout' (standard sklearn behavior for sorted classes 0,1,2)
-            dropout_prob = probs[0]
-            
-            metadata["dropout_probability"] = round(dropout_prob * 100, 2)
-            
-            if dropout_prob > 0.7:
-                metadata["risk_level"] = "Critical"
-            elif dropout_prob > 0.4:
-                metadata["risk_level"] = "High"
-            elif dropout_prob > 0.2:
-                metadata["risk_level"] = "Moderate"
+        # Scored before this call returns, so the thread's row buffer can be reused
+        return cls._predict_one(input_data, lambda row: cls.predict_batch(row[np.newaxis, :])[0],
+                                out=cls._schema.row_buffer())
+
+    @classmethod
+    def predict_coalesced(cls, input_data: Any) -> Tuple[str, Dict[str, Any]]:
+        """
+        Same as predict(), but concurrent callers are coalesced by the micro-batcher
+        into one vectorized pass. Raises BatcherOverloaded when the queue is full.
+        """
+        return cls._predict_one(input_data, cls._get_batcher().submit)
+
+    @classmethod
+    def _predict_one(cls, input_data: Any, score_row, out: Optional[np.ndarray] = None) -> Tuple[str, Dict[str, Any]]:
+        # Converting here means a malformed record fails for its own caller only
+        with cls._stage("frame_build"):
+            row = cls._schema.row(input_data, out)
+        # Checked before the row can join a coalesced batch, where it would fail everyone's predictions
+        missing = ~np.isfinite(row)
+        if missing.any():
+            names = [cls._feature_columns[i] for i in np.flatnonzero(missing)]
+            raise ValueError(f"Missing or non-numeric values for {', '.join(names)}")
+        cache = cls._get_cache()
+        if cache is None:
+            return score_row(row)
+
+        cls._load_model()
+        key = PredictionCache.make_key(row, cls.model_version)
+        result = cache.get(key)
+        if result is None:
+            result = score_row(row)
+            cache.set(key, result)
+        # Callers may annotate the metadata, never hand out the cached object itself
+        return copy.deepcopy(result)
+
+    @classmethod
+    def predict_batch(cls, records: BatchInput, explain_all: bool = False) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Scores many students with a single predict_proba pass over the model.
+
+        `records` may be a list of dicts (or PredictionHistory-like objects), a
+        DataFrame with snake_case or data.csv columns, or a 2-D numpy array whose
+        columns follow `_feature_columns`. Bulk scoring bypasses the result cache so a
+        term-start run does not evict the counselors' working set. Batches larger
+        than `_attribution_row_limit` get rule-based drivers (risk_driver_method
+        "rules") unless `explain_all` is set, as offline commands do.
+        Returns one (Predicted Label, Metadata dict) tuple per row, in input order.
+        """
+        bundle, order = cls._snapshot()
+        model, engine = bundle.model, bundle.engine
+        with cls._stage("frame_build"):
+            X = cls._to_matrix(records)
+        if X.shape[0] == 0:
+            return []
+        X_model = X[:, order] if order is not None else X
+
+        # 1. Prediction & Probability (one pass over the ensemble; labels are its argmax)
+        with cls._stage("predict_proba"):
+            class_labels = np.asarray(bundle.labels, dtype=object)
+            if engine is not None and X.shape[0] <= cls._engine_max_rows:
+                probs = engine.predict_proba(X_model)
+                labels = class_labels[np.argmax(probs, axis=1)]
+            else:
+                # Keep the column names the model was fitted with, so sklearn does not warn
+                frame = bundle.frame(X_model)
+                if hasattr(model, "predict_proba"):
+                    probs = model.predict_proba(frame)
+                    labels = class_labels[np.argmax(probs, axis=1)]
+                else:
+                    probs = None
+                    labels = bundle.decode(model.predict(frame))
+
+        # 2. Risk Scoring
+        with cls._stage("risk_scoring"):
+            risk_levels = np.full(X.shape[0], "Low", dtype=object)
+            dropout_probs = None
+            if probs is not None:
+                dropout_idx = cls._dropout_index(bundle)
+                dropout_probs = np.round(probs[:, dropout_idx] * 100, 2)
+                risk_levels = cls._risk_levels(probs[:, dropout_idx])
+
+        # 3. Explainability: the features pushing this student's dropout risk up the most
+        with cls._stage("drivers"):
+            if bundle.attribution is not None and (explain_all or X.shape[0] <= cls._attribution_row_limit(bundle)):
+                drivers, driver_method = cls._attributed_drivers(bundle, X_model), "attribution"
             else:
-                metadata["risk_level"] = "Low"
-
-        # 3. Basic "Explainability" (Top Drivers)
-        # Identify key negative indicators based on domain knowledge (heuristic fallback if SHAP is absent)
-        risk_drivers = []
-        if input_data.get('tuition_fees_up_to_date') == 0:
-            risk_drivers.append("Tuition Fees Unpaid")
-        if input_data.get('scholarship_holder') == 0:
-            risk_drivers.append("No Scholarship Support")
-        if input_data.get('debtor') == 1:
-            risk_drivers.append("Existing Debtor")
-            
-        metadata["risk_drivers"] = risk_drivers
-
-        return label, metadata
+                drivers, driver_method = cls._flagged_drivers(X), "rules"
+
+        results = []
+        for i, label in enumerate(labels):
+            metadata = {"risk_score": 0.0, "risk_level": risk_levels[i]}
+            if dropout_probs is not None:
+                metadata["dropout_probability"] = float(dropout_probs[i])
+            metadata["risk_drivers"] = [label for _, label in drivers[i]]
+            # Feature names of the drivers, for aggregation (see predictor/cohorts.py)
+            metadata["risk_driver_codes"] = [feature for feature, _ in drivers[i]]
+            # "attribution" (TreeSHAP) or "rules" (models without attributions); the two never mix
+            metadata["risk_driver_method"] = driver_method
+            metadata["model_version"] = bundle.version
+            results.append((label, metadata))
+        return results
+
+    @classmethod
+    def _to_matrix(cls, records: BatchInput) -> np.ndarray:
+        """Converts any supported batch input into an (n_rows, n_features) float matrix."""
+        if isinstance(records, pd.DataFrame):
+            return cls._schema.from_frame(records)
+
+        if isinstance(records, np.ndarray):
+            X = np.asarray(records, dtype=np.float64)
+            if X.ndim != 2 or X.shape[1] != len(cls._feature_columns):
+                raise ValueError(
+                    f"Expected a 2-D array with {len(cls._feature_columns)} columns, got shape {X.shape}"
+                )
+            return X
+
+        return cls._schema.matrix(records)
+
+    @staticmethod
+    def _dropout_index(bundle: ModelBundle) -> int:
+        return bundle.labels.index('Dropout') if 'Dropout' in bundle.labels else 0
+
+    @staticmethod
+    def _risk_levels(dropout_probs: np.ndarray) -> np.ndarray:
+        return np.select(
+            [dropout_probs > 0.7, dropout_probs > 0.4, dropout_probs > 0.2],
+            ["Critical", "High", "Moderate"],
+            default="Low"
+        ).astype(object)
+
+    @classmethod
+    def _attribution_row_limit(cls, bundle: ModelBundle) -> int:
+        """
+        Largest batch explained with TreeSHAP for this model: MAX_WORK over the
+        per-row path cost, capped at MAX_ROWS. At least 1, so a single
+        prediction is always explained; 0 for models without attributions.
+        """
+        if bundle.attribution is None:
+            return 0
+        output, _ = class_output(bundle.engine, cls._dropout_index(bundle))
+        limit = max(1, cls._attribution_max_work // max(1, bundle.attribution.row_cost(output)))
+        if cls._attribution_max_rows is not None:
+            limit = min(limit, max(1, cls._attribution_max_rows))
+        return limit
+
+    @classmethod
+    def _attributed_drivers(cls, bundle: ModelBundle, X_model: np.ndarray) -> List[List[Tuple[str, str]]]:
+        """
+        Top (feature, label) pairs by TreeSHAP contribution towards 'Dropout',
+        keeping only the features that raise it.
+        """
+        output, direction = class_output(bundle.engine, cls._dropout_index(bundle))
+        phi, top = bundle.attribution.explain(X_model, output, cls._attribution_top_k, direction)
+        rule_labels = {(feature, value): label for feature, value, label in cls._risk_driver_rules}
+        drivers = []
+        for i, row in enumerate(top.tolist()):
+            labels = []
+            for j in row:
+                if direction * phi[i, j] <= 0:
+                    break
+                feature, value = bundle.features[j], X_model[i, j]
+                labels.append((feature, rule_labels.get((feature, value)) or
+                               f"{cls._schema.display_names.get(feature, feature)}: {value:g}"))
+            drivers.append(labels)
+        return drivers
+
+    @classmethod
+    def _flagged_drivers(cls, X: np.ndarray) -> List[List[Tuple[str, str]]]:
+        # Identify key negative indicators based on domain knowledge (fallback for models
+        # without attributions)
+        flags = [
+            (X[:, cls._schema.index[feature]] == value, (feature, label))
+            for feature, value, label in cls._risk_driver_rules
+        ]
+        return [
+            [driver for mask, driver in flags if mask[i]]
+            for i in range(X.shape[0])
+        ]
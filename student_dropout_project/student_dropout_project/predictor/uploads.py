@@ -0,0 +1,58 @@
+from collections import Counter
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
+from .cohorts import CohortTotals, term_of
+from .models import PredictionHistory
+from .services import PredictionService
+
+
+def score_csv_upload(uploaded_file, user, chunk_size: int = 1000, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Scores a semicolon-separated cohort export (data.csv layout) and saves every
+    row to the user's PredictionHistory.
+
+    The file is parsed chunk by chunk, each chunk is scored with a single
+    predict_batch call and written with bulk_create, all inside one transaction:
+    either the whole cohort is saved or nothing is. The cohort summaries are
+    updated in the same transaction, once for the whole file.
+    Raises ValueError if required columns are missing or values are not numeric.
+    """
+    schema = PredictionService._schema
+    counts: Counter = Counter()
+    skipped = 0
+    positions = None
+    totals = CohortTotals()
+    term = term_of(timezone.now())
+    course_column = schema.index['course']
+
+    reader = pd.read_csv(uploaded_file, sep=';', encoding='utf-8-sig', chunksize=chunk_size)
+    with transaction.atomic():
+        for chunk in reader:
+            # Header positions are resolved once per file, not renamed per chunk
+            if positions is None:
+                positions = schema.positions(chunk.columns)
+            X = chunk.iloc[:, positions].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+            complete = np.isfinite(X).all(axis=1)
+            skipped += int((~complete).sum())
+            X = X[complete]
+            if not len(X):
+                continue
+
+            results = PredictionService.predict_batch(X)
+            histories = []
+            for row, (label, metadata) in zip(X.tolist(), results):
+                history = PredictionHistory(user=user, **dict(zip(schema.features, row)))
+                history.apply_scoring(label, metadata)
+                histories.append(history)
+            PredictionHistory.objects.bulk_create(histories, batch_size=batch_size)
+            counts.update(label for label, _ in results)
+            for course, (_, metadata) in zip(X[:, course_column].tolist(), results):
+                totals.add(course, term, metadata)
+        totals.save()
+
+    return {"rows": sum(counts.values()), "skipped": skipped, "counts": dict(counts)}
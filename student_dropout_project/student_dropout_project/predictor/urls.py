@@ -4,7 +4,11 @@ from . import views
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('predict/', views.predict_view, name='predict'),
+    path('predict/upload/', views.upload_view, name='predict_upload'),
     path('result/<int:pk>/', views.prediction_result_view, name='prediction_result'),
     path('history/', views.history_view, name='history'),
-    path('field-info/', views.field_info_view, name='field_info')
+    path('cohorts/', views.cohort_dashboard_view, name='cohorts'),
+    path('field-info/', views.field_info_view, name='field_info'),
+    path('api/predict/', views.predict_api, name='api_predict'),
+    path('api/predict/batch/', views.predict_batch_api, name='api_predict_batch'),
 ]
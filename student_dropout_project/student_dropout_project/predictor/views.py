@@ -1,13 +1,31 @@
 import os
+import json
+from functools import wraps
+from itertools import islice
+from urllib.parse import urlencode
+import numpy as np
 import pandas as pd
+from django.conf import settings
 from django.contrib import messages
+from django.core.exceptions import RequestDataTooBig
 from django.contrib.auth import login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
-from .forms import CustomUserRegistrationForm, PredictionForm
-from .models import UserProfile, PredictionHistory
+from .forms import CustomUserRegistrationForm, PredictionForm, BatchUploadForm
+from .models import UserProfile, PredictionHistory, ApiToken
 from .services import PredictionService  # Enterprise Service Pattern
+from .batching import BatcherOverloaded
+from .uploads import score_csv_upload
+from . import cohorts
 
 def register(request):
     if request.method == 'POST':
@@ -47,25 +65,18 @@ def predict_view(request):
             history_obj = form.save(commit=False)
             history_obj.user = request.user
 
-            # 2. Extract data for the service
-            # (We use the form's cleaned data or the object's attributes)
-            # The service expects a dict matching the feature columns
-            data_dict = {
-                field.name: getattr(history_obj, field.name) 
-                for field in PredictionHistory._meta.fields 
-                if field.name in PredictionService._feature_columns
-            }
-
             try:
-                # 3. Call the Service Layer
-                pred_label, metadata = PredictionService.predict(data_dict)
+                # 2. Call the Service Layer
+                # (The feature schema reads the object's attributes straight into the input row)
+                pred_label, metadata = PredictionService.predict(history_obj)
 
-                # 4. Save results
-                history_obj.prediction_result = pred_label
-                # (Optional) We could save risk_level to the DB if we added a column for it
-                history_obj.save()
+                # 3. Save results with their risk metadata (and count them in the cohort summaries)
+                history_obj.apply_scoring(pred_label, metadata)
+                with transaction.atomic():
+                    history_obj.save()
+                    cohorts.record_prediction(history_obj, metadata)
 
-                # 5. User Feedback
+                # 4. User Feedback
                 risk_msg = f"Risk Level: {metadata.get('risk_level', 'N/A')}"
                 if metadata.get('risk_drivers'):
                     risk_msg += f" | Factors: {', '.join(metadata['risk_drivers'])}"
@@ -84,18 +95,288 @@ def predict_view(request):
     return render(request, 'predictor/predict_form.html', {'form': form})
 
 
+@login_required
+def upload_view(request):
+    """Scores a whole cohort export in batches and stores it in the user's history."""
+    if request.method == 'POST':
+        form = BatchUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                summary = score_csv_upload(form.cleaned_data['csv_file'], request.user)
+            except FileNotFoundError:
+                messages.error(request, "System Error: ML Model file is missing. Please contact admin.")
+            except (ValueError, UnicodeDecodeError) as e:
+                messages.error(request, f"Upload Failed: {str(e)}")
+            else:
+                breakdown = ", ".join(f"{label}: {n}" for label, n in sorted(summary['counts'].items()))
+                msg = f"Scored {summary['rows']} students ({breakdown})"
+                if summary['skipped']:
+                    msg += f" | Skipped {summary['skipped']} incomplete rows"
+                messages.success(request, msg)
+                return redirect('history')
+    else:
+        form = BatchUploadForm()
+
+    return render(request, 'predictor/upload.html', {'form': form})
+
+
 @login_required
 def prediction_result_view(request, pk):
     prediction = get_object_or_404(PredictionHistory, pk=pk, user=request.user)
     return render(request, 'predictor/prediction_result.html', {'prediction': prediction})
 
 
+HISTORY_PAGE_SIZE = 25
+# Only the columns the history table displays
+HISTORY_COLUMNS = (
+    'id', 'created_at', 'course', 'application_order', 'admission_grade',
+    'curricular_units_1st_sem_grade', 'curricular_units_2nd_sem_grade', 'prediction_result',
+    'risk_level', 'dropout_probability',
+)
+
+
 @login_required
 def history_view(request):
-    histories = PredictionHistory.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'predictor/history.html', {'histories': histories})
+    """
+    Keyset-paginated history: each page seeks on the (user, created_at) index from
+    the last row of the previous page, so page cost does not grow with row count.
+    ?risk_level=Critical turns it into a worklist on the (user, risk_level, created_at) index.
+    """
+    histories = (
+        PredictionHistory.objects
+        .filter(user=request.user)
+        .only(*HISTORY_COLUMNS)
+        .order_by('-created_at', '-id')
+    )
+    risk_level = request.GET.get('risk_level', '')
+    if risk_level in dict(PredictionHistory.RISK_LEVEL_CHOICES):
+        histories = histories.filter(risk_level=risk_level)
+    else:
+        risk_level = ''
+
+    before = parse_datetime(request.GET.get('before', ''))
+    before_id = request.GET.get('before_id', '')
+    if before is not None and before_id.isdigit():
+        histories = histories.filter(
+            Q(created_at__lt=before) | Q(created_at=before, id__lt=int(before_id))
+        )
+
+    page = list(histories[:HISTORY_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > HISTORY_PAGE_SIZE:
+        page = page[:HISTORY_PAGE_SIZE]
+        last = page[-1]
+        cursor = {'before': last.created_at.isoformat(), 'before_id': last.pk}
+        if risk_level:
+            cursor['risk_level'] = risk_level
+        next_cursor = urlencode(cursor)
+
+    return render(request, 'predictor/history.html', {
+        'histories': page,
+        'next_cursor': next_cursor,
+        'is_first_page': before is None,
+        'risk_level': risk_level,
+        'risk_levels': [level for level, _ in PredictionHistory.RISK_LEVEL_CHOICES],
+    })
+
+
+@staff_member_required
+def cohort_dashboard_view(request):
+    """
+    What is driving dropout risk per course and term, read from the
+    precomputed cohort summaries (no history scan, no re-scoring).
+    """
+    terms = cohorts.terms()
+    term = request.GET.get('term') or (terms[0] if terms else None)
+    course = request.GET.get('course', '')
+    risk_level = request.GET.get('risk_level', '')
+    report = []
+    if term is not None:
+        report = cohorts.cohort_report(
+            term,
+            course=int(course) if course.isdigit() else None,
+            risk_levels=[risk_level] if risk_level in cohorts.RISK_LEVELS else None,
+            display_names=PredictionService._schema.display_names,
+        )
+    return render(request, 'predictor/cohorts.html', {
+        'report': report,
+        'terms': terms,
+        'term': term,
+        'course': course,
+        'risk_level': risk_level,
+        'risk_levels': cohorts.RISK_LEVELS,
+    })
 
 
 @login_required
 def field_info_view(request):
     return render(request, 'predictor/field_info.html')
+
+
+# =========================
+#  JSON API
+# =========================
+
+API_CHUNK_SIZE = getattr(settings, 'PREDICTOR_API_CHUNK_SIZE', 1000)
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl')
+# json.loads decodes bytes itself, so a body that is not valid UTF-8 (or UTF-16/32)
+# fails with UnicodeDecodeError rather than JSONDecodeError
+MALFORMED_JSON = (json.JSONDecodeError, UnicodeDecodeError)
+
+
+def _csrf_rejected(request) -> bool:
+    # The same check CsrfViewMiddleware applies to views that are not exempt
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {}) is not None
+
+
+def api_login_required(view):
+    """
+    Like login_required, but for API clients: integrations authenticate with
+    "Authorization: Bearer <token>" (see ApiToken) and need no CSRF token;
+    browser sessions still must pass the CSRF check. Failures are answered
+    with 401/403 JSON instead of a redirect. Views using it are csrf_exempt.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        header = request.headers.get('Authorization')
+        if header is not None:
+            scheme, _, token = header.partition(' ')
+            user = ApiToken.authenticate(token.strip()) if scheme.lower() == 'bearer' and token.strip() else None
+            if user is None:
+                return JsonResponse({"error": "Invalid API token."}, status=401)
+            request.user = user
+        elif not request.user.is_authenticated:
+            return JsonResponse({"error": "Authentication required."}, status=401)
+        elif _csrf_rejected(request):
+            return JsonResponse({"error": "CSRF verification failed."}, status=403)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _prediction_payload(label, metadata):
+    return {
+        "prediction": label,
+        "dropout_probability": metadata.get("dropout_probability"),
+        "risk_level": metadata["risk_level"],
+        "risk_drivers": metadata["risk_drivers"],
+        "risk_driver_method": metadata.get("risk_driver_method"),
+    }
+
+
+def _iter_ndjson_records(request):
+    # Iterating the request reads the body line by line instead of loading it whole
+    for line in request:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except MALFORMED_JSON as e:
+                # Reported on its own output line; the rest of the stream is still scored
+                yield e
+
+
+def _chunk_to_matrix(chunk, start_index):
+    """Converts a chunk of records to a feature matrix, isolating rows that cannot be scored."""
+    invalid = (KeyError, TypeError, ValueError)
+    errors = {}
+    try:
+        X = PredictionService._to_matrix(chunk)
+        indices = np.arange(start_index, start_index + len(chunk))
+    except invalid:
+        rows, kept = [], []
+        for offset, record in enumerate(chunk):
+            if isinstance(record, MALFORMED_JSON):
+                errors[start_index + offset] = f"Malformed NDJSON line: {record}"
+                continue
+            try:
+                rows.append(PredictionService._to_matrix([record])[0])
+            except invalid as e:
+                errors[start_index + offset] = f"Invalid record: {e!r}"
+            else:
+                kept.append(start_index + offset)
+        X = np.array(rows, dtype=np.float64).reshape(len(rows), len(PredictionService._schema))
+        indices = np.array(kept, dtype=np.int64)
+
+    finite = np.isfinite(X).all(axis=1)
+    for index in indices[~finite]:
+        errors[int(index)] = "Invalid record: missing or non-numeric values"
+    return X[finite], indices[finite], errors
+
+
+def _score_chunk(chunk, start_index):
+    """Scores one chunk in a single batch and renders it as NDJSON lines in input order."""
+    X, indices, errors = _chunk_to_matrix(chunk, start_index)
+    results = PredictionService.predict_batch(X) if len(X) else []
+
+    lines = {index: {"index": index, "error": message} for index, message in errors.items()}
+    for index, (label, metadata) in zip(indices.tolist(), results):
+        lines[index] = {"index": index, **_prediction_payload(label, metadata)}
+    return "".join(json.dumps(lines[i]) + "\n" for i in sorted(lines))
+
+
+def _stream_predictions(records):
+    """Yields NDJSON, one chunk at a time, so the first rows arrive before the last are scored."""
+    index = 0
+    while True:
+        chunk = list(islice(records, API_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield _score_chunk(chunk, index)
+        index += len(chunk)
+
+
+@csrf_exempt
+@require_POST
+@api_login_required
+def predict_api(request):
+    """
+    Scores a single JSON feature record. Concurrent requests are coalesced by the
+    micro-batcher into one model pass.
+    """
+    try:
+        record = json.loads(request.body)
+    except MALFORMED_JSON as e:
+        return JsonResponse({"error": f"Malformed JSON: {e}"}, status=400)
+
+    try:
+        label, metadata = PredictionService.predict_coalesced(record)
+    except (KeyError, TypeError, ValueError) as e:
+        return JsonResponse({"error": f"Invalid record: {e!r}"}, status=400)
+    except BatcherOverloaded as e:
+        return JsonResponse({"error": str(e)}, status=503)
+    except FileNotFoundError:
+        return JsonResponse({"error": "ML Model file is missing. Please contact admin."}, status=500)
+
+    return JsonResponse(_prediction_payload(label, metadata))
+
+
+@csrf_exempt
+@require_POST
+@api_login_required
+def predict_batch_api(request):
+    """
+    Batch scoring for integrations (e.g. the SIS).
+
+    Accepts an NDJSON body (Content-Type: application/x-ndjson), read line by
+    line as it is scored, or a JSON array of feature records (or {"records": [...]}),
+    which is parsed whole and so bounded by DATA_UPLOAD_MAX_MEMORY_SIZE; send large
+    cohorts as NDJSON. Responds with one NDJSON line per input record, in input
+    order, streamed chunk by chunk.
+    """
+    if request.content_type in NDJSON_CONTENT_TYPES:
+        records = _iter_ndjson_records(request)
+    else:
+        try:
+            payload = json.loads(request.body)
+        except RequestDataTooBig:
+            return JsonResponse({"error": "JSON body too large; send the records as NDJSON "
+                                          "(Content-Type: application/x-ndjson)."}, status=413)
+        except MALFORMED_JSON as e:
+            return JsonResponse({"error": f"Malformed JSON: {e}"}, status=400)
+        if isinstance(payload, dict):
+            payload = payload.get("records")
+        if not isinstance(payload, list):
+            return JsonResponse({"error": "Expected a JSON array of records."}, status=400)
+        records = iter(payload)
+
+    return StreamingHttpResponse(_stream_predictions(records), content_type='application/x-ndjson')
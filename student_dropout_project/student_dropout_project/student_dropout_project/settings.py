@@ -85,3 +85,67 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'predict'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = 'login'
+
+# Prediction service: load the model when the WSGI/ASGI application (or runserver)
+# starts, not for other manage.py commands
+PREDICTOR_PRELOAD_MODEL = True
+
+# Result cache for repeated student profiles. BACKEND: 'local' (per process),
+# 'django' (the cache named by ALIAS in CACHES) or None to disable.
+PREDICTOR_CACHE = {
+    'BACKEND': 'local',
+    'MAX_ENTRIES': 4096,
+    'TTL': 600,
+    'ALIAS': 'default',
+}
+
+# Micro-batching for concurrent single predictions (POST /api/predict/): requests that
+# arrive within MAX_WAIT_MS of each other, up to MAX_BATCH_SIZE, share one model pass.
+PREDICTOR_MICRO_BATCH = {
+    'MAX_BATCH_SIZE': 64,
+    'MAX_WAIT_MS': 2.0,
+    'MAX_QUEUE': 1024,
+}
+
+# Versioned models written by src/train_model.py. The service serves PIN if set,
+# otherwise the registry's CURRENT version ('manage.py activate_model'), and checks
+# the pointer every REFRESH_SECONDS (None: only at startup). Without a registry
+# version it falls back to predictor/ml_models. ROOT None disables the registry.
+PREDICTOR_REGISTRY = {
+    'ROOT': BASE_DIR.parent / 'registry',
+    'PIN': None,
+    'REFRESH_SECONDS': 5,
+}
+
+# Per-student risk drivers: exact TreeSHAP attributions (src/attribution.py), or the
+# rule-based flags for models without attributions. TOP_K drivers are reported per student.
+# A predict_batch call explains its rows only while rows x per-row path cost (see
+# TreeAttribution.row_cost) stays within MAX_WORK, and at most MAX_ROWS rows (None: no
+# row cap); larger batches get the rule-based flags and `rescore_stale` fills in their
+# attributions offline. A single prediction is always explained.
+# Cost is about 10-40 ns per path coefficient, so 20M is ~0.2-0.8 s per call: a whole
+# 4,424-row upload for the shipped boosting model (~3.7k coefficients/row, ~0.6 s), but
+# only ~13 rows for a 100-tree full-depth random forest (~1.5M/row, ~18 ms/row).
+PREDICTOR_ATTRIBUTION = {
+    'TOP_K': 3,
+    'MAX_WORK': 20_000_000,
+    'MAX_ROWS': None,
+}
+
+# Cohort summaries (predictor/cohorts.py): months in which academic terms start,
+# and how many risk drivers the dashboard lists per course
+PREDICTOR_COHORTS = {
+    'TERM_START_MONTHS': (9, 2),
+    'TOP_DRIVERS': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'predictor': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
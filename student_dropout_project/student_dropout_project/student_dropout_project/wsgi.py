@@ -4,3 +4,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
 
 application = get_wsgi_application()
+
+# Only servers import this module, so manage.py commands never load the model
+from predictor.apps import preload_model  # noqa: E402
+preload_model()
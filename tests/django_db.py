@@ -0,0 +1,20 @@
+"""
+Test database setup shared by the Django test modules. Import it after
+django.setup() and re-export the hooks so unittest/pytest run them:
+
+    from django_db import setUpModule, tearDownModule  # noqa: F401
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+_runner = DiscoverRunner(verbosity=0)
+_old_config = None
+
+def setUpModule():
+    global _old_config
+    setup_test_environment()
+    _old_config = _runner.setup_databases()
+
+def tearDownModule():
+    _runner.teardown_databases(_old_config)
+    teardown_test_environment()
@@ -0,0 +1,191 @@
+import unittest
+import json
+import threading
+import pandas as pd
+import sys
+import os
+
+# Add the Django project to path and configure settings
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/student_dropout_project')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+sys.path.append(PROJECT_DIR)
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase
+
+from django_db import setUpModule, tearDownModule  # noqa: F401
+from predictor.models import ApiToken
+from predictor.services import PredictionService
+
+class TestBatchPredictionApi(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('counselor', password='secret-pass')
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').head(30)
+        df = df.drop('Target', axis=1)
+        df.columns = PredictionService._feature_columns
+        cls.records = df.to_dict('records')
+
+    def setUp(self):
+        self.client.login(username='counselor', password='secret-pass')
+
+    def _lines(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_json_array_is_streamed_as_ndjson(self):
+        response = self.client.post('/api/predict/batch/', data=json.dumps(self.records),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self._lines(response)
+        expected = PredictionService.predict_batch(self.records)
+        self.assertEqual([line['index'] for line in lines], list(range(30)))
+        self.assertEqual([line['prediction'] for line in lines], [label for label, _ in expected])
+
+    def test_ndjson_body_reports_bad_rows_inline(self):
+        body = [json.dumps(r) for r in self.records[:3]]
+        body.insert(1, '{not json')
+        body.insert(2, json.dumps({'course': 9254}))
+        response = self.client.post('/api/predict/batch/', data='\n'.join(body),
+                                    content_type='application/x-ndjson')
+        lines = self._lines(response)
+        self.assertEqual(len(lines), 5)
+        self.assertIn('Malformed', lines[1]['error'])
+        self.assertIn('Invalid record', lines[2]['error'])
+        self.assertIn('prediction', lines[4])
+
+    def test_non_utf8_body_is_a_client_error(self):
+        body = json.dumps(self.records[:2]).encode().replace(b'[', b'[\xff', 1)
+        response = self.client.post('/api/predict/batch/', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Malformed JSON', response.json()['error'])
+
+        # In an NDJSON body only the undecodable line is rejected
+        body = b'\n'.join([json.dumps(self.records[0]).encode(), b'{"course": "\xff"}',
+                           json.dumps(self.records[1]).encode()])
+        response = self.client.post('/api/predict/batch/', data=body, content_type='application/x-ndjson')
+        lines = self._lines(response)
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Malformed NDJSON line', lines[1]['error'])
+        self.assertIn('prediction', lines[2])
+
+    def test_requires_authentication(self):
+        self.client.logout()
+        response = self.client.post('/api/predict/batch/', data='[]', content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_rejects_non_array_payload(self):
+        response = self.client.post('/api/predict/batch/', data='{"records": 3}',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+class TestMicroBatchedPredictionApi(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('counselor', password='secret-pass')
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').head(40)
+        df = df.drop('Target', axis=1)
+        df.columns = PredictionService._feature_columns
+        cls.records = df.to_dict('records')
+
+    def test_single_prediction(self):
+        self.client.login(username='counselor', password='secret-pass')
+        response = self.client.post('/api/predict/', data=json.dumps(self.records[0]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        label, metadata = PredictionService.predict(self.records[0])
+        self.assertEqual(response.json()['prediction'], label)
+        self.assertEqual(response.json()['risk_level'], metadata['risk_level'])
+
+    def test_invalid_record(self):
+        self.client.login(username='counselor', password='secret-pass')
+        response = self.client.post('/api/predict/', data='{"course": 1}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_utf8_body_is_a_client_error(self):
+        self.client.login(username='counselor', password='secret-pass')
+        response = self.client.post('/api/predict/', data=b'{"course": "\xff"}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_null_feature_is_rejected(self):
+        self.client.login(username='counselor', password='secret-pass')
+        record = dict(self.records[0], course=None)
+        response = self.client.post('/api/predict/', data=json.dumps(record), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('course', response.json()['error'])
+
+    def test_concurrent_requests_are_coalesced(self):
+        from predictor.batching import MicroBatcher
+        batcher = MicroBatcher(PredictionService.predict_batch, max_batch_size=64, max_wait_ms=50)
+        rows = PredictionService._to_matrix(self.records)
+        results = [None] * len(rows)
+
+        def call(i):
+            results[i] = batcher.submit(rows[i], timeout=10)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(len(rows))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(results, PredictionService.predict_batch(rows))
+        stats = batcher.stats()
+        self.assertEqual(stats['requests'], len(rows))
+        self.assertLess(stats['batches'], len(rows))
+
+class TestApiAuthentication(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counselor', password='secret-pass')
+        cls.token = ApiToken.issue(cls.user, 'sis')
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').head(3)
+        df = df.drop('Target', axis=1)
+        df.columns = PredictionService._feature_columns
+        cls.records = df.to_dict('records')
+
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+
+    def test_bearer_token_skips_csrf(self):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        response = self.client.post('/api/predict/', data=json.dumps(self.records[0]),
+                                    content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/predict/batch/', data=json.dumps(self.records),
+                                    content_type='application/json', **auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+
+    def test_invalid_token(self):
+        response = self.client.post('/api/predict/', data=json.dumps(self.records[0]),
+                                    content_type='application/json', HTTP_AUTHORIZATION='Bearer nope')
+        self.assertEqual(response.status_code, 401)
+
+    def test_session_requires_csrf_token(self):
+        self.client.login(username='counselor', password='secret-pass')
+        response = self.client.post('/api/predict/', data=json.dumps(self.records[0]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.get('/predict/')
+        csrf = self.client.cookies['csrftoken'].value
+        response = self.client.post('/api/predict/', data=json.dumps(self.records[0]),
+                                    content_type='application/json', HTTP_X_CSRFTOKEN=csrf)
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_digest_is_stored(self):
+        stored = ApiToken.objects.get(user=self.user)
+        self.assertNotEqual(stored.digest, self.token)
+        self.assertEqual(ApiToken.authenticate(self.token), self.user)
+
+if __name__ == '__main__':
+    unittest.main()
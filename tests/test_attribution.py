@@ -0,0 +1,87 @@
+import unittest
+import itertools
+import math
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, HistGradientBoostingClassifier
+from forest_engine import CompiledForest
+from compaction import compact_engine
+from attribution import TreeAttribution, class_output
+
+def brute_force_shap(forest, x):
+    """Shapley values of E[f(x) | x_S] (path-dependent, cover weighted) by enumerating every subset."""
+    n_features = len(x)
+
+    def expectation(tree, node, subset):
+        if tree.children_left[node] == -1:
+            return tree.value[node, 0]
+        left, right = tree.children_left[node], tree.children_right[node]
+        if tree.feature[node] in subset:
+            return expectation(tree, left if np.float32(x[tree.feature[node]]) <= tree.threshold[node] else right,
+                               subset)
+        w = tree.weighted_n_node_samples
+        return (w[left] * expectation(tree, left, subset) + w[right] * expectation(tree, right, subset)) / w[node]
+
+    phi = np.zeros((n_features, forest.n_classes_))
+    for estimator in forest.estimators_:
+        for i in range(n_features):
+            others = [j for j in range(n_features) if j != i]
+            for size in range(n_features):
+                weight = math.factorial(size) * math.factorial(n_features - size - 1) / math.factorial(n_features)
+                for subset in itertools.combinations(others, size):
+                    with_i = expectation(estimator.tree_, 0, set(subset) | {i})
+                    phi[i] += weight * (with_i - expectation(estimator.tree_, 0, set(subset)))
+    return phi / len(forest.estimators_)
+
+class TestTreeAttribution(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        cls.X = rng.normal(size=(400, 5))
+        cls.y = (cls.X[:, 0] + cls.X[:, 1] * cls.X[:, 2] > 0).astype(int) + (cls.X[:, 3] > 1)
+
+    def test_matches_brute_force_shapley_values(self):
+        forest = RandomForestClassifier(n_estimators=4, max_depth=6, random_state=0).fit(self.X, self.y)
+        attribution = TreeAttribution(CompiledForest.from_estimator(forest))
+        phi = attribution.shap_values(self.X[:2])
+        for row in range(2):
+            np.testing.assert_allclose(phi[row], brute_force_shap(forest, self.X[row]), atol=1e-12)
+        # a single output, from the per-class restricted path tables
+        np.testing.assert_allclose(attribution.shap_values(self.X[:2], 1), phi[:, :, 1], atol=1e-12)
+
+    def test_additivity(self):
+        X_missing = self.X.copy()
+        X_missing[::5, 2] = np.nan
+        forest = RandomForestClassifier(n_estimators=30, random_state=0).fit(self.X, self.y)
+        models = [
+            (forest, self.X, lambda m, X: m.predict_proba(X)),
+            (GradientBoostingClassifier(n_estimators=40, random_state=0).fit(self.X, self.y), self.X,
+             lambda m, X: m.decision_function(X)),
+            (GradientBoostingClassifier(n_estimators=40, random_state=0).fit(self.X, self.y > 0), self.X,
+             lambda m, X: m.decision_function(X)[:, np.newaxis]),
+            (HistGradientBoostingClassifier(max_iter=40, random_state=0).fit(X_missing, self.y), X_missing,
+             lambda m, X: m.decision_function(X)),
+        ]
+        for model, X, raw in models:
+            for engine in (CompiledForest.from_estimator(model), compact_engine(CompiledForest.from_estimator(model))):
+                attribution = TreeAttribution(engine)
+                phi = attribution.shap_values(X)
+                np.testing.assert_allclose(attribution.expected_value + phi.sum(axis=1), raw(model, X), atol=1e-10)
+
+    def test_explain_ranks_contributions_towards_a_class(self):
+        binary = GradientBoostingClassifier(n_estimators=20, random_state=0).fit(self.X, self.y > 0)
+        attribution = TreeAttribution(CompiledForest.from_estimator(binary))
+        output, direction = class_output(attribution.engine, 0)
+        self.assertEqual((output, direction), (0, -1))
+        phi, top = attribution.explain(self.X[:10], output, top_k=2, direction=direction)
+        # class 0 drivers are the features pushing the class-1 margin down the most
+        np.testing.assert_array_equal(top, np.argsort(phi, axis=1, kind='stable')[:, :2])
+
+if __name__ == '__main__':
+    unittest.main()
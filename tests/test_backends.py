@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from sklearn.ensemble import HistGradientBoostingClassifier
+from train_model import load_data, preprocess_data, holdout_split, train_model
+from backends import BACKENDS, make_backend, compare_backends, format_comparison
+
+class TestBackends(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.X, cls.y, cls.le = preprocess_data(load_data(DATA_PATH))
+
+    def test_make_backend(self):
+        self.assertIsInstance(make_backend('hist_gradient_boosting'), HistGradientBoostingClassifier)
+        with self.assertRaises(ValueError):
+            make_backend('xgboost')
+
+    def test_train_model_with_histogram_boosting(self):
+        metrics = {}
+        model = train_model(self.X, self.y, metrics, backend='hist_gradient_boosting')
+        self.assertIsInstance(model, HistGradientBoostingClassifier)
+        self.assertGreater(metrics['accuracy'], 0.7)
+
+    def test_comparison_report(self):
+        X_train, X_test, y_train, y_test = holdout_split(self.X[:1500], self.y[:1500])
+        report = compare_backends(X_train, y_train, X_test, y_test, class_names=self.le.classes_, n_single=5)
+
+        self.assertEqual([row['backend'] for row in report], list(BACKENDS))
+        for row in report:
+            self.assertEqual(set(row['f1_per_class']), {'Dropout', 'Enrolled', 'Graduate'})
+            self.assertAlmostEqual(row['f1_macro'], np.mean(list(row['f1_per_class'].values())), places=3)
+            # both backends compile to the inference engine
+            self.assertIsNotNone(row['engine_single_row_ms'])
+            self.assertGreater(row['bundle_bytes'], 0)
+        self.assertIn('hist_gradient_boosting', format_comparison(report))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import pandas as pd
+import sys
+import os
+
+# Add the benchmark suite and src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../benchmarks'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+import synthetic
+from micro import compare
+
+class TestSyntheticData(unittest.TestCase):
+
+    def test_generated_frame_matches_dataset_schema(self):
+        reference = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig')
+        df = synthetic.generate(500, seed=1)
+
+        self.assertEqual(len(df), 500)
+        self.assertEqual(list(df.columns), list(reference.columns))
+        self.assertEqual(df.dtypes.to_dict(), reference.dtypes.to_dict())
+        self.assertTrue(set(df['Target']) <= set(reference['Target']))
+        self.assertTrue(df.equals(synthetic.generate(500, seed=1)))
+
+    def test_parse_scale(self):
+        self.assertEqual(synthetic.parse_scale('100k'), 100_000)
+        self.assertEqual(synthetic.parse_scale('1M'), 1_000_000)
+        self.assertEqual(synthetic.parse_scale('2500'), 2500)
+
+class TestRegressionGate(unittest.TestCase):
+
+    baselines = {"predict@1k": {"seconds": 1.0, "peak_bytes": 1000}}
+
+    def test_within_tolerance_passes(self):
+        results = {"predict@1k": {"seconds": 1.2, "peak_bytes": 1050}}
+        self.assertEqual(compare(results, self.baselines, 0.25, 0.10), [])
+
+    def test_time_and_memory_regressions_are_reported(self):
+        results = {"predict@1k": {"seconds": 1.5, "peak_bytes": 2000},
+                   "predict@1M": {"seconds": 99.0, "peak_bytes": 10 ** 9}}  # no baseline yet
+        regressions = compare(results, self.baselines, 0.25, 0.10)
+        self.assertEqual([r["metric"] for r in regressions], ["seconds", "peak_bytes"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import tempfile
+import shutil
+import joblib
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from sklearn.ensemble import RandomForestClassifier
+import predict as predict_module
+from train_model import load_data, preprocess_data, save_artifacts
+from bundle import ModelBundle, BundleSchemaError, BUNDLE_FORMAT
+from data_loader import normalize_header
+
+class TestModelBundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.X, cls.y, cls.le = preprocess_data(load_data(DATA_PATH))
+        cls.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(cls.X[:3000], cls.y[:3000])
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'model.joblib')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip_keeps_schema_labels_and_engine(self):
+        save_artifacts(self.model, self.le, self.path)
+        bundle = ModelBundle.load(self.path)
+
+        self.assertEqual(bundle.features, [normalize_header(c) for c in self.X.columns])
+        self.assertEqual(bundle.input_names, list(self.X.columns))
+        self.assertEqual(bundle.labels, ['Dropout', 'Enrolled', 'Graduate'])
+        self.assertEqual(list(bundle.decode([2, 0])), ['Graduate', 'Dropout'])
+        self.assertIsInstance(bundle.engine.threshold, np.memmap)
+        X_test = self.X[3000:].to_numpy()
+        np.testing.assert_array_equal(bundle.engine.predict_proba(X_test), self.model.predict_proba(self.X[3000:]))
+        self.assertEqual(bundle.version, ModelBundle.from_model(self.model).version)
+
+    def test_mismatches_fail_at_load(self):
+        joblib.dump(self.model, self.path)
+        with self.assertRaises(BundleSchemaError):
+            ModelBundle.load(self.path)
+
+        bundle = ModelBundle.from_model(self.model, self.le)
+        bundle.save(self.path)
+        with self.assertRaises(BundleSchemaError):
+            ModelBundle.load(self.path, expected_features=bundle.features[:-1] + ['shoe_size'])
+
+        payload = joblib.load(self.path)
+        payload['format'] = BUNDLE_FORMAT + 1
+        joblib.dump(payload, self.path)
+        with self.assertRaises(BundleSchemaError):
+            ModelBundle.load(self.path)
+
+        with self.assertRaises(BundleSchemaError):
+            ModelBundle.from_model(self.model, features=['only_one']).validate()
+
+    def test_predict_decodes_labels_and_aligns_columns(self):
+        save_artifacts(self.model, self.le, self.path)
+        original = predict_module.MODEL_PATH
+        predict_module.MODEL_PATH = self.path
+        try:
+            rows = self.X[3000:3005]
+            # snake_case names in a different order are mapped back onto the model's columns
+            shuffled = rows.rename(columns=normalize_header)[sorted(map(normalize_header, rows.columns))]
+            results = predict_module.predict(shuffled)
+        finally:
+            predict_module.MODEL_PATH = original
+
+        expected = self.le.inverse_transform(self.model.predict(rows))
+        self.assertEqual([r['Prediction'] for r in results], list(expected))
+
+if __name__ == '__main__':
+    unittest.main()
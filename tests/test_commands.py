@@ -0,0 +1,140 @@
+import unittest
+from unittest import mock
+import tempfile
+import pandas as pd
+import sys
+import os
+
+# Add the Django project to path and configure settings
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/student_dropout_project')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+sys.path.append(PROJECT_DIR)
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from io import StringIO
+from django.core.management import call_command, CommandError
+from django.test import TestCase, SimpleTestCase, override_settings
+
+from django_db import setUpModule, tearDownModule  # noqa: F401
+from predictor.models import PredictionHistory, CohortSummary
+from predictor.services import PredictionService
+from data_loader import load_dataset, normalize_header
+from registry import ModelRegistry
+from bundle import ModelBundle
+
+class TestExportOutcomes(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('counselor', password='secret-pass')
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').head(12)
+        cls.source = df
+        for i, row in enumerate(df.to_dict('records')):
+            fields = {normalize_header(k): v for k, v in row.items() if k != 'Target'}
+            PredictionHistory.objects.create(
+                user=user, prediction_result='Dropout',
+                # Only the first 9 students have a known outcome so far
+                actual_outcome=row['Target'] if i < 9 else None,
+                **fields
+            )
+
+    def test_exports_labelled_rows_in_data_csv_layout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'outcomes.csv')
+            call_command('export_outcomes', output=path, stdout=open(os.devnull, 'w'))
+            exported = load_dataset(path, cache_dir=None)
+
+        self.assertEqual(len(exported), 9)
+        self.assertEqual(list(exported.columns), list(self.source.columns))
+        self.assertEqual(list(exported['Target'].astype(str)), list(self.source['Target'][:9]))
+        # Integer-typed model fields round the graded columns; everything else round-trips
+        self.assertTrue((exported['Course'].to_numpy() == self.source['Course'][:9].to_numpy()).all())
+
+    def test_rebuild_cohort_summaries(self):
+        out = StringIO()
+        call_command('rebuild_cohort_summaries', chunk_size=5, stdout=out)
+        self.assertIn('from 12 predictions', out.getvalue())
+        by_course = {}
+        for summary in CohortSummary.objects.all():
+            by_course[summary.course] = by_course.get(summary.course, 0) + summary.predictions
+        self.assertEqual(by_course, self.source['Course'].value_counts().to_dict())
+
+        # Rebuilding replaces the summaries rather than adding to them
+        cells = CohortSummary.objects.count()
+        call_command('rebuild_cohort_summaries', stdout=out)
+        self.assertEqual(CohortSummary.objects.count(), cells)
+        self.assertEqual(sum(CohortSummary.objects.values_list('predictions', flat=True)), 12)
+
+    def test_rescore_stale_stores_risk_metadata(self):
+        out = StringIO()
+        call_command('rescore_stale', dry_run=True, stdout=out)
+        self.assertIn('12 rows not scored', out.getvalue())
+
+        call_command('rescore_stale', chunk_size=5, stdout=out)
+        version = PredictionService.model_version
+        self.assertFalse(PredictionHistory.objects.exclude(model_version=version).exists())
+        for history in PredictionHistory.objects.all():
+            self.assertIn(history.risk_level, ['Low', 'Moderate', 'High', 'Critical'])
+            self.assertTrue(0.0 <= history.dropout_probability <= 100.0)
+            self.assertTrue(set(history.risk_drivers) <= set(PredictionService._feature_columns))
+            # Chunked bulk scoring stores the same drivers as a single prediction
+            self.assertEqual(history.risk_driver_method, 'attribution')
+            self.assertEqual(history.risk_drivers, PredictionService.predict(history)[1]['risk_driver_codes'])
+        # The summaries were rebuilt from the stored metadata, without scoring
+        self.assertIn('0 scored without stored metadata', out.getvalue())
+        self.assertEqual(sum(CohortSummary.objects.values_list('predictions', flat=True)), 12)
+
+        out = StringIO()
+        call_command('rescore_stale', stdout=out)
+        self.assertIn('Re-scored 0 rows', out.getvalue())
+
+        # Rows scored by this version before the driver method was stored are stale too
+        PredictionHistory.objects.filter(pk__in=PredictionHistory.objects.values('pk')[:3]).update(
+            risk_driver_method=None)
+        out = StringIO()
+        call_command('rescore_stale', skip_summaries=True, stdout=out)
+        self.assertIn('Re-scored 3 rows', out.getvalue())
+
+        # So are rows that got rule-based drivers because their batch was over the attribution budget
+        PredictionHistory.objects.filter(pk__in=PredictionHistory.objects.values('pk')[:4]).update(
+            risk_driver_method='rules')
+        out = StringIO()
+        with mock.patch.object(PredictionService, '_attribution_max_work', 0):
+            call_command('rescore_stale', chunk_size=5, skip_summaries=True, stdout=out)
+        self.assertIn('Re-scored 4 rows', out.getvalue())
+        self.assertEqual(set(PredictionHistory.objects.values_list('risk_driver_method', flat=True)),
+                         {'attribution'})
+
+class TestActivateModel(SimpleTestCase):
+
+    def test_lists_and_activates_versions(self):
+        from sklearn.dummy import DummyClassifier
+        with tempfile.TemporaryDirectory() as tmp:
+            registry = ModelRegistry(tmp)
+            features = PredictionService._feature_columns
+            for _ in range(2):
+                model = DummyClassifier().fit([[0] * len(features), [1] * len(features)], ['Dropout', 'Graduate'])
+                registry.register(ModelBundle.from_model(model, features=features), metrics={'accuracy': 0.5})
+            # A model the service cannot feed
+            model = DummyClassifier().fit([[0], [1]], ['Dropout', 'Graduate'])
+            registry.register(ModelBundle.from_model(model, features=['x']))
+            with override_settings(PREDICTOR_REGISTRY={'ROOT': tmp}):
+                call_command('activate_model', 'v0002', stdout=StringIO())
+                out = StringIO()
+                call_command('activate_model', list=True, stdout=out)
+                with self.assertRaises(CommandError):
+                    call_command('activate_model', 'v0009', stdout=StringIO())
+                with self.assertRaisesRegex(CommandError, 'missing'):
+                    call_command('activate_model', 'v0003', stdout=StringIO())
+
+            self.assertEqual(registry.current(), 'v0002')
+        self.assertIn('* v0002', out.getvalue())
+        self.assertIn('  v0001', out.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import pickle
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+SERVED_MODEL_PATH = os.path.join(os.path.dirname(__file__),
+                                 '../student_dropout_project/student_dropout_project/predictor/ml_models/best_student_dropout_model.pkl')
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from forest_engine import CompiledForest
+from compaction import compact_engine, compact_model, prune_forest, float32_thresholds, format_report
+
+class TestCompaction(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig')
+        y = df.pop('Target')
+        cls.X_train, cls.X_test, cls.y_train, cls.y_test = train_test_split(df, y, test_size=0.2, random_state=0)
+        cls.forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(cls.X_train, cls.y_train)
+
+    def test_float32_thresholds_split_every_float32_input_the_same_way(self):
+        thresholds = np.array([0.1, 1 / 3, 2.5, -7.25, 1e-8])
+        t32 = float32_thresholds(thresholds)
+        self.assertEqual(t32.dtype, np.float32)
+        for t64, t in zip(thresholds, t32):
+            x = np.float32(t64)
+            # the float32 values around the threshold land on the same side
+            for value in (np.nextafter(x, np.float32(-np.inf)), x, np.nextafter(x, np.float32(np.inf))):
+                self.assertEqual(value > t64, value > t)
+
+    def test_compact_engine_is_exact_and_smaller(self):
+        with open(SERVED_MODEL_PATH, 'rb') as f:
+            served = pickle.load(f)
+        X = self.X_test.to_numpy(dtype=np.float64)
+        for model in (self.forest, served):
+            engine = CompiledForest.from_estimator(model)
+            compact = compact_engine(engine)
+            self.assertLess(compact.nbytes, engine.nbytes)
+            self.assertEqual(compact.threshold.dtype, np.float32)
+            self.assertIn(compact.children.dtype, (np.uint16, np.uint32))
+            np.testing.assert_array_equal(compact.predict_proba(X), engine.predict_proba(X))
+
+    def test_pruning_merges_small_subtrees_consistently(self):
+        # Every split sees at least two samples, so this level changes nothing
+        unchanged = prune_forest(self.forest, 2)
+        np.testing.assert_array_equal(unchanged.predict_proba(self.X_test), self.forest.predict_proba(self.X_test))
+
+        pruned = prune_forest(self.forest, 32)
+        before = sum(e.tree_.node_count for e in self.forest.estimators_)
+        after = sum(e.tree_.node_count for e in pruned.estimators_)
+        self.assertLess(after, before / 2)
+        # The original is untouched, and the engine agrees with the pruned sklearn model
+        self.assertEqual(sum(e.tree_.node_count for e in self.forest.estimators_), before)
+        np.testing.assert_array_equal(CompiledForest.from_estimator(pruned).predict_proba(self.X_test.to_numpy()),
+                                      pruned.predict_proba(self.X_test))
+
+    def test_compact_model_respects_the_accuracy_tolerance(self):
+        model, engine, report = compact_model(self.forest, self.X_test, self.y_test, tolerance=0.01)
+        self.assertGreaterEqual(report['accuracy_delta'], -0.01)
+        self.assertLessEqual(report['after']['artifact_bytes'], report['before']['artifact_bytes'])
+        np.testing.assert_array_equal(engine.predict(self.X_test.to_numpy()), model.predict(self.X_test))
+        self.assertIn('holdout accuracy', format_report(report))
+
+        _, _, exact = compact_model(self.forest, self.X_test, self.y_test)
+        self.assertIsNone(exact['min_samples_split'])
+        self.assertEqual(exact['accuracy_delta'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
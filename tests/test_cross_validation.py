@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import cross_val_score
+from scipy import stats
+import cross_validation
+from cross_validation import cross_validate, confidence_interval
+from train_model import load_data, preprocess_data
+
+class TestCrossValidation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        X, y, cls.le = preprocess_data(load_data(DATA_PATH))
+        cls.X, cls.y = X.to_numpy()[:1200], y[:1200]
+
+    def test_bootstrapped_fold_matches_fitting_on_the_training_rows(self):
+        estimator = RandomForestClassifier(n_estimators=10, random_state=0)
+        test_idx = np.arange(0, len(self.y), 5)
+        train_mask = np.ones(len(self.y), dtype=bool)
+        train_mask[test_idx] = False
+
+        with tempfile.TemporaryDirectory() as tmp:
+            np.save(os.path.join(tmp, 'X.npy'), self.X.astype(np.float32))
+            np.save(os.path.join(tmp, 'y.npy'), self.y)
+            cross_validation._init_worker(tmp)
+            fold = cross_validation._run_fold(estimator, test_idx, np.unique(self.y))
+            cross_validation._SHARED.clear()
+
+        subset_model = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+            self.X[train_mask].astype(np.float32), self.y[train_mask])
+        expected = accuracy_score(self.y[test_idx], subset_model.predict(self.X[test_idx]))
+        self.assertEqual(fold['accuracy'], expected)
+
+    def test_both_fit_paths_match_cross_val_score(self):
+        splitter = cross_validation.make_splitter(n_splits=3)
+        X = self.X.astype(np.float32)
+        cases = [
+            # Zero-weighted held-out rows on the shared matrix
+            (ExtraTreesClassifier(n_estimators=10, random_state=0), True),
+            (GradientBoostingClassifier(n_estimators=10, max_depth=3, random_state=0), True),
+            # A copy of the training rows
+            (RandomForestClassifier(n_estimators=10, random_state=0), False),
+            (GradientBoostingClassifier(n_estimators=10, subsample=0.5, random_state=0), False),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            np.save(os.path.join(tmp, 'X.npy'), X)
+            np.save(os.path.join(tmp, 'y.npy'), self.y)
+            cross_validation._init_worker(tmp)
+            try:
+                for estimator, shared in cases:
+                    self.assertEqual(cross_validation._zero_weight_is_exact(estimator), shared)
+                    scores = [cross_validation._run_fold(estimator, test_idx, np.unique(self.y))['accuracy']
+                              for _, test_idx in splitter.split(X, self.y)]
+                    expected = cross_val_score(estimator, X, self.y, cv=splitter, scoring='accuracy')
+                    self.assertEqual(scores, expected.tolist(), type(estimator).__name__)
+            finally:
+                cross_validation._SHARED.clear()
+
+    def test_parallel_repeated_cv_report(self):
+        report = cross_validate(ExtraTreesClassifier(n_estimators=10, random_state=0), self.X, self.y,
+                                n_splits=3, n_repeats=2, max_workers=2, class_names=self.le.classes_)
+        self.assertEqual(report['folds'], 6)
+        self.assertEqual(sorted(report['per_class']), ['Dropout', 'Enrolled', 'Graduate'])
+        for metrics in report['per_class'].values():
+            for stat in (metrics['precision'], metrics['recall']):
+                self.assertLessEqual(stat['ci_low'], stat['mean'])
+                self.assertGreaterEqual(stat['ci_high'], stat['mean'])
+        self.assertGreater(report['worker_peak_rss_bytes'], 0)
+
+    def test_corrected_t_interval(self):
+        values = [0.70, 0.72, 0.74, 0.76]
+        ci = confidence_interval(values, n_train=300, n_test=100)
+        half = stats.t.ppf(0.975, 3) * np.sqrt((1 / 4 + 100 / 300) * np.var(values, ddof=1))
+        self.assertAlmostEqual(ci['ci_high'] - ci['mean'], half, places=3)
+        self.assertEqual(confidence_interval([0.8], 300, 100)['ci_low'], 0.8)
+
+if __name__ == '__main__':
+    unittest.main()
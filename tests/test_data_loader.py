@@ -0,0 +1,91 @@
+import unittest
+import tempfile
+import shutil
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from data_loader import load_dataset, iter_chunks, CSV_SCHEMA, TARGET_CLASSES
+
+class TestDataLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write_csv(self, n_rows):
+        path = os.path.join(self.tmp, f'students_{n_rows}.csv')
+        with open(DATA_PATH, encoding='utf-8-sig') as src, open(path, 'w') as dst:
+            for i, line in enumerate(src):
+                if i > n_rows:
+                    break
+                dst.write(line)
+        return path
+
+    def test_schema_dtypes_and_values(self):
+        df = load_dataset(DATA_PATH, cache_dir=None)
+        reference = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig')
+
+        self.assertEqual(len(df), len(reference))
+        for column, dtype in CSV_SCHEMA.items():
+            self.assertEqual(df[column].dtype, np.dtype(dtype))
+            # Trees see float32 either way, so the model input is unchanged
+            self.assertTrue(np.array_equal(df[column].to_numpy(np.float32),
+                                           reference[column].to_numpy(np.float32)))
+        self.assertEqual(list(df['Target'].cat.categories), TARGET_CLASSES)
+        self.assertTrue((df['Target'].astype(str) == reference['Target']).all())
+
+    def test_cache_matches_parse(self):
+        path = self._write_csv(300)
+        parsed = load_dataset(path, cache_dir=None)
+        first = load_dataset(path, cache_dir=self.cache_dir, chunksize=64)
+        cached = load_dataset(path, cache_dir=self.cache_dir)
+
+        self.assertTrue(first.equals(parsed))
+        self.assertTrue(cached.equals(parsed))
+        # The frame owns its data: editing it leaves the cache entry untouched
+        cached.loc[0, 'Admission grade'] = -1.0
+        self.assertTrue(load_dataset(path, cache_dir=self.cache_dir).equals(parsed))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_changed_content_gets_a_new_cache_entry(self):
+        path = self._write_csv(50)
+        load_dataset(path, cache_dir=self.cache_dir)
+        with open(path, 'a') as f:
+            with open(DATA_PATH, encoding='utf-8-sig') as src:
+                f.write(src.readlines()[60])
+        df = load_dataset(path, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(df), 51)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+
+    def test_chunks_and_schema_errors(self):
+        path = self._write_csv(100)
+        self.assertEqual([len(c) for c in iter_chunks(path, chunksize=40)], [40, 40, 20])
+
+        bad_path = os.path.join(self.tmp, 'bad.csv')
+        pd.read_csv(path, sep=';').drop(columns='GDP').to_csv(bad_path, sep=';', index=False)
+        with self.assertRaises(ValueError):
+            load_dataset(bad_path, cache_dir=None)
+
+    def test_out_of_range_integers_are_rejected_not_wrapped(self):
+        path = self._write_csv(20)
+        df = pd.read_csv(path, sep=';', encoding='utf-8-sig')
+        df.loc[7, 'Age at enrollment'] = 300  # int8 would wrap this to 44
+        bad_path = os.path.join(self.tmp, 'ages.csv')
+        df.to_csv(bad_path, sep=';', index=False)
+        with self.assertRaisesRegex(ValueError, "Age at enrollment"):
+            load_dataset(bad_path, cache_dir=None)
+        with self.assertRaisesRegex(ValueError, "Age at enrollment"):
+            load_dataset(bad_path, cache_dir=self.cache_dir)
+
+if __name__ == '__main__':
+    unittest.main()
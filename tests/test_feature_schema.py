@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import pandas as pd
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from data_loader import CSV_SCHEMA, normalize_header
+from feature_schema import FEATURE_SCHEMA
+
+class TestFeatureSchema(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.raw = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig', nrows=20)
+        cls.expected = cls.raw[list(CSV_SCHEMA)].to_numpy(dtype=np.float64)
+
+    def test_every_source_produces_the_same_matrix(self):
+        snake = self.raw.rename(columns=normalize_header)
+        records = snake[list(FEATURE_SCHEMA.features)].to_dict('records')
+
+        # data.csv headers, shuffled snake_case columns, mappings and objects
+        np.testing.assert_array_equal(FEATURE_SCHEMA.from_frame(self.raw), self.expected)
+        np.testing.assert_array_equal(FEATURE_SCHEMA.from_frame(snake[snake.columns[::-1]]), self.expected)
+        np.testing.assert_array_equal(FEATURE_SCHEMA.matrix(records), self.expected)
+        np.testing.assert_array_equal(FEATURE_SCHEMA.matrix([SimpleNamespace(**r) for r in records]), self.expected)
+
+    def test_row_buffer_is_reused_per_thread(self):
+        buffer = FEATURE_SCHEMA.row_buffer()
+        record = dict(zip(FEATURE_SCHEMA.features, self.expected[3]))
+        row = FEATURE_SCHEMA.row(record, buffer)
+        self.assertIs(row, buffer)
+        self.assertIs(FEATURE_SCHEMA.row_buffer(), buffer)
+        np.testing.assert_array_equal(row, self.expected[3])
+
+    def test_invalid_input(self):
+        record = dict(zip(FEATURE_SCHEMA.features, self.expected[0]))
+        with self.assertRaises(ValueError) as ctx:
+            FEATURE_SCHEMA.positions(['Course', 'GDP'])
+        self.assertIn('marital_status', str(ctx.exception))
+        with self.assertRaises(KeyError):
+            FEATURE_SCHEMA.row({k: v for k, v in record.items() if k != 'gdp'})
+        with self.assertRaises(ValueError):
+            FEATURE_SCHEMA.row({**record, 'gdp': 'high'})
+        self.assertTrue(np.isnan(FEATURE_SCHEMA.row({**record, 'gdp': None})[-1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import pickle
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+
+from sklearn.ensemble import (RandomForestClassifier, ExtraTreesClassifier, GradientBoostingClassifier,
+                              HistGradientBoostingClassifier)
+from sklearn.linear_model import LogisticRegression
+from forest_engine import CompiledForest
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+SERVED_MODEL_PATH = os.path.join(
+    os.path.dirname(__file__),
+    '../student_dropout_project/student_dropout_project/predictor/ml_models/best_student_dropout_model.pkl'
+)
+
+class TestCompiledForestParity(unittest.TestCase):
+    """The compiled engine must reproduce sklearn's predict_proba bit for bit."""
+
+    @classmethod
+    def setUpClass(cls):
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig')
+        cls.X = df.drop('Target', axis=1).to_numpy(dtype=np.float64)
+        cls.y = df['Target'].to_numpy()
+        cls.X_train, cls.X_test = cls.X[:3000], cls.X[3000:]
+        cls.y_train = cls.y[:3000]
+
+    def assertParity(self, model, X):
+        engine = CompiledForest.from_estimator(model)
+        expected = model.predict_proba(X)
+        actual = engine.predict_proba(X)
+        self.assertTrue(np.array_equal(expected, actual))
+        np.testing.assert_array_equal(engine.predict(X), model.predict(X))
+
+    def test_random_forest(self):
+        # n_jobs=1 so sklearn accumulates the trees in a deterministic order
+        model = RandomForestClassifier(n_estimators=30, random_state=42, n_jobs=1)
+        model.fit(self.X_train, self.y_train)
+        self.assertParity(model, self.X_test)
+
+    def test_extra_trees_encoded_target(self):
+        model = ExtraTreesClassifier(n_estimators=20, max_depth=8, random_state=0, n_jobs=1)
+        model.fit(self.X_train, (self.y_train == 'Dropout').astype(int))
+        self.assertParity(model, self.X_test)
+
+    def test_binary_gradient_boosting(self):
+        model = GradientBoostingClassifier(n_estimators=20, random_state=0)
+        model.fit(self.X_train, (self.y_train == 'Dropout').astype(int))
+        self.assertParity(model, self.X_test)
+
+    def test_hist_gradient_boosting_with_missing_values(self):
+        X_train = self.X_train.copy()
+        X_train[::7, 3] = np.nan  # learns a missing-value direction for this feature
+        model = HistGradientBoostingClassifier(max_iter=30, random_state=0).fit(X_train, self.y_train)
+        X_test = self.X_test.copy()
+        X_test[::5, 3] = np.nan
+        X_test[::11, 6] = np.nan  # never missing in training
+        self.assertParity(model, X_test)
+
+        binary = HistGradientBoostingClassifier(max_iter=20, random_state=0)
+        binary.fit(self.X_train, (self.y_train == 'Dropout').astype(int))
+        self.assertParity(binary, self.X_test)
+
+    def test_served_pipeline(self):
+        with open(SERVED_MODEL_PATH, 'rb') as f:
+            pipeline = pickle.load(f)
+        frame = pd.DataFrame(self.X_test, columns=pipeline.feature_names_in_)
+        engine = CompiledForest.from_estimator(pipeline)
+        self.assertTrue(np.array_equal(pipeline.predict_proba(frame), engine.predict_proba(self.X_test)))
+
+    def test_single_row_and_chunking(self):
+        model = RandomForestClassifier(n_estimators=10, random_state=1, n_jobs=1).fit(self.X_train, self.y_train)
+        engine = CompiledForest.from_estimator(model, chunk_size=7)
+        expected = model.predict_proba(self.X_test[:50])
+        self.assertTrue(np.array_equal(engine.predict_proba(self.X_test[:50]), expected))
+        self.assertTrue(np.array_equal(engine.predict_proba(self.X_test[0]), expected[:1]))
+
+    def test_non_finite_rows_follow_sklearn(self):
+        X = self.X_test[:4].copy()
+        X[2, 1] = np.nan
+        boosted = GradientBoostingClassifier(n_estimators=5, random_state=0).fit(self.X_train, self.y_train)
+        with self.assertRaises(ValueError):
+            boosted.predict_proba(X)
+        with self.assertRaisesRegex(ValueError, r"rows \[2\]"):
+            CompiledForest.from_estimator(boosted).predict_proba(X)
+
+        forest = RandomForestClassifier(n_estimators=5, random_state=0, n_jobs=1).fit(self.X_train, self.y_train)
+        engine = CompiledForest.from_estimator(forest)
+        self.assertEqual(engine.allow_nan, forest.__sklearn_tags__().input_tags.allow_nan)
+        if engine.allow_nan:
+            self.assertTrue(np.array_equal(engine.predict_proba(X), forest.predict_proba(X)))
+        X[2, 1] = np.inf
+        with self.assertRaises(ValueError):
+            forest.predict_proba(X)
+        with self.assertRaises(ValueError):
+            engine.predict_proba(X)
+
+        hist = HistGradientBoostingClassifier(max_iter=5, random_state=0).fit(self.X_train, self.y_train)
+        X[1, 0] = np.nan
+        self.assertTrue(np.array_equal(CompiledForest.from_estimator(hist).predict_proba(X), hist.predict_proba(X)))
+
+    def test_rejects_unsupported_models(self):
+        model = LogisticRegression(max_iter=50).fit(self.X_train[:200], self.y_train[:200])
+        with self.assertRaises(TypeError):
+            CompiledForest.from_estimator(model)
+
+if __name__ == '__main__':
+    unittest.main()
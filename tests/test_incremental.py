@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+import shutil
+import pickle
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+SERVED_MODEL_PATH = os.path.join(os.path.dirname(__file__),
+                                 '../student_dropout_project/student_dropout_project/predictor/ml_models/best_student_dropout_model.pkl')
+
+from sklearn.ensemble import RandomForestClassifier
+from train_model import load_data, preprocess_data, retrain_incremental
+from incremental import extend_model
+from bundle import ModelBundle
+from registry import ModelRegistry
+
+class TestIncrementalTraining(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.df = load_data(DATA_PATH)
+        cls.X, cls.y, _ = preprocess_data(cls.df)
+        cls.labels = cls.df['Target'].astype(str)
+        cls.forest = RandomForestClassifier(n_estimators=30, random_state=0).fit(cls.X[:3000], cls.y[:3000])
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_appends_trees_and_keeps_the_original(self):
+        before = self.forest.predict_proba(self.X[:50])
+        extended = extend_model(self.forest, self.X[3000:], self.labels[3000:], n_new_trees=10)
+
+        self.assertEqual(len(extended.estimators_), 40)
+        self.assertEqual(len(self.forest.estimators_), 30)
+        self.assertTrue(np.array_equal(self.forest.predict_proba(self.X[:50]), before))
+        # Old trees are carried over unchanged
+        self.assertTrue(np.array_equal(extended.estimators_[0].tree_.threshold,
+                                       self.forest.estimators_[0].tree_.threshold))
+
+    def test_retire_oldest_keeps_ensemble_size(self):
+        extended = extend_model(self.forest, self.X[3000:], self.labels[3000:], n_new_trees=10, retire_oldest=True)
+        self.assertEqual(len(extended.estimators_), 30)
+        self.assertEqual(extended.n_estimators, 30)
+        self.assertTrue(np.array_equal(extended.estimators_[0].tree_.threshold,
+                                       self.forest.estimators_[10].tree_.threshold))
+
+    def test_batch_missing_a_class_is_rejected(self):
+        graduates = (self.labels == 'Graduate').to_numpy()
+        with self.assertRaises(ValueError):
+            extend_model(self.forest, self.X[graduates], self.labels[graduates], n_new_trees=5)
+
+    def test_served_boosting_pipeline(self):
+        with open(SERVED_MODEL_PATH, 'rb') as f:
+            served = pickle.load(f)
+        X = self.X.copy()
+        X.columns = served.feature_names_in_
+        extended = extend_model(served, X[4000:], self.labels[4000:], n_new_trees=5)
+
+        self.assertEqual(extended[-1].n_estimators, served[-1].n_estimators + 5)
+        self.assertEqual(extended.predict_proba(X[:5]).shape, (5, 3))
+        with self.assertRaises(ValueError):
+            extend_model(served, X[4000:], self.labels[4000:], n_new_trees=5, retire_oldest=True)
+
+    def test_retrain_from_new_csv(self):
+        model_path = ModelBundle.from_model(self.forest).save(os.path.join(self.tmp, 'model.joblib'))
+        new_csv = os.path.join(self.tmp, 'new.csv')
+        self.df[3000:].to_csv(new_csv, sep=';', index=False)
+        registry = ModelRegistry(os.path.join(self.tmp, 'registry'))
+
+        _, version = retrain_incremental(new_csv, model_path, n_new_trees=5, retire_oldest=True,
+                                         registry_dir=registry.root, activate=False)
+        self.assertIsNone(registry.current())
+        bundle, metadata = registry.load(version)
+        self.assertEqual(len(bundle.model.estimators_), 30)
+        self.assertEqual(bundle.labels, ['Dropout', 'Enrolled', 'Graduate'])
+        self.assertEqual(metadata['incremental']['new_rows'], len(self.df) - 3000)
+
+        # Without a model path, the registry's current version is extended and replaced
+        registry.activate(version)
+        _, extended_version = retrain_incremental(new_csv, n_new_trees=5, registry_dir=registry.root)
+        self.assertEqual(registry.current(), extended_version)
+        self.assertEqual(len(registry.load(extended_version)[0].model.estimators_), 35)
+        self.assertEqual(registry.metadata(extended_version)['incremental']['base'], version)
+
+if __name__ == '__main__':
+    unittest.main()
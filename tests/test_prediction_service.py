@@ -0,0 +1,323 @@
+import unittest
+import tempfile
+import shutil
+import threading
+import time
+from unittest import mock
+import joblib
+import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add the Django project to path and configure settings
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/student_dropout_project')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+sys.path.append(PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
+
+import django
+django.setup()
+
+from django.test import override_settings
+from sklearn.ensemble import RandomForestClassifier
+from predictor.services import PredictionService
+from predictor.cache import PredictionCache
+from registry import ModelRegistry
+from bundle import ModelBundle, BundleSchemaError
+from attribution import class_output
+
+class TestPredictionService(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # A handful of real students from the shipped dataset
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').head(20)
+        df = df.drop('Target', axis=1)
+        df.columns = PredictionService._feature_columns
+        cls.df = df
+
+    def test_predict_batch_accepts_all_input_types(self):
+        from_frame = PredictionService.predict_batch(self.df)
+        from_records = PredictionService.predict_batch(self.df.to_dict('records'))
+        from_array = PredictionService.predict_batch(self.df.to_numpy())
+
+        self.assertEqual(len(from_frame), 20)
+        self.assertEqual(from_frame, from_records)
+        self.assertEqual(from_frame, from_array)
+
+    def test_predict_batch_matches_single_predictions(self):
+        batch = PredictionService.predict_batch(self.df)
+        for record, expected in zip(self.df.to_dict('records'), batch):
+            self.assertEqual(PredictionService.predict(record), expected)
+
+    def test_metadata_shape(self):
+        label, metadata = PredictionService.predict(self.df.iloc[0].to_dict())
+        self.assertIn(label, ['Dropout', 'Enrolled', 'Graduate'])
+        self.assertIn(metadata['risk_level'], ['Low', 'Moderate', 'High', 'Critical'])
+        self.assertTrue(0.0 <= metadata['dropout_probability'] <= 100.0)
+        self.assertIsInstance(metadata['risk_drivers'], list)
+
+    def test_risk_drivers_come_from_attributions(self):
+        bundle, _ = PredictionService._snapshot()
+        X = self.df.to_numpy(dtype=np.float64)
+        phi = bundle.attribution.shap_values(X, PredictionService._dropout_index(bundle))
+        results = PredictionService.predict_batch(X)
+        for row, contributions, (_, metadata) in zip(X, phi, results):
+            top = int(np.argmax(contributions))
+            if contributions[top] <= 0:
+                self.assertEqual(metadata['risk_drivers'], [])
+                continue
+            name = PredictionService._schema.display_names[PredictionService._feature_columns[top]]
+            first = metadata['risk_drivers'][0]
+            self.assertEqual(metadata['risk_driver_codes'][0], PredictionService._feature_columns[top])
+            self.assertTrue(first.startswith(name) or first in {label for _, _, label in
+                                                                PredictionService._risk_driver_rules})
+
+        # Bulk batches (here 400 rows, past the engine cut-off) name the same drivers as single predictions
+        bulk = PredictionService.predict_batch(np.tile(X, (20, 1)))
+        self.assertEqual({m['risk_driver_method'] for _, m in bulk}, {'attribution'})
+        self.assertEqual([m['risk_driver_codes'] for _, m in bulk[-len(X):]],
+                         [PredictionService.predict(record)[1]['risk_driver_codes']
+                          for record in self.df.to_dict('records')])
+
+    def test_batches_over_attribution_budget_use_rule_flags(self):
+        bundle, _ = PredictionService._snapshot()
+        X = self.df.to_numpy(dtype=np.float64)
+        output, _ = class_output(bundle.engine, PredictionService._dropout_index(bundle))
+        row_cost = bundle.attribution.row_cost(output)
+        # Budget for 5 rows: the 20-row batch falls back, a single prediction is always explained
+        with mock.patch.object(PredictionService, '_attribution_max_work', 5 * row_cost):
+            self.assertEqual(PredictionService._attribution_row_limit(bundle), 5)
+            over = PredictionService.predict_batch(X)
+            within = PredictionService.predict_batch(X[:5])
+            explained = PredictionService.predict_batch(X, explain_all=True)
+        with mock.patch.object(PredictionService, '_attribution_max_work', 0):
+            _, single = PredictionService.predict(self.df.iloc[0].to_dict())
+        with mock.patch.object(PredictionService, '_attribution_max_rows', 5):
+            capped = PredictionService.predict_batch(X)
+
+        self.assertEqual({m['risk_driver_method'] for _, m in over}, {'rules'})
+        self.assertEqual({m['risk_driver_method'] for _, m in capped}, {'rules'})
+        self.assertEqual({m['risk_driver_method'] for _, m in within + explained}, {'attribution'})
+        self.assertEqual(single['risk_driver_method'], 'attribution')
+        # Only the drivers change; the scores do not depend on the budget
+        self.assertEqual([(label, m['dropout_probability']) for label, m in over],
+                         [(label, m['dropout_probability']) for label, m in explained])
+        self.assertEqual([m['risk_driver_codes'] for _, m in over],
+                         [[f for f, _ in row] for row in PredictionService._flagged_drivers(X)])
+
+    def test_models_without_attributions_use_rule_flags(self):
+        X = self.df.to_numpy(dtype=np.float64)
+        with mock.patch.object(ModelBundle, 'attribution', new_callable=mock.PropertyMock, return_value=None):
+            results = PredictionService.predict_batch(X)
+        self.assertEqual({m['risk_driver_method'] for _, m in results}, {'rules'})
+        flagged = PredictionService._flagged_drivers(X)
+        self.assertEqual([m['risk_driver_codes'] for _, m in results], [[f for f, _ in row] for row in flagged])
+        self.assertEqual([m['risk_drivers'] for _, m in results], [[label for _, label in row] for row in flagged])
+
+    def test_compiled_engine_matches_sklearn_backend(self):
+        self.assertIsNotNone(PredictionService._snapshot()[0].engine)
+        engine_results = PredictionService.predict_batch(self.df)
+
+        original = PredictionService._engine_max_rows
+        PredictionService._engine_max_rows = 0  # route everything through sklearn
+        try:
+            sklearn_results = PredictionService.predict_batch(self.df)
+        finally:
+            PredictionService._engine_max_rows = original
+        self.assertEqual(engine_results, sklearn_results)
+
+    def test_exported_artifact_is_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = PredictionService.export_artifact(os.path.join(tmp, 'model.joblib'))
+            artifact = joblib.load(path, mmap_mode='r')
+            engine = artifact['engine']
+            self.assertIsInstance(engine.threshold, np.memmap)
+            expected = PredictionService._snapshot()[0].engine.predict_proba(self.df.to_numpy())
+            self.assertTrue(np.array_equal(engine.predict_proba(self.df.to_numpy()), expected))
+            del artifact, engine
+
+    def test_newer_pickle_wins_over_a_stale_bundle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            bundle_path = PredictionService.export_artifact(os.path.join(tmp, 'model.joblib'))
+            pickle_path = os.path.join(tmp, 'model.pkl')
+            shutil.copyfile(PredictionService._pickle_path, pickle_path)
+            with mock.patch.object(PredictionService, '_artifact_path', bundle_path), \
+                    mock.patch.object(PredictionService, '_pickle_path', pickle_path):
+                os.utime(pickle_path, (0, 1_000))
+                os.utime(bundle_path, (0, 2_000))
+                self.assertTrue(PredictionService._bundle_is_current())
+
+                os.utime(pickle_path, (0, 3_000))
+                with self.assertLogs('predictor.services', 'WARNING') as logs:
+                    self.assertFalse(PredictionService._bundle_is_current())
+                self.assertIn('newer than the exported bundle', logs.output[0])
+
+    def test_concurrent_first_requests_load_once(self):
+        loaded = []
+        original_load = PredictionService._load_artifact.__func__
+
+        def counting_load(cls):
+            loaded.append(1)
+            original_load(cls)
+
+        PredictionService._model = None
+        with mock.patch.object(PredictionService, '_load_artifact', classmethod(counting_load)):
+            threads = [threading.Thread(target=PredictionService._load_model) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(len(loaded), 1)
+        self.assertIsNotNone(PredictionService._model)
+
+    def test_rejects_misshaped_array(self):
+        with self.assertRaises(ValueError):
+            PredictionService.predict_batch(np.zeros((2, 5)))
+
+class TestRegistryRollForward(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        df = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig')
+        y = df.pop('Target')
+        df.columns = PredictionService._feature_columns
+        cls.X = df.head(10)
+        cls.tmp = tempfile.mkdtemp()
+        cls.registry = ModelRegistry(os.path.join(cls.tmp, 'registry'))
+        cls.first = cls.registry.register(
+            ModelBundle.from_model(RandomForestClassifier(n_estimators=5, random_state=0).fit(df, y)))
+        cls.second = cls.registry.register(
+            ModelBundle.from_model(RandomForestClassifier(n_estimators=7, random_state=1).fit(df, y)))
+        # Fitted without one of the service's input features
+        cls.mismatched = cls.registry.register(
+            ModelBundle.from_model(RandomForestClassifier(n_estimators=3).fit(df.drop(columns='gdp'), y)))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def setUp(self):
+        self.settings = override_settings(PREDICTOR_REGISTRY={
+            'ROOT': self.registry.root, 'PIN': None, 'REFRESH_SECONDS': 0.01})
+        self.settings.enable()
+        self.registry.activate(self.first)
+        PredictionService._model = None
+
+    def tearDown(self):
+        self.settings.disable()
+        # Back to the model configured for the rest of the suite
+        PredictionService._pinned_version = None
+        PredictionService._model = None
+
+    def expected(self, version):
+        bundle, _ = self.registry.load(version)
+        return bundle.model.predict_proba(self.X)
+
+    def test_follows_the_current_pointer_without_restart(self):
+        PredictionService.predict_batch(self.X)
+        self.assertEqual(PredictionService.registry_version, self.first)
+        np.testing.assert_allclose(PredictionService._snapshot()[0].engine.predict_proba(self.X.to_numpy()),
+                                   self.expected(self.first))
+
+        self.registry.activate(self.second)
+        time.sleep(0.02)
+        results = PredictionService.predict_batch(self.X)
+        self.assertEqual(PredictionService.registry_version, self.second)
+        self.assertEqual(PredictionService.load_stats['registry_version'], self.second)
+        dropout = PredictionService._snapshot()[0].labels.index('Dropout')
+        np.testing.assert_allclose([meta['dropout_probability'] for _, meta in results],
+                                   np.round(self.expected(self.second)[:, dropout] * 100, 2))
+
+    def test_pin_holds_a_version_until_unpinned(self):
+        PredictionService.pin(self.second)
+        self.registry.activate(self.first)
+        time.sleep(0.02)
+        PredictionService.predict_batch(self.X)
+        self.assertEqual(PredictionService.registry_version, self.second)
+
+        PredictionService.unpin()
+        self.assertEqual(PredictionService.registry_version, self.first)
+        with self.assertRaises(FileNotFoundError):
+            PredictionService.pin('v0099')
+
+    def test_schema_mismatch_fails_at_load_not_per_request(self):
+        PredictionService.predict_batch(self.X)
+        with self.assertRaises(BundleSchemaError):
+            PredictionService.pin(self.mismatched)
+        self.assertEqual(PredictionService.registry_version, self.first)
+        self.assertEqual(len(PredictionService.predict_batch(self.X)), 10)
+
+    def test_incremental_retraining_rolls_the_service_forward(self):
+        from train_model import retrain_incremental
+        PredictionService.predict_batch(self.X)
+        self.assertEqual(PredictionService.registry_version, self.first)
+
+        new_csv = os.path.join(self.tmp, 'outcomes.csv')
+        pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').tail(300).to_csv(new_csv, sep=';', index=False)
+        extended, version = retrain_incremental(new_csv, n_new_trees=3, registry_dir=self.registry.root)
+        time.sleep(0.02)
+        results = PredictionService.predict_batch(self.X)
+        self.assertEqual(PredictionService.registry_version, version)
+        dropout = PredictionService._snapshot()[0].labels.index('Dropout')
+        np.testing.assert_allclose([meta['dropout_probability'] for _, meta in results],
+                                   np.round(extended.predict_proba(self.X)[:, dropout] * 100, 2))
+
+    def test_activate_validates_before_moving_the_pointer(self):
+        with self.assertRaises(BundleSchemaError):
+            self.registry.activate(self.mismatched, PredictionService._feature_columns)
+        self.assertEqual(self.registry.current(), self.first)
+
+    def test_startup_survives_an_unservable_model(self):
+        from predictor.apps import preload_model
+        with mock.patch.object(PredictionService, 'preload', side_effect=BundleSchemaError("bad bundle")):
+            with self.assertLogs('predictor.apps', 'ERROR') as logs:
+                preload_model()
+        self.assertIn('bad bundle', logs.output[0])
+
+    def test_only_the_server_entry_points_preload(self):
+        import importlib
+        from django.apps import apps
+        with mock.patch.object(PredictionService, 'preload') as preload:
+            # App setup runs for every manage.py command (migrate, check, ...)
+            apps.get_app_config('predictor').ready()
+            preload.assert_not_called()
+            for module in ('student_dropout_project.wsgi', 'student_dropout_project.asgi'):
+                sys.modules.pop(module, None)
+                importlib.import_module(module)
+            self.assertEqual(preload.call_count, 2)
+
+class TestPredictionCache(unittest.TestCase):
+
+    def test_repeat_submissions_hit_the_cache(self):
+        record = {col: 1 for col in PredictionService._feature_columns}
+        PredictionService._cache = PredictionCache(max_entries=8)
+        try:
+            first = PredictionService.predict(record)
+            second = PredictionService.predict(dict(record, course=1.0))  # same canonical vector
+            stats = PredictionService.cache_stats()
+        finally:
+            PredictionService._cache = None
+        self.assertEqual(first, second)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_lru_eviction_and_model_version_keys(self):
+        cache = PredictionCache(max_entries=2)
+        rows = np.eye(3)
+        for row in rows:
+            cache.set(PredictionCache.make_key(row, 'v1'), 'result')
+
+        self.assertIsNone(cache.get(PredictionCache.make_key(rows[0], 'v1')))
+        self.assertEqual(cache.get(PredictionCache.make_key(rows[2], 'v1')), 'result')
+        self.assertIsNone(cache.get(PredictionCache.make_key(rows[2], 'v2')))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        cache = PredictionCache(ttl=-1)
+        key = PredictionCache.make_key(np.zeros(3), 'v1')
+        cache.set(key, 'result')
+        self.assertIsNone(cache.get(key))
+
+if __name__ == '__main__':
+    unittest.main()
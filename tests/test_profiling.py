@@ -0,0 +1,63 @@
+import unittest
+import tempfile
+import shutil
+import json
+import time
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from profiling import RunProfiler, format_stages
+from train_model import load_training_data, train_model
+
+class TestRunProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_training_stages_are_timed_and_written(self):
+        profiler = RunProfiler(trace_allocations=True, profiler='cprofile')
+        X, y, _ = load_training_data(DATA_PATH, profiler)
+        train_model(X[:1000], y[:1000], backend='random_forest', profiler=profiler)
+        profiler.extra['version'] = 'v0001'
+        path = profiler.write(self.tmp)
+        profiler.close()
+
+        self.assertTrue(os.path.basename(path).endswith('-v0001.json'))
+        with open(path) as f:
+            report = json.load(f)
+        stages = [stage['stage'] for stage in report['stages']]
+        self.assertEqual(stages, ['load_data', 'preprocess', 'split', 'fit', 'evaluate'])
+        for stage in report['stages']:
+            self.assertGreaterEqual(stage['wall_seconds'], 0)
+            self.assertGreater(stage['peak_rss_bytes'], 0)
+            self.assertIn('alloc_peak_bytes', stage)
+        self.assertEqual(list(report['profiles']), ['fit'])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, report['profiles']['fit']['file'])))
+        self.assertTrue(report['profiles']['fit']['top_functions'])
+        self.assertIn('preprocess', format_stages(report))
+
+    def test_nested_stages_and_sampling(self):
+        profiler = RunProfiler(trace_allocations=True, profiler='sample', sample_interval=0.001)
+        with profiler.stage('fit'):
+            big = np.ones(2_000_000)  # 16 MB, freed before the inner stage
+            del big
+            with profiler.stage('inner'):
+                time.sleep(0.05)
+        profiler.close()
+        outer, inner = profiler.stages
+        self.assertEqual(inner['stage'], 'fit/inner')
+        # the inner stage's tracemalloc reset does not hide the outer stage's peak
+        self.assertGreaterEqual(outer['alloc_peak_bytes'], 16_000_000)
+        self.assertLess(inner['alloc_peak_bytes'], 16_000_000)
+        self.assertGreater(profiler.report()['profiles']['fit']['samples'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import argparse
+import tempfile
+import shutil
+from unittest import mock
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from sklearn.tree import DecisionTreeClassifier
+import train_model as train_module
+from registry import ModelRegistry, training_cache_key
+from bundle import ModelBundle
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.registry = ModelRegistry(os.path.join(self.tmp, 'registry'))
+        self.model = DecisionTreeClassifier(max_depth=2).fit(np.eye(4), [0, 1, 2, 0])
+        self.bundle = ModelBundle.from_model(self.model, features=['a', 'b', 'c', 'd'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_cache_key_covers_data_and_params(self):
+        other_csv = os.path.join(self.tmp, 'data.csv')
+        shutil.copy(DATA_PATH, other_csv)  # same contents, different path
+        key, components = training_cache_key(DATA_PATH, {'n_estimators': 100})
+
+        self.assertEqual(training_cache_key(other_csv, {'n_estimators': 100})[0], key)
+        self.assertNotEqual(training_cache_key(DATA_PATH, {'n_estimators': 200})[0], key)
+        self.assertIn('scikit-learn', components['libraries'])
+        with open(other_csv, 'a') as f:
+            f.write('\n')
+        self.assertNotEqual(training_cache_key(other_csv, {'n_estimators': 100})[0], key)
+
+    def test_versions_are_numbered_with_metadata(self):
+        first = self.registry.register(self.bundle, cache_key='a', metrics={'accuracy': 0.5}, training_seconds=1.23456)
+        second = self.registry.register(self.bundle, cache_key='b')
+
+        self.assertEqual((first, second), ('v0001', 'v0002'))
+        self.assertEqual(self.registry.versions(), ['v0001', 'v0002'])
+        meta = self.registry.metadata(first)
+        self.assertEqual(meta['version'], 'v0001')
+        self.assertEqual(meta['bundle_version'], self.bundle.version)
+        self.assertEqual(meta['metrics'], {'accuracy': 0.5})
+        self.assertEqual(meta['training_seconds'], 1.235)
+        self.assertGreater(meta['size_bytes'], 0)
+        self.assertIn('load_seconds', meta)
+        self.assertEqual(self.registry.lookup('b'), 'v0002')
+        self.assertIsNone(self.registry.lookup('missing'))
+        self.assertFalse([name for name in os.listdir(self.registry.root) if name.startswith('.staging')])
+
+    def test_activate_moves_the_current_pointer(self):
+        version = self.registry.register(self.bundle)
+        self.assertIsNone(self.registry.current())
+        self.registry.activate(version)
+        self.assertEqual(self.registry.current(), version)
+
+        with self.assertRaises(FileNotFoundError):
+            self.registry.activate('v0099')
+        bundle, _ = self.registry.load(version)
+        np.testing.assert_array_equal(bundle.model.predict(np.eye(4)), self.model.predict(np.eye(4)))
+        self.assertEqual(bundle.labels, ['Dropout', 'Enrolled', 'Graduate'])
+
+class TestTrainingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.args = argparse.Namespace(search=False, candidates=24, factor=3, cv=None, cv_repeats=1,
+                                       workers=None, search_dir=None, force=False,
+                                       prune_tolerance=None, backend='random_forest')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_identical_inputs_skip_training(self):
+        registry_dir = os.path.join(self.tmp, 'registry')
+        bundle, version = train_module.train_or_reuse(self.args, DATA_PATH, registry_dir)
+        self.assertEqual(version, 'v0001')
+        self.assertEqual(bundle.labels, ['Dropout', 'Enrolled', 'Graduate'])
+
+        with mock.patch.object(train_module, 'train_model', side_effect=AssertionError("retrained")):
+            cached, cached_version = train_module.train_or_reuse(self.args, DATA_PATH, registry_dir)
+        self.assertEqual(cached_version, version)
+        self.assertEqual(cached.version, bundle.version)
+
+        self.args.force = True
+        _, forced_version = train_module.train_or_reuse(self.args, DATA_PATH, registry_dir)
+        self.assertEqual(forced_version, 'v0002')
+        registry = ModelRegistry(registry_dir)
+        self.assertEqual(registry.current(), 'v0002')
+        self.assertIn('accuracy', registry.metadata('v0002')['metrics'])
+
+if __name__ == '__main__':
+    unittest.main()
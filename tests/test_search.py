@@ -0,0 +1,76 @@
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '../src'))
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+
+from train_model import load_data, preprocess_data
+from search import run_search, rung_sizes, sample_candidates, SearchCheckpoint
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def test_rung_sizes_grow_to_the_full_training_set(self):
+        self.assertEqual(rung_sizes(27, 2700, factor=3, min_resources=10), [100, 300, 900, 2700])
+        self.assertEqual(rung_sizes(9, 2700, factor=3, min_resources=500), [500, 900, 2700])
+        self.assertEqual(rung_sizes(1, 2700), [2700])
+
+    def test_candidates_are_deterministic_and_balanced(self):
+        candidates = sample_candidates(8)
+        self.assertEqual(candidates, sample_candidates(8))
+        self.assertEqual(len({c['id'] for c in candidates}), 8)
+        families = [c['family'] for c in candidates]
+        self.assertEqual(sorted(set(families.count(f) for f in set(families))), [2])
+
+class TestSearchRun(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        X, y, _ = preprocess_data(load_data(DATA_PATH))
+        cls.X, cls.y = X.to_numpy()[:600], y[:600]
+
+    def setUp(self):
+        self.search_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.search_dir)
+
+    def _search(self):
+        return run_search(self.X, self.y, self.search_dir, n_candidates=4, factor=2, min_resources=100,
+                          max_workers=2, families=['random_forest', 'gradient_boosting'], log=lambda msg: None)
+
+    def test_search_resumes_from_checkpoint(self):
+        model, leaderboard = self._search()
+        self.assertEqual(len(leaderboard), 1)
+        self.assertEqual(model.predict(self.X[:5]).shape, (5,))
+        for key in ('f1_macro', 'accuracy', 'single_row_ms', 'batch_1000_ms', 'engine_single_row_ms'):
+            self.assertIn(key, leaderboard[0])
+
+        # Drop the final rung as if the run had been interrupted there
+        path = os.path.join(self.search_dir, 'checkpoint.json')
+        with open(path) as f:
+            state = json.load(f)
+        final = [key for key in state['results'] if key.startswith('2:')]
+        for key in final:
+            del state['results'][key]
+        with open(path, 'w') as f:
+            json.dump(state, f)
+
+        _, resumed = self._search()
+        with open(os.path.join(self.search_dir, 'leaderboard.json')) as f:
+            report = json.load(f)
+        self.assertEqual(report['evaluated_this_run'], len(final))
+        self.assertEqual(resumed[0]['id'], leaderboard[0]['id'])
+
+    def test_checkpoint_from_another_search_is_rejected(self):
+        path = os.path.join(self.search_dir, 'checkpoint.json')
+        SearchCheckpoint(path, 'a').record(0, 'rf-000', {'score': 1.0})
+        with self.assertRaises(ValueError):
+            SearchCheckpoint(path, 'b')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import io
+import unittest
+import sys
+import os
+import pandas as pd
+
+# Add the Django project to path and configure settings
+PROJECT_DIR = os.path.join(os.path.dirname(__file__), '../student_dropout_project/student_dropout_project')
+DATA_PATH = os.path.join(os.path.dirname(__file__), '../data.csv')
+sys.path.append(PROJECT_DIR)
+sys.path.append(os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_dropout_project.settings')
+
+import django
+django.setup()
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from django_db import setUpModule, tearDownModule  # noqa: F401
+from predictor.models import PredictionHistory, CohortSummary, CohortDriverCount
+from predictor.services import PredictionService
+
+class TestCohortUpload(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counselor', password='secret-pass')
+        with open(DATA_PATH, 'rb') as f:
+            cls.raw_csv = f.read()
+
+    def setUp(self):
+        self.client.login(username='counselor', password='secret-pass')
+
+    def _upload(self, content):
+        upload = SimpleUploadedFile('cohort.csv', content, content_type='text/csv')
+        return self.client.post('/predict/upload/', {'csv_file': upload})
+
+    def test_full_export_is_scored_and_saved(self):
+        response = self._upload(self.raw_csv)
+        self.assertRedirects(response, '/history/', fetch_redirect_response=False)
+        self.assertEqual(PredictionHistory.objects.filter(user=self.user).count(), 4424)
+
+        first = PredictionHistory.objects.filter(user=self.user).order_by('id').first()
+        self.assertEqual(first.course, 171)
+        self.assertEqual(first.daytime_evening_attendance, 1)
+        self.assertIn(first.prediction_result, ['Dropout', 'Enrolled', 'Graduate'])
+        # Risk metadata is stored with every row
+        self.assertEqual(first.model_version, PredictionService.model_version)
+        self.assertIn(first.risk_level, ['Low', 'Moderate', 'High', 'Critical'])
+        self.assertFalse(PredictionHistory.objects.filter(risk_level__isnull=True).exists())
+
+        critical = PredictionHistory.objects.filter(user=self.user, risk_level='Critical').count()
+        response = self.client.get('/history/', {'risk_level': 'Critical'})
+        self.assertEqual(len(response.context['histories']), min(critical, 25))
+        self.assertTrue(all(item.risk_level == 'Critical' for item in response.context['histories']))
+        if critical > 25:
+            self.assertIn('risk_level=Critical', response.context['next_cursor'])
+
+    def test_missing_columns_save_nothing(self):
+        header, *rows = self.raw_csv.decode('utf-8-sig').splitlines()
+        truncated = ';'.join(header.split(';')[1:]) + '\n' + '\n'.join(';'.join(r.split(';')[1:]) for r in rows[:5])
+        response = self._upload(truncated.encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Missing columns: marital_status')
+        self.assertEqual(PredictionHistory.objects.count(), 0)
+
+class TestHistoryPagination(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counselor', password='secret-pass')
+        other = User.objects.create_user('someone-else', password='secret-pass')
+        fields = {f.name: 1 for f in PredictionHistory._meta.fields
+                  if f.name not in ('id', 'user', 'created_at', 'prediction_result', 'dropout_probability',
+                                    'risk_level', 'risk_driver_codes', 'risk_driver_method', 'model_version')}
+        # bulk_create gives many rows the same created_at, exercising the id tie-breaker
+        PredictionHistory.objects.bulk_create(
+            [PredictionHistory(user=cls.user, prediction_result='Graduate', **fields) for _ in range(60)]
+            + [PredictionHistory(user=other, prediction_result='Dropout', **fields) for _ in range(5)]
+        )
+
+    def test_pages_cover_every_row_once_newest_first(self):
+        self.client.login(username='counselor', password='secret-pass')
+        seen, url = [], '/history/'
+        while url:
+            response = self.client.get(url)
+            page = response.context['histories']
+            self.assertLessEqual(len(page), 25)
+            seen.extend(item.pk for item in page)
+            cursor = response.context['next_cursor']
+            url = f'/history/?{cursor}' if cursor else None
+
+        expected = list(PredictionHistory.objects.filter(user=self.user)
+                        .order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_only_displayed_columns_are_loaded(self):
+        self.client.login(username='counselor', password='secret-pass')
+        item = self.client.get('/history/').context['histories'][0]
+        deferred = item.get_deferred_fields()
+        self.assertIn('gdp', deferred)
+        self.assertNotIn('prediction_result', deferred)
+
+class TestCohortSummaries(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counselor', password='secret-pass')
+        cls.dean = User.objects.create_user('dean', password='secret-pass', is_staff=True)
+        with open(DATA_PATH, 'rb') as f:
+            cls.raw_csv = b'\n'.join(f.read().splitlines()[:41])
+
+    def _upload(self):
+        self.client.login(username='counselor', password='secret-pass')
+        upload = SimpleUploadedFile('cohort.csv', self.raw_csv, content_type='text/csv')
+        self.client.post('/predict/upload/', {'csv_file': upload})
+
+    def test_upload_updates_summaries_incrementally(self):
+        self._upload()
+        # Scored from the file: the history's integer grade columns round some values
+        frame = pd.read_csv(io.BytesIO(self.raw_csv), sep=';', encoding='utf-8-sig')
+        results = PredictionService.predict_batch(frame)
+        courses = {}
+        drivers = {}
+        for course, (_, metadata) in zip(frame['Course'], results):
+            courses[course] = courses.get(course, 0) + 1
+            for feature in metadata['risk_driver_codes']:
+                drivers[feature] = drivers.get(feature, 0) + 1
+
+        summary_courses = {}
+        for summary in CohortSummary.objects.all():
+            summary_courses[summary.course] = summary_courses.get(summary.course, 0) + summary.predictions
+        self.assertEqual(summary_courses, courses)
+        driver_counts = {}
+        for count in CohortDriverCount.objects.all():
+            driver_counts[count.feature] = driver_counts.get(count.feature, 0) + count.count
+        self.assertEqual(driver_counts, drivers)
+
+        # A second upload increments the same cells instead of adding rows
+        cells = CohortSummary.objects.count()
+        self._upload()
+        self.assertEqual(CohortSummary.objects.count(), cells)
+        self.assertEqual(sum(CohortSummary.objects.values_list('predictions', flat=True)), 80)
+
+    def test_dashboard_reads_summaries_for_staff_only(self):
+        self._upload()
+        response = self.client.get('/cohorts/')
+        self.assertEqual(response.status_code, 302)
+
+        self.client.login(username='dean', password='secret-pass')
+        response = self.client.get('/cohorts/')
+        self.assertEqual(response.status_code, 200)
+        report = response.context['report']
+        self.assertEqual(sum(cohort['predictions'] for cohort in report), 40)
+        self.assertEqual(sum(sum(c['by_risk_level'].values()) for c in report), 40)
+
+        course = report[0]['course']
+        response = self.client.get('/cohorts/', {'term': response.context['term'], 'course': course})
+        self.assertEqual([cohort['course'] for cohort in response.context['report']], [course])
+
+    def test_only_attribution_drivers_are_counted(self):
+        from django.core.management import call_command
+        from predictor.cohorts import CohortTotals
+        self._upload()
+        self.assertEqual(set(PredictionHistory.objects.values_list('risk_driver_method', flat=True)), {'attribution'})
+        drivers = sum(CohortDriverCount.objects.values_list('count', flat=True))
+
+        totals = CohortTotals()
+        totals.add(9254, '2026-09', {"risk_level": "High", "risk_driver_codes": ["debtor"],
+                                     "risk_driver_method": "rules"})
+        totals.save()
+        self.assertEqual(sum(CohortDriverCount.objects.values_list('count', flat=True)), drivers)
+
+        # Rows whose drivers came from the rules (or predate the method) count towards no driver
+        PredictionHistory.objects.update(risk_driver_method='rules')
+        call_command('rebuild_cohort_summaries', stdout=io.StringIO())
+        self.assertEqual(sum(CohortSummary.objects.values_list('predictions', flat=True)), 40)
+        self.assertFalse(CohortDriverCount.objects.exists())
+
+class TestPredictView(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counselor', password='secret-pass')
+
+    def _form_data(self):
+        record = pd.read_csv(DATA_PATH, sep=';', encoding='utf-8-sig').drop('Target', axis=1).iloc[0]
+        integer_fields = {f.name for f in PredictionHistory._meta.fields if f.get_internal_type() == 'IntegerField'}
+        return {name: int(round(value)) if name in integer_fields else value
+                for name, value in zip(PredictionService._feature_columns, record.tolist())}
+
+    def test_prediction_is_saved_with_risk_metadata(self):
+        self.client.login(username='counselor', password='secret-pass')
+        data = self._form_data()
+
+        response = self.client.post('/predict/', data)
+        history = PredictionHistory.objects.get(user=self.user)
+        self.assertRedirects(response, f'/result/{history.pk}/', fetch_redirect_response=False)
+
+        label, metadata = PredictionService.predict(history)
+        self.assertEqual(history.prediction_result, label)
+        self.assertEqual(history.risk_level, metadata['risk_level'])
+        self.assertEqual(history.dropout_probability, metadata['dropout_probability'])
+        self.assertEqual(history.risk_drivers, metadata['risk_driver_codes'])
+        self.assertEqual(history.model_version, PredictionService.model_version)
+
+        summary = CohortSummary.objects.get()
+        self.assertEqual((summary.course, summary.risk_level, summary.predictions),
+                         (history.course, history.risk_level, 1))
+
+    def test_posted_outcome_is_ignored(self):
+        self.client.login(username='counselor', password='secret-pass')
+        data = self._form_data()
+
+        self.client.post('/predict/', {**data, 'actual_outcome': 'Graduate'})
+        self.assertIsNone(PredictionHistory.objects.get(user=self.user).actual_outcome)
+
+if __name__ == '__main__':
+    unittest.main()